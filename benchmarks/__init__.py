@@ -0,0 +1,20 @@
+"""
+Benchmarks for the bot hot paths
+
+Run from the project root with the usual environment (.env or exported
+BOT_TOKEN, ADMIN_IDS, SUPER_ADMIN_ID), e.g.:
+
+    python -m benchmarks.bench_keyboards
+
+The hot path suites (bench_hotpath, bench_scale) also run under pytest
+when benchmarks/ is named explicitly (a plain pytest only runs tests/),
+and can write a JSON file to compare between runs:
+
+    python -m pytest benchmarks -q --bench-json after.json
+    python -m benchmarks.compare before.json after.json
+
+End-to-end throughput of the running bot, polling or webhook, against a
+local fake Bot API:
+
+    python -m benchmarks.load_test --rate 200 --duration 30
+"""
@@ -0,0 +1,95 @@
+"""
+Sync DatabaseManager on a thread pool vs AsyncDatabaseManager on asyncio
+
+Each simulated update does what the protected handler chain does:
+get_or_create_user, get_user and add_message.
+"""
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import memory_sqlite_url, print_table, temp_sqlite_database
+
+# The global db instance is created on import, keep it away from real data
+os.environ.setdefault('DATABASE_URL', memory_sqlite_url('global'))
+
+from bot.database.manager import DatabaseManager  # noqa: E402
+from bot.database.async_manager import AsyncDatabaseManager  # noqa: E402
+
+
+def run_sync(updates: int, users: int, workers: int) -> float:
+    """Updates per second with a dispatcher-like thread pool"""
+    with temp_sqlite_database('sync') as database_url:
+        return _run_sync(database_url, updates, users, workers)
+
+
+def _run_sync(database_url: str, updates: int, users: int, workers: int) -> float:
+    manager = DatabaseManager(database_url)
+    manager.user_cache.maxsize = 0  # measure the database, not the cache
+    
+    def handle(i: int):
+        user_id = i % users + 1
+        manager.get_or_create_user(user_id, first_name='bench')
+        manager.get_user(user_id)
+        manager.add_message(user_id, 'text', 'hello')
+    
+    # Create users up front: updates of one user are never handled concurrently
+    for user_id in range(1, users + 1):
+        manager.get_or_create_user(user_id, first_name='bench')
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(handle, range(updates)))
+    elapsed = time.perf_counter() - start
+    manager.close()
+    manager.engine.dispose()
+    return updates / elapsed
+
+
+async def run_async(updates: int, users: int, concurrency: int) -> float:
+    """Updates per second with concurrent asyncio tasks"""
+    with temp_sqlite_database('async') as database_url:
+        return await _run_async(database_url, updates, users, concurrency)
+
+
+async def _run_async(database_url: str, updates: int, users: int, concurrency: int) -> float:
+    manager = AsyncDatabaseManager(database_url)
+    await manager.init()
+    slots = asyncio.Semaphore(concurrency)
+    
+    async def handle(i: int):
+        user_id = i % users + 1
+        async with slots:
+            await manager.get_or_create_user(user_id, first_name='bench')
+            await manager.get_user(user_id)
+            await manager.add_message(user_id, 'text', 'hello')
+    
+    for user_id in range(1, users + 1):
+        await manager.get_or_create_user(user_id, first_name='bench')
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(handle(i) for i in range(updates)))
+    elapsed = time.perf_counter() - start
+    await manager.close()
+    return updates / elapsed
+
+
+def run(updates: int = 2000, users: int = 200, concurrency: int = 4) -> dict:
+    return {
+        f'sync ({concurrency} threads)': {
+            'updates_per_s': run_sync(updates, users, concurrency)
+        },
+        f'async ({concurrency} tasks)': {
+            'updates_per_s': asyncio.run(run_async(updates, users, concurrency))
+        },
+        f'async ({concurrency * 8} tasks)': {
+            'updates_per_s': asyncio.run(run_async(updates, users, concurrency * 8))
+        },
+    }
+
+
+if __name__ == '__main__':
+    updates = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print_table('Simulated updates, SQLite file database', run(updates))
@@ -0,0 +1,90 @@
+"""
+Write throughput of the engine profiles under concurrent dispatcher threads
+
+Each operation is what a handled update writes: get_or_create_user
+(touching last_activity) and add_message. Set BENCH_SERVER_URL to a
+PostgreSQL/MySQL URL to include the server profile.
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from sqlalchemy.exc import OperationalError
+
+from benchmarks.common import memory_sqlite_url, print_table, temp_sqlite_database
+
+# The global db instance is created on import, keep it away from real data
+os.environ.setdefault('DATABASE_URL', memory_sqlite_url('global'))
+
+from bot.database.engine import EngineProfile  # noqa: E402
+from bot.database.manager import DatabaseManager  # noqa: E402
+
+
+def run_profile(
+    database_url: str,
+    profile: str,
+    operations: int,
+    workers: int,
+    single_writer: bool = True
+) -> dict:
+    """Writes per second and failed operations for one profile"""
+    manager = DatabaseManager(database_url, profile=profile)
+    manager.user_cache.maxsize = 0
+    if not single_writer:
+        manager.writer_lock = nullcontext()
+    errors = 0
+    
+    def write(i: int):
+        nonlocal errors
+        user_id = i % 500 + 1
+        try:
+            manager.get_or_create_user(user_id, first_name='bench')
+            manager.add_message(user_id, 'text', 'hello')
+        except OperationalError:
+            # "database is locked" after busy timeout
+            errors += 1
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(write, range(operations)))
+    elapsed = time.perf_counter() - start
+    manager.close()
+    manager.engine.dispose()
+    
+    return {'ops_per_s': operations / elapsed, 'errors': errors}
+
+
+def run_sqlite_profile(name: str, profile: str, operations: int, workers: int, **kwargs) -> dict:
+    """run_profile on a fresh SQLite file that is removed afterwards"""
+    with temp_sqlite_database(name) as database_url:
+        return run_profile(database_url, profile, operations, workers, **kwargs)
+
+
+def run(operations: int = 2000, workers: int = 8) -> dict:
+    # Users are created by the first pass over each database
+    results = {
+        'default (rollback journal)': run_sqlite_profile(
+            'default', EngineProfile.DEFAULT, operations, workers
+        ),
+        'sqlite (WAL, concurrent writers)': run_sqlite_profile(
+            'wal', EngineProfile.SQLITE, operations, workers, single_writer=False
+        ),
+        'sqlite (WAL, single writer)': run_sqlite_profile(
+            'wal-lock', EngineProfile.SQLITE, operations, workers
+        ),
+    }
+    
+    server_url = os.environ.get('BENCH_SERVER_URL')
+    if server_url:
+        results['server (pooled)'] = run_profile(
+            server_url, EngineProfile.SERVER, operations, workers
+        )
+    return results
+
+
+if __name__ == '__main__':
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    print_table(f'Write operations, {workers} threads', run(operations, workers))
@@ -0,0 +1,147 @@
+"""
+Per-update hot path: handler chain, callback routing, i18n, keyboards, text helpers
+
+Handlers are called directly with stub Update/CallbackContext objects
+against an in-memory SQLite database, so the numbers are the bot's own
+cost per update without network or dispatcher overhead.
+
+    python -m benchmarks.bench_hotpath [results.json]
+    python -m pytest benchmarks/bench_hotpath.py [--bench-json results.json]
+"""
+import sys
+from typing import Callable, Dict
+
+from benchmarks.common import measure, print_table, use_memory_database, write_results
+
+use_memory_database()
+
+from benchmarks.bench_keyboards import CASES as KEYBOARD_CASES  # noqa: E402
+from benchmarks.stubs import StubContext, callback_update, message_update  # noqa: E402
+from bot.database import db  # noqa: E402
+from bot.handlers import (  # noqa: E402
+    help_command,
+    main_callback_handler,
+    menu_command,
+    profile_command,
+    start_command,
+    stats_command
+)
+from bot.locales import i18n  # noqa: E402
+from bot.utils import escape_markdown, split_message  # noqa: E402
+
+USER_ID = 1000
+
+SHORT_TEXT = "Hello, this is a short reply with *some* markdown_chars (and a link)."
+LONG_TEXT = "\n".join(f"Line {i}: " + "lorem ipsum dolor sit amet " * 4 for i in range(400))
+
+
+def _ensure_user():
+    # Handlers see a returning user, the common case
+    db.get_or_create_user(USER_ID, username='bench', first_name='Bench', language='en')
+
+
+def handler_cases() -> Dict[str, Callable]:
+    """Full protected_handler chain: track user, blocked check, message log, handler"""
+    _ensure_user()
+    handlers = {
+        '/start': start_command,
+        '/help': help_command,
+        '/menu': menu_command,
+        '/profile': profile_command,
+        '/stats': stats_command,
+    }
+    return {
+        command: (lambda handler=handler, command=command:
+                  handler(message_update(USER_ID, command), StubContext()))
+        for command, handler in handlers.items()
+    }
+
+
+def callback_cases() -> Dict[str, Callable]:
+    """main_callback_handler parsing and routing"""
+    _ensure_user()
+    return {
+        data: (lambda data=data: main_callback_handler(callback_update(USER_ID, data), StubContext()))
+        for data in ('menu:main', 'menu:stats', 'menu:help', 'settings:main', 'settings:language')
+    }
+
+
+def i18n_cases() -> Dict[str, Callable]:
+    """LocalizationManager.get lookups"""
+    return {
+        'plain': lambda: i18n.get('commands.help.message', 'en'),
+        'formatted': lambda: i18n.get('commands.start.message', 'en', name='Bench'),
+        'fallback language': lambda: i18n.get('commands.help.message', 'xx'),
+        'missing key': lambda: i18n.get('bench.missing.key', 'en'),
+    }
+
+
+def keyboard_cases() -> Dict[str, Callable]:
+    """Keyboard builders as handlers call them (cached)"""
+    return {
+        name: (lambda builder=builder, args=args: builder(*args))
+        for name, (builder, args) in KEYBOARD_CASES.items()
+    }
+
+
+def text_cases() -> Dict[str, Callable]:
+    """split_message and escape_markdown"""
+    return {
+        'split_message (short)': lambda: split_message(SHORT_TEXT),
+        f'split_message ({len(LONG_TEXT)} chars)': lambda: split_message(LONG_TEXT),
+        'escape_markdown (short)': lambda: escape_markdown(SHORT_TEXT),
+        f'escape_markdown ({len(LONG_TEXT)} chars)': lambda: escape_markdown(LONG_TEXT),
+    }
+
+
+SUITES = {
+    'handler_chain': (handler_cases, 500),
+    'callback_routing': (callback_cases, 500),
+    'i18n': (i18n_cases, 20000),
+    'keyboards': (keyboard_cases, 20000),
+    'text': (text_cases, 200),
+}
+
+
+def run_suite(suite: str, number: int = None) -> Dict[str, Dict[str, float]]:
+    """Per-call time of every case of a suite"""
+    cases, default_number = SUITES[suite]
+    return {
+        name: {'us_per_call': measure(func, number or default_number, repeat=3)}
+        for name, func in cases().items()
+    }
+
+
+def run() -> Dict[str, Dict[str, Dict[str, float]]]:
+    return {suite: run_suite(suite) for suite in SUITES}
+
+
+# ==================== pytest entry points ====================
+
+def bench_handler_chain(bench):
+    bench.record_suite(run_suite('handler_chain'))
+
+
+def bench_callback_routing(bench):
+    bench.record_suite(run_suite('callback_routing'))
+
+
+def bench_i18n(bench):
+    bench.record_suite(run_suite('i18n'))
+
+
+def bench_keyboards(bench):
+    bench.record_suite(run_suite('keyboards'))
+
+
+def bench_text(bench):
+    bench.record_suite(run_suite('text'))
+
+
+if __name__ == '__main__':
+    results = run()
+    for suite, cases in results.items():
+        print_table(f'{suite} (µs per call)', cases)
+    if len(sys.argv) > 1:
+        for suite, cases in results.items():
+            write_results(sys.argv[1], suite, cases)
@@ -0,0 +1,50 @@
+"""
+Keyboard builders: uncached build + serialize vs memoized markup
+"""
+from benchmarks.common import measure, print_table
+from bot.keyboards import (
+    main_menu_keyboard,
+    settings_keyboard,
+    language_keyboard,
+    admin_menu_keyboard,
+    confirm_keyboard,
+    main_menu_reply_keyboard,
+    cancel_keyboard
+)
+
+CASES = {
+    'main_menu_keyboard': (main_menu_keyboard, ('en',)),
+    'settings_keyboard': (settings_keyboard, ('en',)),
+    'language_keyboard': (language_keyboard, ('en',)),
+    'admin_menu_keyboard': (admin_menu_keyboard, ('en',)),
+    'confirm_keyboard': (confirm_keyboard, ('broadcast', 'en')),
+    'main_menu_reply_keyboard': (main_menu_reply_keyboard, (True, 'en')),
+    'cancel_keyboard': (cancel_keyboard, ('en',)),
+}
+
+
+def run(number: int = 5000) -> dict:
+    """Time each builder with and without the cache (build + to_json)"""
+    results = {}
+    for name, (builder, args) in CASES.items():
+        uncached = builder.__wrapped__
+        before = measure(lambda: uncached(*args).to_json(), number)
+        after = measure(lambda: builder(*args).to_json(), number)
+        results[name] = {
+            'uncached_us': before,
+            'cached_us': after,
+            'saved_us': before - after
+        }
+    return results
+
+
+if __name__ == '__main__':
+    results = run()
+    print_table('Keyboard build + serialize (µs per call)', results)
+    
+    # A typical update renders one keyboard, e.g. /start or a menu callback
+    per_update = (
+        results['main_menu_reply_keyboard']['saved_us'] +
+        results['main_menu_keyboard']['saved_us']
+    ) / 2
+    print(f"\nEstimated saving per update: {per_update:.1f} µs")
@@ -0,0 +1,112 @@
+"""
+DatabaseManager operations against large tables
+
+Each scale gets its own in-memory SQLite database seeded with that many
+users and messages. The default is 10k rows; set BENCH_ROWS
+(comma-separated) for other scales, e.g. BENCH_ROWS=10000,1000000 (the
+1M scale takes minutes to seed).
+
+    python -m benchmarks.bench_scale [results.json]
+    python -m pytest benchmarks/bench_scale.py [--bench-json results.json]
+"""
+import os
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+from benchmarks.common import (
+    measure,
+    memory_sqlite_url,
+    print_table,
+    use_memory_database,
+    write_results
+)
+
+use_memory_database()
+
+from sqlalchemy import insert  # noqa: E402
+
+from bot.database.manager import DatabaseManager  # noqa: E402
+from bot.database.models import Message, User  # noqa: E402
+
+SEED_CHUNK = 50000
+
+
+def scales() -> List[int]:
+    return [int(rows) for rows in os.environ.get('BENCH_ROWS', '10000').split(',') if rows]
+
+
+def seed(manager: DatabaseManager, rows: int):
+    """Insert rows users and rows messages"""
+    now = datetime.now()
+    with manager.write_scope() as session:
+        for offset in range(0, rows, SEED_CHUNK):
+            ids = range(offset + 1, min(offset + SEED_CHUNK, rows) + 1)
+            session.execute(insert(User), [
+                {'user_id': user_id, 'first_name': 'Seed', 'language': 'en',
+                 'created_at': now, 'updated_at': now, 'last_activity': now, 'data': {}}
+                for user_id in ids
+            ])
+            session.execute(insert(Message), [
+                {'user_id': user_id, 'message_type': 'text', 'text': 'seed',
+                 'created_at': now, 'data': {}}
+                for user_id in ids
+            ])
+    manager.reconcile_counters()
+
+
+def run_scale(rows: int, number: int = 2000) -> Dict[str, Dict[str, float]]:
+    """Per-call time of the hot DatabaseManager operations at one scale"""
+    manager = DatabaseManager(memory_sqlite_url(f'scale-{rows}'))
+    seed(manager, rows)
+    
+    existing = iter(range(1, 10 ** 9))
+    new = iter(range(rows + 1, 10 ** 9))
+    
+    def get_statistics_uncached():
+        manager._statistics.invalidate()
+        manager.get_statistics()
+    
+    cases = {
+        'get_or_create_user (existing)': (
+            lambda: manager.get_or_create_user(next(existing) % rows + 1, first_name='Seed'), number
+        ),
+        'get_or_create_user (new)': (
+            lambda: manager.get_or_create_user(next(new), first_name='Bench'), number
+        ),
+        'add_message': (
+            lambda: manager.add_message(rows // 2, 'text', 'hello'), number
+        ),
+        'get_statistics (cached)': (manager.get_statistics, number * 10),
+        'get_statistics (counters)': (get_statistics_uncached, number),
+        'count_statistics (full scan)': (manager._count_statistics, 3),
+    }
+    
+    results = {
+        name: {'us_per_call': measure(func, calls, repeat=3)}
+        for name, (func, calls) in cases.items()
+    }
+    
+    manager.close()
+    manager.engine.dispose()
+    return results
+
+
+def run() -> Dict[str, Dict[str, Dict[str, float]]]:
+    return {f'database_scale[{rows}]': run_scale(rows) for rows in scales()}
+
+
+# ==================== pytest entry points ====================
+
+def bench_database_scale(bench):
+    for rows in scales():
+        bench.record_suite(run_scale(rows), f'database_scale[{rows}]')
+
+
+if __name__ == '__main__':
+    results = run()
+    for suite, cases in results.items():
+        print_table(f'{suite} (µs per call)', cases)
+    if len(sys.argv) > 1:
+        for suite, cases in results.items():
+            write_results(sys.argv[1], suite, cases)
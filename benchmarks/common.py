@@ -0,0 +1,80 @@
+"""
+Shared timing helpers for benchmarks
+"""
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator
+
+
+def measure(func: Callable, number: int = 10000, repeat: int = 5) -> float:
+    """Best per-call time of func in microseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / number * 1e6
+
+
+def print_table(title: str, rows: Dict[str, Dict[str, float]]):
+    """Print benchmark results as a simple table"""
+    print(f"\n{title}")
+    print("-" * len(title))
+    columns = list(next(iter(rows.values())).keys()) if rows else []
+    print(f"{'case':<40}" + "".join(f"{column:>14}" for column in columns))
+    for name, values in rows.items():
+        print(f"{name:<40}" + "".join(f"{values[column]:>14.2f}" for column in columns))
+
+
+@contextmanager
+def temp_sqlite_database(name: str = 'bench') -> Iterator[str]:
+    """SQLite URL of a fresh database file, removed with its directory afterwards"""
+    directory = tempfile.mkdtemp(prefix='bot-bench-')
+    try:
+        yield f'sqlite:///{Path(directory) / f"{name}.db"}'
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def memory_sqlite_url(name: str = 'bench') -> str:
+    """URL of a named in-memory SQLite database shared by all connections of the process"""
+    return f'sqlite:///file:{name}?mode=memory&cache=shared&uri=true'
+
+
+def use_memory_database():
+    """
+    Point the global db instance at an in-memory database (call before importing bot)
+    
+    Message rows are written inline instead of by the write-behind thread,
+    so handler timings include the write and only one thread touches the
+    shared-cache database.
+    """
+    os.environ.setdefault('DATABASE_URL', memory_sqlite_url('global'))
+    os.environ.setdefault('MESSAGE_BUFFER_ENABLED', 'false')
+
+
+def write_results(path: str, suite: str, results: Dict[str, Dict[str, float]]):
+    """Store suite results in a JSON file, keeping other suites already in it"""
+    path = Path(path)
+    data = json.loads(path.read_text()) if path.exists() else {}
+    data.setdefault('suites', {})[suite] = results
+    data['meta'] = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'created_at': datetime.now().isoformat(timespec='seconds')
+    }
+    path.write_text(json.dumps(data, indent=2, sort_keys=True))
+
+
+def load_results(path: str) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Suites of a results file written by write_results"""
+    return json.loads(Path(path).read_text()).get('suites', {})
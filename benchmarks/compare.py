@@ -0,0 +1,40 @@
+"""
+Compare two benchmark result files
+
+    python -m benchmarks.compare before.json after.json
+
+Cases present in both files are listed with their per-call times and
+the after/before ratio; below 1.0 is faster.
+"""
+import sys
+
+from benchmarks.common import load_results, print_table
+
+
+def compare(before_path: str, after_path: str) -> dict:
+    before = load_results(before_path)
+    after = load_results(after_path)
+    tables = {}
+    for suite in sorted(before.keys() & after.keys()):
+        rows = {}
+        for case in before[suite].keys() & after[suite].keys():
+            old = before[suite][case].get('us_per_call')
+            new = after[suite][case].get('us_per_call')
+            if old is None or new is None:
+                continue
+            rows[case] = {
+                'before_us': old,
+                'after_us': new,
+                'ratio': new / old if old else float('inf')
+            }
+        if rows:
+            tables[suite] = dict(sorted(rows.items()))
+    return tables
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    for suite, rows in compare(sys.argv[1], sys.argv[2]).items():
+        print_table(suite, rows)
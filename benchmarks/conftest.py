@@ -0,0 +1,68 @@
+"""
+pytest integration for the benchmarks
+
+bench_* functions in bench_*.py modules are collected as tests. Each one
+records result rows through the bench fixture; they are printed at the
+end of the session and, with --bench-json PATH, written to a JSON file
+that benchmarks.compare can diff against an earlier run.
+
+    python -m pytest benchmarks -q --bench-json results.json
+"""
+import pytest
+
+from benchmarks.common import print_table, use_memory_database, write_results
+
+# Before any bench module imports bot and creates the global db instance
+use_memory_database()
+
+
+class BenchModule(pytest.Module):
+    """Module collector that picks up bench_* functions"""
+    
+    def funcnamefilter(self, name: str) -> bool:
+        return name.startswith('bench_')
+
+
+def pytest_addoption(parser):
+    parser.addoption('--bench-json', default=None, help="Write benchmark results to this JSON file")
+
+
+def pytest_collect_file(file_path, parent):
+    if file_path.suffix == '.py' and file_path.name.startswith('bench_'):
+        return BenchModule.from_parent(parent, path=file_path)
+    return None
+
+
+class BenchRecorder:
+    """Collects result rows of one benchmark function"""
+    
+    def __init__(self, results: dict, suite: str):
+        self.results = results
+        self.suite = suite
+    
+    def record_suite(self, rows: dict, suite: str = None):
+        self.results.setdefault(suite or self.suite, {}).update(rows)
+
+
+def pytest_configure(config):
+    config._bench_results = {}
+
+
+@pytest.fixture
+def bench(request) -> BenchRecorder:
+    suite = request.node.name
+    if suite.startswith('bench_'):
+        suite = suite[len('bench_'):]
+    return BenchRecorder(request.config._bench_results, suite)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = config._bench_results
+    for suite, rows in results.items():
+        print_table(f'{suite} (µs per call)', rows)
+    
+    path = config.getoption('--bench-json')
+    if path and results:
+        for suite, rows in results.items():
+            write_results(path, suite, rows)
+        terminalreporter.write_line(f"\nBenchmark results written to {path}")
@@ -0,0 +1,266 @@
+"""
+Local stand-in for the Telegram Bot API
+
+Serves /bot<token>/<method> for what the bot uses under load: getMe,
+getUpdates (long polling), setWebhook/deleteWebhook, sendMessage,
+editMessageText and answerCallbackQuery. Other methods succeed with
+`true`. A configurable fraction of reply calls fail with a 429 carrying
+retry_after, or a 403 as for a user who blocked the bot.
+
+Updates are pushed with push_update(): they are handed out by getUpdates,
+or POSTed to the webhook once the bot has called setWebhook. Unlike
+Telegram, rejected webhook deliveries are counted but not retried.
+"""
+import http.client
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+BOT_USER = {'id': 100000, 'is_bot': True, 'first_name': 'Load Test', 'username': 'load_test_bot'}
+
+# Calls that answer a user; errors are injected into these only
+REPLY_METHODS = ('sendMessage', 'editMessageText', 'answerCallbackQuery')
+
+# Longest getUpdates wait, so shutdown does not hang on a poll
+MAX_POLL_TIMEOUT = 5.0
+
+# (method, params, HTTP status) of every reply call
+CallListener = Callable[[str, Dict[str, Any], int], None]
+
+
+class FakeBotAPIHandler(BaseHTTPRequestHandler):
+    """Parse Bot API requests and hand them to the server"""
+    
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; with Nagle each keep-alive
+    # response would wait for the client's delayed ACK
+    disable_nagle_algorithm = True
+    
+    def do_GET(self):
+        self._handle(b'')
+    
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self._handle(self.rfile.read(length) if length else b'')
+    
+    def _handle(self, body: bytes):
+        parts = urlsplit(self.path)
+        segments = parts.path.strip('/').split('/')
+        if len(segments) != 2 or not segments[0].startswith('bot'):
+            self._reply(404, {'ok': False, 'error_code': 404, 'description': 'Not Found'})
+            return
+        
+        params = dict(parse_qsl(parts.query))
+        content_type = self.headers.get('Content-Type', '')
+        if body and 'json' in content_type:
+            params.update(json.loads(body))
+        elif body and 'x-www-form-urlencoded' in content_type:
+            params.update(parse_qsl(body.decode()))
+        
+        status, payload = self.server.call(segments[1], params)
+        self._reply(status, payload)
+    
+    def _reply(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class FakeBotAPI(ThreadingHTTPServer):
+    """
+    In-process Bot API server with error injection
+    
+    calls counts every request as (method, status); reply call listeners
+    let a load generator see when an update got its answer.
+    """
+    
+    daemon_threads = True
+    
+    def __init__(
+        self,
+        address: Tuple[str, int] = ('127.0.0.1', 0),
+        retry_after_rate: float = 0.0,
+        forbidden_rate: float = 0.0,
+        retry_after: int = 1,
+        latency: float = 0.0
+    ):
+        super().__init__(address, FakeBotAPIHandler)
+        self.retry_after_rate = retry_after_rate
+        self.forbidden_rate = forbidden_rate
+        self.retry_after = retry_after
+        self.latency = latency
+        
+        self.calls: Counter = Counter()
+        self.listeners: List[CallListener] = []
+        self.ready = threading.Event()
+        
+        self._updates: deque = deque()
+        self._update_id = 0
+        self._message_id = 0
+        self._cond = threading.Condition()
+        self._lock = threading.Lock()
+        
+        self.webhook_url: Optional[str] = None
+        self.webhook_secret: Optional[str] = None
+        self._webhook_pool: Optional[ThreadPoolExecutor] = None
+    
+    @property
+    def base_url(self) -> str:
+        """Value for the bot_api_url setting"""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/bot'
+    
+    # ==================== Updates ====================
+    
+    def push_update(self, update: Dict[str, Any]) -> int:
+        """Assign an update_id and deliver the update, returning the id"""
+        with self._cond:
+            self._update_id += 1
+            update = {'update_id': self._update_id, **update}
+            if self.webhook_url is None:
+                self._updates.append(update)
+                self._cond.notify_all()
+                return self._update_id
+        
+        self._webhook_pool.submit(self._post_webhook, update)
+        return update['update_id']
+    
+    def _get_updates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        deadline = time.monotonic() + min(float(params.get('timeout') or 0), MAX_POLL_TIMEOUT)
+        
+        self.ready.set()
+        with self._cond:
+            # Updates below offset are confirmed
+            while self._updates and self._updates[0]['update_id'] < offset:
+                self._updates.popleft()
+            while not self._updates:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self._cond.wait(remaining)
+            return list(self._updates)[:limit]
+    
+    def _set_webhook(self, params: Dict[str, Any]):
+        with self._cond:
+            self.webhook_url = params.get('url') or None
+            self.webhook_secret = params.get('secret_token')
+            if self.webhook_url:
+                # Telegram opens at most max_connections parallel webhook requests
+                self._webhook_pool = ThreadPoolExecutor(
+                    int(params.get('max_connections') or 40),
+                    thread_name_prefix='fake-webhook'
+                )
+                self.ready.set()
+    
+    def _delete_webhook(self, params: Dict[str, Any]):
+        with self._cond:
+            self.webhook_url = None
+            if str(params.get('drop_pending_updates')).lower() in ('true', '1'):
+                self._updates.clear()
+    
+    def _post_webhook(self, update: Dict[str, Any]):
+        parts = urlsplit(self.webhook_url)
+        body = json.dumps(update).encode()
+        headers = {'Content-Type': 'application/json'}
+        if self.webhook_secret:
+            headers['X-Telegram-Bot-Api-Secret-Token'] = self.webhook_secret
+        
+        connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        try:
+            connection.request('POST', parts.path or '/', body, headers)
+            status = connection.getresponse().status
+        except OSError:
+            status = 0
+        finally:
+            connection.close()
+        self.calls['webhook', status] += 1
+    
+    # ==================== Methods ====================
+    
+    def _message(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._message_id += 1
+            message_id = self._message_id
+        return {
+            'message_id': int(params.get('message_id') or message_id),
+            'date': int(time.time()),
+            'chat': {'id': int(params.get('chat_id') or 0), 'type': 'private'},
+            'from': BOT_USER,
+            'text': params.get('text', '')
+        }
+    
+    def _injected_error(self) -> Optional[Tuple[int, Dict[str, Any]]]:
+        roll = random.random()
+        if roll < self.retry_after_rate:
+            return 429, {
+                'ok': False,
+                'error_code': 429,
+                'description': f'Too Many Requests: retry after {self.retry_after}',
+                'parameters': {'retry_after': self.retry_after}
+            }
+        if roll < self.retry_after_rate + self.forbidden_rate:
+            return 403, {
+                'ok': False,
+                'error_code': 403,
+                'description': 'Forbidden: bot was blocked by the user'
+            }
+        return None
+    
+    def call(self, method: str, params: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Handle one Bot API method call"""
+        if method == 'getUpdates':
+            status, payload = 200, {'ok': True, 'result': self._get_updates(params)}
+        else:
+            if self.latency:
+                time.sleep(self.latency)
+            error = self._injected_error() if method in REPLY_METHODS else None
+            if error is not None:
+                status, payload = error
+            elif method == 'getMe':
+                status, payload = 200, {'ok': True, 'result': BOT_USER}
+            elif method in ('sendMessage', 'editMessageText'):
+                status, payload = 200, {'ok': True, 'result': self._message(params)}
+            elif method == 'setWebhook':
+                self._set_webhook(params)
+                status, payload = 200, {'ok': True, 'result': True}
+            elif method == 'deleteWebhook':
+                self._delete_webhook(params)
+                status, payload = 200, {'ok': True, 'result': True}
+            else:
+                status, payload = 200, {'ok': True, 'result': True}
+        
+        self.calls[method, status] += 1
+        if method in REPLY_METHODS:
+            for listener in self.listeners:
+                listener(method, params, status)
+        return status, payload
+    
+    def start(self) -> threading.Thread:
+        """Serve in a background thread"""
+        thread = threading.Thread(target=self.serve_forever, name='fake-bot-api', daemon=True)
+        thread.start()
+        return thread
+    
+    def shutdown(self):
+        super().shutdown()
+        with self._cond:
+            self._cond.notify_all()
+        if self._webhook_pool is not None:
+            self._webhook_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,342 @@
+"""
+End-to-end load test against the real bot wiring and a fake Bot API
+
+Starts benchmarks.fake_bot_api in this process, runs `python -m bot.main`
+as a subprocess pointed at it (BOT_API_URL) with a fresh SQLite database,
+and fires synthetic users at a fixed rate through getUpdates (polling) or
+the bot's webhook listener (webhook mode).
+
+Each synthetic user has at most one update in flight; its latency runs
+from pushing the update to the bot's first reply call (sendMessage,
+editMessageText or answerCallbackQuery) for that chat. Updates that get
+no reply within --timeout (e.g. dropped by throttling) count as
+unanswered. Other settings come from .env/environment as usual.
+
+    python -m benchmarks.load_test --rate 200 --duration 30
+    python -m benchmarks.load_test --mode webhook --retry-after-rate 0.01 --forbidden-rate 0.01
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+from typing import Any, Dict, List, Optional
+
+from benchmarks.common import temp_sqlite_database
+from benchmarks.fake_bot_api import BOT_USER, FakeBotAPI
+
+# (weight, kind, payload): commands are sent as messages, the rest as callback data
+DEFAULT_MIX = (
+    (3, 'command', '/start'),
+    (2, 'command', '/help'),
+    (2, 'command', '/menu'),
+    (1, 'command', '/profile'),
+    (1, 'command', '/stats'),
+    (2, 'callback', 'menu:main'),
+    (1, 'callback', 'menu:stats'),
+    (1, 'callback', 'settings:main'),
+)
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values: List[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(percent / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def build_update(user_id: int, kind: str, payload: str, sequence: int) -> Dict[str, Any]:
+    """Bot API update for a synthetic user"""
+    user = {'id': user_id, 'is_bot': False, 'first_name': f'User{user_id}', 'language_code': 'en'}
+    chat = {'id': user_id, 'type': 'private'}
+    if kind == 'command':
+        return {'message': {
+            'message_id': sequence,
+            'date': int(time.time()),
+            'chat': chat,
+            'from': user,
+            'text': payload,
+            'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(payload)}]
+        }}
+    return {'callback_query': {
+        # Lets answerCallbackQuery be matched back to its user
+        'id': f'{user_id}:{sequence}',
+        'from': user,
+        'chat_instance': str(user_id),
+        'data': payload,
+        'message': {
+            'message_id': sequence,
+            'date': int(time.time()),
+            'chat': chat,
+            'from': BOT_USER,
+            'text': 'menu'
+        }
+    }}
+
+
+class LoadGenerator:
+    """Open-loop update source with per-user latency tracking"""
+    
+    def __init__(
+        self,
+        api: FakeBotAPI,
+        users: int = 1000,
+        rate: float = 100.0,
+        duration: float = 30.0,
+        timeout: float = 10.0,
+        mix=DEFAULT_MIX
+    ):
+        self.api = api
+        self.rate = rate
+        self.duration = duration
+        self.timeout = timeout
+        self.mix = mix
+        self._weights = [weight for weight, _, _ in mix]
+        
+        self._idle = deque(range(1, users + 1))
+        self._pending: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        
+        self.sent = 0
+        self.skipped = 0
+        self.unanswered = 0
+        self.latencies: List[float] = []
+        self.first_reply_status: Counter = Counter()
+        api.listeners.append(self._on_reply)
+    
+    @staticmethod
+    def _reply_user(method: str, params: Dict[str, Any]) -> Optional[int]:
+        if method == 'answerCallbackQuery':
+            return int(str(params.get('callback_query_id', '0')).split(':', 1)[0])
+        chat_id = params.get('chat_id')
+        return int(chat_id) if chat_id is not None else None
+    
+    def _on_reply(self, method: str, params: Dict[str, Any], status: int):
+        user_id = self._reply_user(method, params)
+        now = time.monotonic()
+        with self._lock:
+            sent_at = self._pending.pop(user_id, None)
+            if sent_at is None:
+                # Second call for an already answered update
+                return
+            self._idle.append(user_id)
+            self.latencies.append(now - sent_at)
+            self.first_reply_status[method, status] += 1
+    
+    def _expire(self, now: float):
+        """Give up on updates without a reply after timeout"""
+        with self._lock:
+            expired = [user for user, sent_at in self._pending.items() if now - sent_at > self.timeout]
+            for user_id in expired:
+                del self._pending[user_id]
+                self._idle.append(user_id)
+            self.unanswered += len(expired)
+    
+    def _send_one(self, sequence: int):
+        with self._lock:
+            if not self._idle:
+                self.skipped += 1
+                return
+            user_id = self._idle.popleft()
+            self._pending[user_id] = time.monotonic()
+        _, kind, payload = random.choices(self.mix, self._weights)[0]
+        self.api.push_update(build_update(user_id, kind, payload, sequence))
+        self.sent += 1
+    
+    def run(self) -> Dict[str, Any]:
+        """Send for duration seconds, wait for in-flight replies, return the report"""
+        interval = 1.0 / self.rate
+        started = time.monotonic()
+        next_at = started
+        sequence = 0
+        while True:
+            now = time.monotonic()
+            if now - started >= self.duration:
+                break
+            if now < next_at:
+                time.sleep(min(next_at - now, 0.01))
+                continue
+            sequence += 1
+            self._send_one(sequence)
+            next_at += interval
+            if sequence % 100 == 0:
+                self._expire(now)
+        
+        # Drain: wait for replies to what is still in flight
+        deadline = time.monotonic() + self.timeout
+        while self._pending and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._expire(float('inf'))
+        elapsed = time.monotonic() - started
+        
+        return self.report(elapsed)
+    
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        latencies_ms = [latency * 1000 for latency in self.latencies]
+        answered = len(self.latencies)
+        calls = {f'{method} {status}': count for (method, status), count in sorted(self.api.calls.items())}
+        errors = {
+            'unanswered': self.unanswered,
+            'skipped_no_idle_user': self.skipped,
+            'injected_429': sum(count for (_, status), count in self.api.calls.items() if status == 429),
+            'injected_403': sum(count for (_, status), count in self.api.calls.items() if status == 403),
+            'webhook_rejected': sum(
+                count for (method, status), count in self.api.calls.items()
+                if method == 'webhook' and status != 200
+            ),
+        }
+        return {
+            'offered_rate': self.rate,
+            'duration_s': round(elapsed, 2),
+            'sent': self.sent,
+            'answered': answered,
+            'updates_per_s': round(answered / elapsed, 2) if elapsed else 0.0,
+            'latency_ms': {
+                **{f'p{p}': round(percentile(latencies_ms, p), 2) for p in PERCENTILES},
+                'max': round(max(latencies_ms), 2) if latencies_ms else 0.0,
+                'mean': round(sum(latencies_ms) / answered, 2) if answered else 0.0
+            },
+            'errors': errors,
+            'api_calls': calls
+        }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def bot_environment(api: FakeBotAPI, mode: str, database_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env['BOT_API_URL'] = api.base_url
+    env.setdefault('BOT_TOKEN', '123456:LOAD-TEST')
+    env.setdefault('ADMIN_IDS', '1')
+    env.setdefault('SUPER_ADMIN_ID', '1')
+    env['DATABASE_URL'] = database_url
+    env['METRICS_ENABLED'] = env.get('METRICS_ENABLED', 'false')
+    if mode == 'webhook':
+        port = free_port()
+        env.update(
+            ENABLE_WEBHOOKS='true',
+            WEBHOOK_URL=f'http://127.0.0.1:{port}',
+            WEBHOOK_LISTEN='127.0.0.1',
+            WEBHOOK_PORT=str(port)
+        )
+    else:
+        env['ENABLE_WEBHOOKS'] = 'false'
+    return env
+
+
+def start_bot(
+    api: FakeBotAPI,
+    mode: str,
+    log_path: str,
+    database_url: str,
+    ready_timeout: float = 60.0
+) -> subprocess.Popen:
+    """Run bot.main as a subprocess and wait until it polls or sets its webhook"""
+    log = open(log_path, 'w')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'bot.main'],
+        env=bot_environment(api, mode, database_url),
+        stdout=log,
+        stderr=subprocess.STDOUT
+    )
+    deadline = time.monotonic() + ready_timeout
+    while not api.ready.wait(0.2):
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            raise RuntimeError(f"Bot did not start, see {log_path}")
+    return process
+
+
+def stop_bot(process: subprocess.Popen, timeout: float = 30.0):
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\nOffered {report['offered_rate']}/s for {report['duration_s']}s: "
+          f"{report['sent']} sent, {report['answered']} answered, "
+          f"{report['updates_per_s']} updates/s")
+    print("Latency (ms): " + ", ".join(f"{key} {value}" for key, value in report['latency_ms'].items()))
+    print("Errors: " + ", ".join(f"{key} {value}" for key, value in report['errors'].items()))
+    print("API calls:")
+    for call, count in report['api_calls'].items():
+        print(f"  {call:<32}{count:>10}")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test the bot against a fake Bot API")
+    parser.add_argument('--mode', choices=('polling', 'webhook'), default='polling')
+    parser.add_argument('--rate', type=float, default=100.0, help="Updates per second offered")
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds to send for")
+    parser.add_argument('--users', type=int, default=1000, help="Synthetic users")
+    parser.add_argument('--timeout', type=float, default=10.0, help="Seconds before an update is unanswered")
+    parser.add_argument('--retry-after-rate', type=float, default=0.0, help="Fraction of replies failing with 429")
+    parser.add_argument('--forbidden-rate', type=float, default=0.0, help="Fraction of replies failing with 403")
+    parser.add_argument('--retry-after', type=int, default=1, help="retry_after of injected 429s")
+    parser.add_argument('--api-latency', type=float, default=0.0, help="Seconds added to every API call")
+    parser.add_argument('--json', help="Write the report to this JSON file")
+    parser.add_argument(
+        '--bot-log',
+        default=os.path.join(tempfile.gettempdir(), 'load_test_bot.log'),
+        help="Bot process output"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> Dict[str, Any]:
+    args = parse_args(argv)
+    api = FakeBotAPI(
+        retry_after_rate=args.retry_after_rate,
+        forbidden_rate=args.forbidden_rate,
+        retry_after=args.retry_after,
+        latency=args.api_latency
+    )
+    api.start()
+    
+    with ExitStack() as stack:
+        database_url = os.environ.get('LOAD_TEST_DATABASE_URL') or stack.enter_context(
+            temp_sqlite_database('load')
+        )
+        process = start_bot(api, args.mode, args.bot_log, database_url)
+        try:
+            generator = LoadGenerator(
+                api,
+                users=args.users,
+                rate=args.rate,
+                duration=args.duration,
+                timeout=args.timeout
+            )
+            report = generator.run()
+        finally:
+            stop_bot(process)
+            api.shutdown()
+    
+    report['mode'] = args.mode
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    main()
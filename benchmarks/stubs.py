@@ -0,0 +1,87 @@
+"""
+Minimal Update/CallbackContext stand-ins for calling handlers directly
+
+They carry only what the handlers and decorators read, and drop replies
+instead of sending them, so a benchmark times the bot's own code.
+"""
+from typing import List
+
+
+class StubUser:
+    def __init__(self, user_id: int, first_name: str = 'Bench', language_code: str = 'en'):
+        self.id = user_id
+        self.username = f'user{user_id}'
+        self.first_name = first_name
+        self.last_name = None
+        self.language_code = language_code
+        self.is_bot = False
+
+
+class StubChat:
+    def __init__(self, chat_id: int):
+        self.id = chat_id
+        self.type = 'private'
+
+
+class StubMessage:
+    def __init__(self, text: str, user: StubUser):
+        self.message_id = 1
+        self.text = text
+        self.from_user = user
+        self.chat = StubChat(user.id)
+        self.chat_id = user.id
+        self.replies = 0
+    
+    def reply_text(self, text: str, **kwargs):
+        self.replies += 1
+        return self
+
+
+class StubCallbackQuery:
+    def __init__(self, data: str, user: StubUser):
+        self.id = '1'
+        self.data = data
+        self.from_user = user
+        self.message = StubMessage('', user)
+        self.answers = 0
+        self.edits = 0
+    
+    def answer(self, text: str = None, **kwargs):
+        self.answers += 1
+        return True
+    
+    def edit_message_text(self, text: str, **kwargs):
+        self.edits += 1
+        return self.message
+
+
+class StubUpdate:
+    def __init__(self, user: StubUser, message: StubMessage = None, callback_query: StubCallbackQuery = None):
+        self.update_id = 1
+        self.message = message
+        self.callback_query = callback_query
+        self.effective_user = user
+        self.effective_chat = StubChat(user.id)
+        self.effective_message = message or (callback_query.message if callback_query else None)
+
+
+class StubContext:
+    def __init__(self, args: List[str] = None):
+        self.args = args or []
+        self.bot = None
+        self.bot_data = {}
+        self.chat_data = {}
+        self.user_data = {}
+        self.error = None
+
+
+def message_update(user_id: int, text: str) -> StubUpdate:
+    """Update with a text message (a command if text starts with '/')"""
+    user = StubUser(user_id)
+    return StubUpdate(user, message=StubMessage(text, user))
+
+
+def callback_update(user_id: int, data: str) -> StubUpdate:
+    """Update with a callback query"""
+    user = StubUser(user_id)
+    return StubUpdate(user, callback_query=StubCallbackQuery(data, user))
@@ -46,7 +46,6 @@ class UserRole:
 class CacheKey:
     """Redis cache key templates"""
     USER_DATA = "user:{user_id}:data"
-    USER_LANGUAGE = "user:{user_id}:language"
     USER_STATE = "user:{user_id}:state"
     STATISTICS = "stats:general"
 
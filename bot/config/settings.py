@@ -18,6 +18,10 @@ class Settings(BaseSettings):
     # Bot Configuration
     bot_token: str = Field(..., description="Telegram bot token")
     bot_username: Optional[str] = Field(None, description="Bot username")
+    bot_api_url: Optional[str] = Field(
+        None,
+        description="Bot API base URL ending in /bot (default: api.telegram.org)"
+    )
     
     # Admin Configuration
     admin_ids: str = Field(..., description="Comma-separated admin IDs")
@@ -28,10 +32,49 @@ class Settings(BaseSettings):
         default="sqlite:///data/bot.db",
         description="Database connection URL"
     )
+    async_database_url: Optional[str] = Field(
+        default=None,
+        description="Async driver URL (default: database_url with async driver)"
+    )
+    database_read_url: Optional[str] = Field(
+        default=None,
+        description="Read replica URL for pure reads (default: primary)"
+    )
+    read_your_writes_window: float = Field(
+        default=5.0,
+        description="Seconds a user's reads stay on primary after they write"
+    )
+    database_profile: Optional[str] = Field(
+        default=None,
+        description="Engine profile: default, sqlite or server (default: from URL)"
+    )
+    
+    # Database Pool (server databases)
+    db_pool_size: int = Field(default=10)
+    db_max_overflow: int = Field(default=20)
+    db_pool_recycle: int = Field(default=1800, description="Seconds before a connection is replaced")
+    db_pool_timeout: int = Field(default=30, description="Seconds to wait for a free connection")
+    
+    # SQLite Tuning
+    sqlite_journal_mode: str = Field(default="WAL")
+    sqlite_synchronous: str = Field(default="NORMAL")
+    sqlite_busy_timeout: int = Field(default=5000, description="Milliseconds to wait for a lock")
+    sqlite_cache_size: int = Field(default=-65536, description="Pages, or KiB when negative")
+    sqlite_mmap_size: int = Field(default=268435456, description="Bytes of memory-mapped I/O")
+    sqlite_single_writer: bool = Field(default=True, description="Serialize writes in-process")
+    
+    # User Cache (in-process)
+    user_cache_size: int = Field(default=10000, description="Max cached users, 0 disables")
+    user_cache_ttl: int = Field(default=300, description="Cached user lifetime in seconds")
     
     # Redis Configuration
     redis_url: str = Field(default="redis://localhost:6379/0")
     redis_enabled: bool = Field(default=False)
+    statistics_cache_ttl: int = Field(default=30, description="Cached statistics lifetime in seconds")
+    statistics_stale_ttl: int = Field(default=300, description="Seconds stale statistics are served while refreshing")
+    counters_reconcile_interval: int = Field(default=3600, description="Seconds between counter reconciliations")
+    statistics_rollup_interval: int = Field(default=3600, description="Seconds between statistics rollups")
+    statistics_finalize_delay: int = Field(default=300, description="Seconds after midnight before a day is final")
     
     # Application Settings
     debug: bool = Field(default=False)
@@ -39,16 +82,55 @@ class Settings(BaseSettings):
     default_language: str = Field(default="uz")
     available_languages: str = Field(default="uz,ru,en")
     
+    # Message Logging (write-behind buffer)
+    message_buffer_enabled: bool = Field(default=True)
+    message_batch_size: int = Field(default=500)
+    message_flush_interval: float = Field(default=1.0, description="Max seconds between flushes")
+    message_queue_size: int = Field(default=10000)
+    message_overflow_policy: str = Field(
+        default="drop_oldest",
+        description="block, drop_newest, drop_oldest or sync"
+    )
+    
+    # Message Retention
+    # Destructive, so opt-in: 0 keeps every message and never schedules the job
+    message_retention_days: int = Field(default=0, description="Days of raw messages kept, 0 keeps all")
+    message_retention_archive: bool = Field(default=False, description="Move to messages_archive instead of deleting")
+    retention_batch_size: int = Field(default=1000, description="Rows removed per transaction")
+    retention_batch_pause: float = Field(default=0.1, description="Seconds between batches")
+    retention_interval: int = Field(default=86400, description="Seconds between retention runs")
+    
     # Features
     enable_analytics: bool = Field(default=True)
+    analytics_flush_interval: int = Field(default=60, description="Seconds between analytics flushes")
+    analytics_retention_days: int = Field(default=0, description="Days of per-minute analytics events kept, 0 keeps all")
     enable_webhooks: bool = Field(default=False)
     webhook_url: Optional[str] = None
     
+    # Webhook Server
+    webhook_listen: str = Field(default="0.0.0.0")
+    webhook_port: int = Field(default=8443)
+    webhook_path: str = Field(default="/webhook", description="Path appended to webhook_url")
+    webhook_secret_token: Optional[str] = Field(default=None, description="Random per start if unset")
+    webhook_max_queue_size: int = Field(default=1000, description="Pending updates before answering 429")
+    webhook_max_body_size: int = Field(default=1048576)
+    webhook_max_connections: int = Field(default=40, description="Passed to setWebhook")
+    
     # Rate Limiting
     rate_limit_enabled: bool = Field(default=True)
     rate_limit_calls: int = Field(default=30)
     rate_limit_period: int = Field(default=60)
     
+    # Update Dispatch
+    dispatcher_workers: int = Field(default=4, description="Threads for run_async handlers")
+    dispatcher_shards: int = Field(default=0, description="Per-user ordered worker queues, 0 disables")
+    dispatcher_shard_queue_size: int = Field(default=1000, description="Max queued updates per shard")
+    
+    # Broadcasts
+    broadcast_workers: int = Field(default=8, description="Concurrent broadcast senders")
+    broadcast_rate: float = Field(default=25.0, description="Max broadcast messages per second")
+    broadcast_progress_interval: float = Field(default=5.0, description="Seconds between progress edits")
+    
     # File Upload
     max_file_size: int = Field(default=10485760)  # 10MB
     allowed_file_types: str = Field(default=".pdf,.jpg,.png,.doc,.docx")
@@ -61,6 +143,12 @@ class Settings(BaseSettings):
     
     # Monitoring
     sentry_dsn: Optional[str] = None
+    metrics_enabled: bool = Field(default=False, description="Serve Prometheus metrics")
+    metrics_host: str = Field(default="127.0.0.1")
+    metrics_port: int = Field(default=9100)
+    profiling_enabled: bool = Field(default=False, description="Sample handler calls with cProfile")
+    profiling_sample_rate: float = Field(default=0.01, description="Fraction of calls profiled")
+    profiling_dir: str = Field(default="profiles", description="Where /profiler dump writes pstats files")
     
     @field_validator('admin_ids')
     @classmethod
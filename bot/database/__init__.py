@@ -2,6 +2,12 @@
 Database package
 """
 from bot.database.manager import db
-from bot.database.models import User, Message, Statistic, Subscription
+from bot.database.async_manager import AsyncDatabaseManager
+from bot.database.models import (
+    User, Message, MessageArchive, Statistic, Subscription, Counter, AnalyticsEvent, AnalyticsSketch
+)
 
-__all__ = ['db', 'User', 'Message', 'Statistic', 'Subscription']
+__all__ = [
+    'db', 'AsyncDatabaseManager', 'User', 'Message', 'MessageArchive', 'Statistic',
+    'Subscription', 'Counter', 'AnalyticsEvent', 'AnalyticsSketch'
+]
@@ -0,0 +1,309 @@
+"""
+Asyncio database manager (SQLAlchemy asyncio) with the DatabaseManager CRUD surface
+"""
+import asyncio
+from datetime import datetime
+from typing import List, Optional, Dict, Any, AsyncIterator
+from contextlib import asynccontextmanager
+
+from sqlalchemy import select, func
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from bot.config import settings
+from bot.database.models import User, Message, Subscription, Counter, create_schema
+from bot.database.engine import configure_engine, detect_profile, engine_options
+from bot.database.manager import DatabaseManager, counter_increment, counters_to_statistics, db
+
+# Async driver per dialect, used when the URL names none or a sync driver
+ASYNC_DRIVERS = {
+    'sqlite': 'aiosqlite',
+    'postgresql': 'asyncpg',
+    'mysql': 'aiomysql',
+}
+
+# Drivers that already support asyncio
+ASYNC_CAPABLE_DRIVERS = {'aiosqlite', 'asyncpg', 'psycopg', 'psycopg_async', 'aiomysql', 'asyncmy'}
+
+# Sync-only drivers replaced by the dialect's async driver
+SYNC_DRIVERS = {'pysqlite', 'psycopg2', 'psycopg2cffi', 'pg8000', 'pymysql', 'mysqldb', 'mysqlconnector'}
+
+
+def to_async_url(database_url: str) -> str:
+    """Switch database URL to an asyncio driver (sqlite+pysqlite -> sqlite+aiosqlite)"""
+    url = make_url(database_url)
+    dialect, _, driver = url.drivername.partition('+')
+    if driver in ASYNC_CAPABLE_DRIVERS:
+        return database_url
+    if driver and driver not in SYNC_DRIVERS:
+        raise ValueError(
+            f"Unknown driver '{url.drivername}', set ASYNC_DATABASE_URL to an asyncio driver URL"
+        )
+    async_driver = ASYNC_DRIVERS.get(dialect)
+    if async_driver is None:
+        raise ValueError(f"No asyncio driver known for '{url.drivername}'")
+    return url.set(drivername=f'{dialect}+{async_driver}').render_as_string(hide_password=False)
+
+
+class AsyncDatabaseManager:
+    """
+    Asyncio database manager for use from asyncio pipelines (e.g. senders)
+    
+    Writes keep the statistics counters up to date and invalidate cached
+    users through the sync manager (default: the global db), which drops
+    them locally and in the shared cache and tells other processes.
+    """
+    
+    def __init__(
+        self,
+        database_url: str = None,
+        profile: str = None,
+        sync_manager: DatabaseManager = None
+    ):
+        database_url = to_async_url(
+            database_url or settings.async_database_url or settings.database_url
+        )
+        profile = profile or detect_profile(database_url)
+        self.engine = create_async_engine(database_url, **engine_options(database_url, profile))
+        configure_engine(self.engine.sync_engine, database_url, profile)
+        self.Session = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.sync_manager = sync_manager or db
+        self._initialized = False
+    
+    async def init(self):
+        """Create tables (idempotent)"""
+        if not self._initialized:
+            async with self.engine.begin() as conn:
+                await conn.run_sync(create_schema)
+            self._initialized = True
+    
+    async def close(self):
+        """Dispose connection pool"""
+        await self.engine.dispose()
+    
+    @asynccontextmanager
+    async def session_scope(self):
+        """Provide transactional scope for database operations"""
+        if not self._initialized:
+            await self.init()
+        
+        session = self.Session()
+        try:
+            yield session
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            raise e
+        finally:
+            await session.close()
+    
+    async def _invalidate_user(self, user_id: int):
+        """Drop cached user everywhere after a committed write"""
+        if self.sync_manager.cache.shared:
+            # Shared cache delete and publish are network round trips
+            await asyncio.to_thread(self.sync_manager.invalidate_user, user_id)
+        else:
+            self.sync_manager.invalidate_user(user_id)
+    
+    # ==================== User Operations ====================
+    
+    async def get_or_create_user(
+        self,
+        user_id: int,
+        username: str = None,
+        first_name: str = None,
+        last_name: str = None,
+        language: str = None
+    ) -> User:
+        """Get existing user or create new one"""
+        created = False
+        async with self.session_scope() as session:
+            result = await session.execute(select(User).filter_by(user_id=user_id))
+            user = result.scalars().first()
+            
+            if not user:
+                created = True
+                user = User(
+                    user_id=user_id,
+                    username=username,
+                    first_name=first_name,
+                    last_name=last_name,
+                    language=language or settings.default_language
+                )
+                session.add(user)
+                await session.flush()
+                await session.execute(counter_increment('total_users'))
+            else:
+                # Update user info
+                user.username = username
+                user.first_name = first_name
+                user.last_name = last_name
+                user.last_activity = datetime.now()
+        
+        if not created:
+            await self._invalidate_user(user_id)
+        return user
+    
+    async def get_user(self, user_id: int) -> Optional[User]:
+        """Get user by ID"""
+        async with self.session_scope() as session:
+            result = await session.execute(select(User).filter_by(user_id=user_id))
+            return result.scalars().first()
+    
+    async def update_user(self, user_id: int, **kwargs) -> Optional[User]:
+        """Update user fields"""
+        async with self.session_scope() as session:
+            # Row lock: concurrent updates must not both see the old is_blocked
+            result = await session.execute(select(User).filter_by(user_id=user_id).with_for_update())
+            user = result.scalars().first()
+            if user:
+                was_blocked = bool(user.is_blocked)
+                for key, value in kwargs.items():
+                    if hasattr(user, key):
+                        setattr(user, key, value)
+                user.updated_at = datetime.now()
+                if bool(user.is_blocked) != was_blocked:
+                    await session.execute(
+                        counter_increment('blocked_users', 1 if user.is_blocked else -1)
+                    )
+        
+        if user:
+            await self._invalidate_user(user_id)
+        return user
+    
+    async def get_all_users(self, is_blocked: bool = None) -> List[User]:
+        """Get all users"""
+        async with self.session_scope() as session:
+            query = select(User)
+            if is_blocked is not None:
+                query = query.filter_by(is_blocked=is_blocked)
+            result = await session.execute(query)
+            return list(result.scalars().all())
+    
+    async def iter_user_ids(
+        self,
+        is_blocked: bool = None,
+        chunk_size: int = 1000
+    ) -> AsyncIterator[int]:
+        """Stream Telegram user IDs in users.id order, one keyset chunk at a time"""
+        last_id = 0
+        while True:
+            async with self.session_scope() as session:
+                query = select(User.id, User.user_id).where(User.id > last_id)
+                if is_blocked is not None:
+                    query = query.where(User.is_blocked == is_blocked)
+                result = await session.execute(query.order_by(User.id).limit(chunk_size))
+                rows = result.all()
+            
+            for _, user_id in rows:
+                yield user_id
+            
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1][0]
+    
+    async def count_users(self, is_blocked: bool = None) -> int:
+        """Count users without loading them"""
+        async with self.session_scope() as session:
+            query = select(func.count(User.id))
+            if is_blocked is not None:
+                query = query.where(User.is_blocked == is_blocked)
+            return await session.scalar(query)
+    
+    async def set_user_language(self, user_id: int, language: str):
+        """Set user language"""
+        await self.update_user(user_id, language=language)
+    
+    async def block_user(self, user_id: int):
+        """Block user"""
+        await self.update_user(user_id, is_blocked=True)
+    
+    async def unblock_user(self, user_id: int):
+        """Unblock user"""
+        await self.update_user(user_id, is_blocked=False)
+    
+    async def set_admin(self, user_id: int, is_admin: bool = True):
+        """Set user admin status"""
+        await self.update_user(user_id, is_admin=is_admin)
+    
+    async def set_premium(self, user_id: int, is_premium: bool = True):
+        """Set user premium status"""
+        await self.update_user(user_id, is_premium=is_premium)
+    
+    # ==================== Message Operations ====================
+    
+    async def add_message(
+        self,
+        user_id: int,
+        message_type: str,
+        text: str = None,
+        data: Dict = None
+    ):
+        """Add message to database"""
+        async with self.session_scope() as session:
+            session.add(Message(
+                user_id=user_id,
+                message_type=message_type,
+                text=text,
+                data=data or {}
+            ))
+            await session.execute(counter_increment('total_messages'))
+    
+    async def get_user_messages(self, user_id: int, limit: int = 100) -> List[Message]:
+        """Get user messages"""
+        async with self.session_scope() as session:
+            result = await session.execute(
+                select(Message)
+                .filter_by(user_id=user_id)
+                .order_by(Message.created_at.desc())
+                .limit(limit)
+            )
+            return list(result.scalars().all())
+    
+    async def get_messages_count(self, user_id: int = None) -> int:
+        """Get total messages count"""
+        async with self.session_scope() as session:
+            query = select(func.count(Message.id))
+            if user_id:
+                query = query.where(Message.user_id == user_id)
+            return await session.scalar(query)
+    
+    # ==================== Statistics Operations ====================
+    
+    async def get_statistics(self) -> Dict[str, Any]:
+        """Get current statistics from the counters table"""
+        async with self.session_scope() as session:
+            result = await session.execute(select(Counter.name, Counter.value))
+            return counters_to_statistics(dict(result.all()))
+    
+    # ==================== Subscription Operations ====================
+    
+    async def create_subscription(
+        self,
+        user_id: int,
+        plan: str,
+        expires_at: datetime = None,
+        **kwargs
+    ) -> Subscription:
+        """Create new subscription"""
+        async with self.session_scope() as session:
+            subscription = Subscription(
+                user_id=user_id,
+                plan=plan,
+                status='active',
+                expires_at=expires_at,
+                **kwargs
+            )
+            session.add(subscription)
+            await session.flush()
+            return subscription
+    
+    async def get_user_subscription(self, user_id: int) -> Optional[Subscription]:
+        """Get user's active subscription"""
+        async with self.session_scope() as session:
+            result = await session.execute(
+                select(Subscription)
+                .filter_by(user_id=user_id, status='active')
+                .order_by(Subscription.created_at.desc())
+            )
+            return result.scalars().first()
@@ -0,0 +1,378 @@
+"""
+Caches for database rows (in-process and shared)
+"""
+import json
+import logging
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from bot.config import settings
+
+try:
+    from redis import RedisError
+except ImportError:  # redis is optional; RedisCacheBackend is unused without it
+    RedisError = ConnectionError
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry time-to-live"""
+    
+    def __init__(self, maxsize: int = 10000, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @property
+    def enabled(self) -> bool:
+        """Check if cache stores anything at all"""
+        return self.maxsize > 0 and self.ttl > 0
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get value by key, counting hit or miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.misses += 1
+                return default
+            
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store value, evicting least recently used entries when full"""
+        if not self.enabled:
+            return
+        
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    
+    def delete(self, key: Hashable):
+        """Remove entry if present"""
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+
+class SingleFlightValue:
+    """
+    Cached value recomputed by one caller at a time
+    
+    Within ttl the value is returned as is. After that, and for up to
+    stale_ttl more seconds, callers keep getting the old value while a
+    single background thread recomputes it (stale-while-revalidate).
+    Only when there is no usable value do callers wait, and then for
+    one shared computation instead of each running the loader.
+    """
+    
+    def __init__(self, loader: Callable[[], Any], ttl: float = 30, stale_ttl: float = 300):
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.loads = 0
+        self.stale_hits = 0
+        self._value = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+    
+    def get(self) -> Any:
+        """Get value, refreshing it if needed"""
+        loaded_at = self._loaded_at
+        if loaded_at is not None:
+            age = time.monotonic() - loaded_at
+            if age < self.ttl:
+                return self._value
+            if age < self.ttl + self.stale_ttl:
+                self._refresh_in_background()
+                self.stale_hits += 1
+                return self._value
+        
+        with self._lock:
+            # Another caller may have loaded it while we waited
+            loaded_at = self._loaded_at
+            if loaded_at is not None and time.monotonic() - loaded_at < self.ttl:
+                return self._value
+            return self._load()
+    
+    def invalidate(self):
+        """Force the next get to recompute"""
+        self._loaded_at = None
+    
+    def _load(self) -> Any:
+        value = self.loader()
+        self.loads += 1
+        self._value = value
+        self._loaded_at = time.monotonic()
+        return value
+    
+    def _refresh_in_background(self):
+        if self._refreshing or not self._lock.acquire(blocking=False):
+            return
+        self._refreshing = True
+        
+        def refresh():
+            try:
+                self._load()
+            except Exception as e:
+                logger.error(f"Background refresh failed: {e}", exc_info=True)
+            finally:
+                self._refreshing = False
+                self._lock.release()
+        
+        threading.Thread(target=refresh, name='single-flight-refresh', daemon=True).start()
+
+
+# ==================== Shared Cache Backends ====================
+
+# Bump when cached payload layout changes so old entries are ignored
+CACHE_VERSION = 1
+
+INVALIDATION_CHANNEL = 'cache:invalidate'
+
+
+class CacheBackend(ABC):
+    """
+    Cache backend interface (values must be JSON-serializable)
+    
+    Backends implement get_many, set, delete and stats; get and set_many
+    loop over them unless a backend has a cheaper batch operation.
+    """
+    
+    # True when entries are visible to other bot processes
+    shared = False
+    
+    def __init__(self, namespace: str = 'bot'):
+        self.namespace = namespace
+        self.origin = uuid.uuid4().hex
+    
+    def make_key(self, template: str, **kwargs) -> str:
+        """Build versioned key from a CacheKey template"""
+        return f"{self.namespace}:v{CACHE_VERSION}:{template.format(**kwargs)}"
+    
+    def get(self, key: str) -> Any:
+        return self.get_many([key])[0]
+    
+    @abstractmethod
+    def get_many(self, keys: List[str]) -> List[Any]:
+        """Values of keys in order, None for misses"""
+    
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        """Store value under key"""
+    
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None):
+        """Store several keys"""
+        for key, value in items.items():
+            self.set(key, value, ttl)
+    
+    @abstractmethod
+    def delete(self, *keys: str):
+        """Remove keys"""
+    
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters"""
+    
+    def publish_invalidation(self, *keys: str):
+        """Tell other processes to drop their local copies of keys"""
+    
+    def subscribe_invalidations(self, callback: Callable[[str], None]):
+        """Call callback with every key invalidated by another process"""
+    
+    def close(self):
+        """Release backend resources"""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Process-local backend built on TTLCache"""
+    
+    def __init__(self, maxsize: int = 10000, ttl: int = 300, namespace: str = 'bot'):
+        super().__init__(namespace)
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+    
+    def get(self, key: str) -> Any:
+        return self._cache.get(key)
+    
+    def get_many(self, keys: List[str]) -> List[Any]:
+        return [self._cache.get(key) for key in keys]
+    
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        self._cache.set(key, value, ttl)
+    
+    def delete(self, *keys: str):
+        for key in keys:
+            self._cache.delete(key)
+    
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Redis backend shared by all bot processes
+    
+    Redis errors are logged and treated as misses (reads) or skipped
+    (writes), so an outage falls back to the local cache and the
+    database instead of failing updates.
+    """
+    
+    shared = True
+    
+    def __init__(self, url: str, ttl: int = 300, namespace: str = 'bot', client=None):
+        super().__init__(namespace)
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._pubsub_thread = None
+    
+    @staticmethod
+    def _decode(raw) -> Any:
+        if raw is None:
+            return None
+        return json.loads(raw)
+    
+    def _failed(self, operation: str, error: Exception):
+        self.errors += 1
+        logger.warning(f"Redis {operation} failed: {error}")
+    
+    def get_many(self, keys: List[str]) -> List[Any]:
+        """Fetch several keys in one round trip"""
+        if not keys:
+            return []
+        try:
+            raw_values = self.client.mget(keys)
+        except RedisError as e:
+            self._failed('get', e)
+            self.misses += len(keys)
+            return [None] * len(keys)
+        
+        values = [self._decode(raw) for raw in raw_values]
+        found = sum(1 for value in values if value is not None)
+        self.hits += found
+        self.misses += len(values) - found
+        return values
+    
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        try:
+            self.client.set(key, json.dumps(value), ex=ttl or self.ttl)
+        except RedisError as e:
+            self._failed('set', e)
+    
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None):
+        """Store several keys in one pipelined round trip"""
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(key, json.dumps(value), ex=ttl or self.ttl)
+        try:
+            pipe.execute()
+        except RedisError as e:
+            self._failed('set', e)
+    
+    def delete(self, *keys: str):
+        if not keys:
+            return
+        try:
+            self.client.delete(*keys)
+        except RedisError as e:
+            self._failed('delete', e)
+    
+    def publish_invalidation(self, *keys: str):
+        try:
+            for key in keys:
+                self.client.publish(INVALIDATION_CHANNEL, f"{self.origin}|{key}")
+        except RedisError as e:
+            # Other processes keep their local copies until those expire
+            self._failed('publish', e)
+    
+    def subscribe_invalidations(self, callback: Callable[[str], None]):
+        def on_message(message):
+            data = message.get('data')
+            if isinstance(data, bytes):
+                data = data.decode()
+            origin, _, key = str(data).partition('|')
+            if origin != self.origin:
+                callback(key)
+        
+        def on_error(error, pubsub, thread):
+            # Keep listening; the client reconnects on the next read
+            self._failed('subscribe', error)
+            time.sleep(1)
+        
+        try:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{INVALIDATION_CHANNEL: on_message})
+        except RedisError as e:
+            self._failed('subscribe', e)
+            return
+        self._pubsub_thread = pubsub.run_in_thread(
+            sleep_time=1, daemon=True, exception_handler=on_error
+        )
+    
+    def close(self):
+        if self._pubsub_thread is not None:
+            self._pubsub_thread.stop()
+            self._pubsub_thread = None
+    
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+
+def create_cache_backend() -> CacheBackend:
+    """Create cache backend from settings"""
+    if settings.redis_enabled:
+        return RedisCacheBackend(settings.redis_url, ttl=settings.user_cache_ttl)
+    return MemoryCacheBackend(maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl)
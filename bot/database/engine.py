@@ -0,0 +1,103 @@
+"""
+Engine profiles: backend-specific connection and pool tuning
+"""
+import threading
+from contextlib import nullcontext
+from typing import Any, Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+
+from bot.config import settings
+
+
+class EngineProfile:
+    """Engine tuning profiles"""
+    DEFAULT = "default"  # SQLAlchemy defaults, no tuning
+    SQLITE = "sqlite"    # WAL, pragmas, single writer
+    SERVER = "server"    # pool sizing for PostgreSQL/MySQL
+
+
+def detect_profile(database_url: str) -> str:
+    """Pick profile from settings override or the URL backend"""
+    if settings.database_profile:
+        return settings.database_profile
+    if make_url(database_url).get_backend_name() == 'sqlite':
+        return EngineProfile.SQLITE
+    return EngineProfile.SERVER
+
+
+def _is_sqlite_file(database_url: str) -> bool:
+    url = make_url(database_url)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def engine_options(database_url: str, profile: str) -> Dict[str, Any]:
+    """Keyword arguments for create_engine/create_async_engine"""
+    options = {'echo': settings.debug, 'pool_pre_ping': True}
+    
+    if profile == EngineProfile.SQLITE:
+        # Connections move between dispatcher threads through the pool
+        options['connect_args'] = {'check_same_thread': False}
+    elif profile == EngineProfile.SERVER:
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_recycle=settings.db_pool_recycle,
+            pool_timeout=settings.db_pool_timeout
+        )
+    return options
+
+
+def sqlite_pragmas(database_url: str) -> Dict[str, Any]:
+    """PRAGMA values applied to every new SQLite connection"""
+    pragmas = {
+        'busy_timeout': settings.sqlite_busy_timeout,
+        'cache_size': settings.sqlite_cache_size,
+        'mmap_size': settings.sqlite_mmap_size,
+        'synchronous': settings.sqlite_synchronous,
+    }
+    if _is_sqlite_file(database_url):
+        # WAL needs a file; in-memory databases keep their own journal
+        pragmas = {'journal_mode': settings.sqlite_journal_mode, **pragmas}
+    return pragmas
+
+
+def configure_engine(engine: Engine, database_url: str, profile: str):
+    """Install per-connection setup for profile (pass sync_engine for async engines)"""
+    if profile != EngineProfile.SQLITE:
+        return
+    
+    pragmas = sqlite_pragmas(database_url)
+    
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def create_db_engine(database_url: str, profile: str = None) -> Engine:
+    """Create engine tuned for the URL backend"""
+    profile = profile or detect_profile(database_url)
+    engine = create_engine(database_url, **engine_options(database_url, profile))
+    configure_engine(engine, database_url, profile)
+    return engine
+
+
+def create_writer_lock(database_url: str, profile: str):
+    """
+    Lock serializing write transactions of this process
+    
+    SQLite allows one writer at a time. Letting dispatcher threads queue
+    on a Python lock is cheaper than having them race for the database
+    lock and spin in busy_timeout (or fail with "database is locked"
+    when a read transaction cannot be upgraded). Other backends and the
+    default profile get a no-op context.
+    """
+    if profile == EngineProfile.SQLITE and settings.sqlite_single_writer:
+        return threading.Lock()
+    return nullcontext()
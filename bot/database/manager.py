@@ -1,29 +1,211 @@
 """
 Database manager with CRUD operations
 """
-from datetime import datetime
-from typing import List, Optional, Dict, Any
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Dict, Any, Tuple, Iterator, Iterable, Callable
 from contextlib import contextmanager
 
-from sqlalchemy import create_engine, func
+from sqlalchemy import func, update, insert, delete, select, and_, or_, DateTime
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker, scoped_session
 
-from bot.config import settings
-from bot.database.models import Base, User, Message, Statistic, Subscription
+from bot.config import settings, CacheKey, Limits
+from bot.database.cache import TTLCache, SingleFlightValue, create_cache_backend
+from bot.database.engine import create_db_engine, create_writer_lock, detect_profile
+from bot.database.models import (
+    User, Message, MessageArchive, Statistic, Subscription, Counter,
+    AnalyticsEvent, AnalyticsSketch, create_schema
+)
+from bot.database.writer import MessageWriter
+
+# Counters kept in the counters table
+COUNTER_NAMES = ('total_users', 'blocked_users', 'total_messages')
+
+# Messages removed by retention; not recomputable, so never reconciled
+PURGED_COUNTER = 'purged_messages'
+
+# Message types counted as text in rolled up statistics, the rest is media
+TEXT_MESSAGE_TYPES = ('text', 'command')
+
+
+def counter_increment(name: str, delta: int = 1):
+    """Build statement adding delta to a counter row"""
+    return (
+        update(Counter)
+        .where(Counter.name == name)
+        .values(value=Counter.value + delta, updated_at=datetime.now())
+    )
+
+
+def counters_to_statistics(values: Dict[str, int]) -> Dict[str, Any]:
+    """Convert counter rows to the get_statistics() layout"""
+    total_users = values.get('total_users', 0)
+    blocked_users = values.get('blocked_users', 0)
+    return {
+        'total_users': total_users,
+        'active_users': total_users - blocked_users,
+        'blocked_users': blocked_users,
+        'total_messages': values.get('total_messages', 0)
+    }
+
+
+def _as_date(value) -> date:
+    """Normalize func.date() result (str on SQLite, date elsewhere)"""
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _day_start(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day)
+
+
+def _user_to_cache(user: User) -> Dict[str, Any]:
+    """Serialize user row for the shared cache"""
+    data = {}
+    for column in User.__table__.columns:
+        value = getattr(user, column.key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        data[column.key] = value
+    return data
+
+
+def _user_from_cache(data: Dict[str, Any]) -> User:
+    """Rebuild detached user from shared cache payload"""
+    values = dict(data)
+    for column in User.__table__.columns:
+        if isinstance(column.type, DateTime) and values.get(column.key):
+            values[column.key] = datetime.fromisoformat(values[column.key])
+    return User(**values)
+
+
+def _keyset_page(
+    session,
+    query,
+    model,
+    sort_keys: List[Tuple[Any, bool]],
+    cursor: Optional[int],
+    backward: bool,
+    limit: int,
+    offset: int = 0
+) -> list:
+    """
+    Fetch one page of query using keyset (seek) pagination
+    
+    sort_keys is a list of (column, descending) pairs ending with the
+    primary key. cursor is the primary key of the row the page starts
+    after, or ends before when backward is True. offset is only used
+    without a cursor, to jump straight to a page.
+    """
+    if cursor is not None:
+        columns = [column for column, _ in sort_keys]
+        row = session.query(*columns).filter(model.id == cursor).first()
+        if row is not None:
+            clauses = []
+            for i, (column, descending) in enumerate(sort_keys):
+                if descending == backward:
+                    seek = column > row[i]
+                else:
+                    seek = column < row[i]
+                equal = [columns[j] == row[j] for j in range(i)]
+                clauses.append(and_(*equal, seek))
+            query = query.filter(or_(*clauses))
+    
+    order = [
+        column.asc() if descending == backward else column.desc()
+        for column, descending in sort_keys
+    ]
+    query = query.order_by(*order)
+    if cursor is None and offset:
+        query = query.offset(offset)
+    items = query.limit(limit).all()
+    if backward:
+        items.reverse()
+    return items
 
 
 class DatabaseManager:
     """Database manager for all database operations"""
     
-    def __init__(self):
-        self.engine = create_engine(
-            settings.database_url,
-            echo=settings.debug,
-            pool_pre_ping=True
-        )
-        Base.metadata.create_all(self.engine)
+    def __init__(self, database_url: str = None, profile: str = None, read_url: str = None):
+        database_url = database_url or settings.database_url
+        self.profile = profile or detect_profile(database_url)
+        self.engine = create_db_engine(database_url, self.profile)
+        self.writer_lock = create_writer_lock(database_url, self.profile)
+        create_schema(self.engine)
         session_factory = sessionmaker(bind=self.engine)
         self.Session = scoped_session(session_factory)
+        
+        # Optional read replica; without one reads use the primary
+        if read_url or settings.database_read_url:
+            read_url = read_url or settings.database_read_url
+            self.read_engine = create_db_engine(read_url, detect_profile(read_url))
+            self.ReadSession = scoped_session(sessionmaker(bind=self.read_engine))
+        else:
+            self.read_engine = self.engine
+            self.ReadSession = self.Session
+        # user_id -> monotonic time until which that user's reads stay on primary
+        self._sticky: Dict[int, float] = {}
+        self._sticky_lock = threading.Lock()
+        
+        self.user_cache = TTLCache(
+            maxsize=settings.user_cache_size,
+            ttl=settings.user_cache_ttl
+        )
+        self.cache = create_cache_backend()
+        self.cache.subscribe_invalidations(self.user_cache.delete)
+        self.message_writer = MessageWriter(
+            self.write_scope,
+            batch_size=settings.message_batch_size,
+            flush_interval=settings.message_flush_interval,
+            max_queue_size=settings.message_queue_size,
+            overflow_policy=settings.message_overflow_policy,
+            on_write=lambda session, rows: self._increment(session, 'total_messages', len(rows))
+        )
+        self._statistics = SingleFlightValue(
+            self._load_statistics,
+            ttl=settings.statistics_cache_ttl,
+            stale_ttl=settings.statistics_stale_ttl
+        )
+        self._init_counters()
+    
+    def close(self):
+        """Flush buffered writes and release resources"""
+        self.message_writer.stop()
+        self.cache.close()
+    
+    # ==================== Cache Helpers ====================
+    
+    def _user_key(self, user_id: int) -> str:
+        return self.cache.make_key(CacheKey.USER_DATA, user_id=user_id)
+    
+    def _cache_user(self, user: User, share: bool = True):
+        """Store user in local cache and, if shared, in the shared cache"""
+        key = self._user_key(user.user_id)
+        self.user_cache.set(key, user)
+        if share and self.cache.shared:
+            self.cache.set(key, _user_to_cache(user))
+    
+    def invalidate_user(self, user_id: int, user: Optional[User] = None):
+        """
+        Replace or drop cached user everywhere after a write
+        
+        For writes made outside this manager (e.g. AsyncDatabaseManager):
+        drops the local and shared entries and tells other processes.
+        """
+        key = self._user_key(user_id)
+        if user:
+            self._cache_user(user)
+        else:
+            self.user_cache.delete(key)
+            if self.cache.shared:
+                self.cache.delete(key)
+        self.cache.publish_invalidation(key)
     
     @contextmanager
     def session_scope(self):
@@ -38,6 +220,95 @@ class DatabaseManager:
         finally:
             session.close()
     
+    @contextmanager
+    def read_scope(self, user_ids: Iterable[int] = ()):
+        """
+        Scope for pure reads, served by the replica when configured
+        
+        Reads about users that wrote recently go to the primary so they
+        see their own changes despite replication lag.
+        """
+        if self.read_engine is not self.engine and not self._is_sticky(user_ids):
+            session = self.ReadSession()
+            try:
+                yield session
+            finally:
+                session.rollback()
+                session.close()
+        else:
+            with self.session_scope() as session:
+                yield session
+    
+    @contextmanager
+    def write_scope(self):
+        """Transactional scope for writes, serialized where the backend needs it"""
+        with self.writer_lock:
+            with self.session_scope() as session:
+                yield session
+    
+    def _mark_written(self, user_id: int):
+        """Route user's reads to primary for the read-your-writes window"""
+        if self.read_engine is self.engine:
+            return
+        now = time.monotonic()
+        with self._sticky_lock:
+            self._sticky[user_id] = now + settings.read_your_writes_window
+            if len(self._sticky) > 10000:
+                self._sticky = {
+                    key: until for key, until in self._sticky.items() if until > now
+                }
+    
+    def _is_sticky(self, user_ids: Iterable[int]) -> bool:
+        if not self._sticky:
+            return False
+        now = time.monotonic()
+        return any(self._sticky.get(user_id, 0) > now for user_id in user_ids)
+    
+    # ==================== Counter Helpers ====================
+    
+    def _init_counters(self):
+        """Create missing counter rows, filling them with exact values"""
+        with self.session_scope() as session:
+            existing = {name for (name,) in session.query(Counter.name)}
+        if PURGED_COUNTER not in existing:
+            with self.write_scope() as session:
+                session.add(Counter(name=PURGED_COUNTER, value=0))
+        if not set(COUNTER_NAMES) <= existing:
+            self.reconcile_counters()
+    
+    @staticmethod
+    def _increment(session, name: str, delta: int = 1):
+        """Atomically add delta to counter inside caller's transaction"""
+        session.execute(counter_increment(name, delta))
+    
+    def reconcile_counters(self) -> Dict[str, Any]:
+        """
+        Recompute counters with full scans and store exact values
+        
+        Counting happens in the transaction that writes the counters, after
+        locking every counter row it reads: concurrent increments are either
+        already part of the counts or wait and apply on top of the stored
+        values. purged_messages is locked too, since total_messages adds it,
+        but it is only read, never recomputed.
+        """
+        with self.write_scope() as session:
+            counters = {
+                counter.name: counter
+                for counter in session.query(Counter)
+                .filter(Counter.name.in_(COUNTER_NAMES + (PURGED_COUNTER,)))
+                .with_for_update()
+            }
+            stats = self._count_rows(session)
+            for name in COUNTER_NAMES:
+                counter = counters.get(name)
+                if counter is None:
+                    session.add(Counter(name=name, value=stats[name]))
+                else:
+                    counter.value = stats[name]
+        self.cache.delete(self.cache.make_key(CacheKey.STATISTICS))
+        self._statistics.invalidate()
+        return stats
+    
     # ==================== User Operations ====================
     
     def get_or_create_user(
@@ -49,10 +320,12 @@ class DatabaseManager:
         language: str = None
     ) -> User:
         """Get existing user or create new one"""
-        with self.session_scope() as session:
+        created = False
+        with self.write_scope() as session:
             user = session.query(User).filter_by(user_id=user_id).first()
             
             if not user:
+                created = True
                 user = User(
                     user_id=user_id,
                     username=username,
@@ -62,39 +335,111 @@ class DatabaseManager:
                 )
                 session.add(user)
                 session.flush()
+                self._increment(session, 'total_users')
             else:
                 # Update user info
                 user.username = username
                 user.first_name = first_name
                 user.last_name = last_name
                 user.last_activity = datetime.now()
+                # Write the changes before the detached copy is cached
+                session.flush()
             
             session.expunge(user)
-            return user
+        
+        # Only new rows are pushed to the shared cache; activity updates stay local
+        self._cache_user(user, share=created)
+        if created:
+            self._mark_written(user_id)
+        return user
     
     def get_user(self, user_id: int) -> Optional[User]:
-        """Get user by ID"""
-        with self.session_scope() as session:
+        """Get user by ID (served from cache when possible)"""
+        key = self._user_key(user_id)
+        user = self.user_cache.get(key)
+        if user is not None:
+            return user
+        
+        if self.cache.shared:
+            data = self.cache.get(key)
+            if data is not None:
+                user = _user_from_cache(data)
+                self.user_cache.set(key, user)
+                return user
+        
+        with self.read_scope([user_id]) as session:
             user = session.query(User).filter_by(user_id=user_id).first()
             if user:
                 session.expunge(user)
-            return user
+        
+        if user:
+            self._cache_user(user)
+        return user
+    
+    def get_users(self, user_ids: List[int]) -> Dict[int, User]:
+        """Get several users by ID, batching cache and database lookups"""
+        result = {}
+        missing = []
+        for user_id in user_ids:
+            user = self.user_cache.get(self._user_key(user_id))
+            if user is not None:
+                result[user_id] = user
+            else:
+                missing.append(user_id)
+        
+        if missing and self.cache.shared:
+            keys = [self._user_key(user_id) for user_id in missing]
+            still_missing = []
+            for user_id, key, data in zip(missing, keys, self.cache.get_many(keys)):
+                if data is None:
+                    still_missing.append(user_id)
+                    continue
+                user = _user_from_cache(data)
+                self.user_cache.set(key, user)
+                result[user_id] = user
+            missing = still_missing
+        
+        if missing:
+            with self.read_scope(missing) as session:
+                users = session.query(User).filter(User.user_id.in_(missing)).all()
+                for user in users:
+                    session.expunge(user)
+            
+            for user in users:
+                self.user_cache.set(self._user_key(user.user_id), user)
+                result[user.user_id] = user
+            if users and self.cache.shared:
+                self.cache.set_many({
+                    self._user_key(user.user_id): _user_to_cache(user)
+                    for user in users
+                })
+        
+        return result
     
     def update_user(self, user_id: int, **kwargs) -> Optional[User]:
         """Update user fields"""
-        with self.session_scope() as session:
-            user = session.query(User).filter_by(user_id=user_id).first()
+        with self.write_scope() as session:
+            # Row lock: concurrent updates must not both see the old is_blocked
+            user = session.query(User).filter_by(user_id=user_id).with_for_update().first()
             if user:
+                was_blocked = bool(user.is_blocked)
                 for key, value in kwargs.items():
                     if hasattr(user, key):
                         setattr(user, key, value)
                 user.updated_at = datetime.now()
+                if bool(user.is_blocked) != was_blocked:
+                    self._increment(session, 'blocked_users', 1 if user.is_blocked else -1)
+                session.flush()
                 session.expunge(user)
-            return user
+        
+        # Write-through: later reads in every process see the change immediately
+        self.invalidate_user(user_id, user)
+        self._mark_written(user_id)
+        return user
     
     def get_all_users(self, is_blocked: bool = None) -> List[User]:
         """Get all users"""
-        with self.session_scope() as session:
+        with self.read_scope() as session:
             query = session.query(User)
             if is_blocked is not None:
                 query = query.filter_by(is_blocked=is_blocked)
@@ -103,6 +448,112 @@ class DatabaseManager:
                 session.expunge(user)
             return users
     
+    def iter_user_ids(
+        self,
+        is_blocked: bool = None,
+        chunk_size: int = 1000
+    ) -> Iterator[int]:
+        """
+        Stream Telegram user IDs in users.id order
+        
+        Each chunk is a short keyset query selecting only the needed
+        columns, so memory stays constant and no transaction is held open
+        while the caller consumes the IDs.
+        """
+        last_id = 0
+        while True:
+            with self.read_scope() as session:
+                query = session.query(User.id, User.user_id).filter(User.id > last_id)
+                if is_blocked is not None:
+                    query = query.filter(User.is_blocked == is_blocked)
+                rows = query.order_by(User.id).limit(chunk_size).all()
+            
+            if not rows:
+                return
+            
+            for _, user_id in rows:
+                yield user_id
+            
+            if len(rows) < chunk_size:
+                return
+            last_id = rows[-1][0]
+    
+    def count_users(
+        self,
+        is_blocked: bool = None,
+        language: str = None,
+        is_premium: bool = None
+    ) -> int:
+        """Count users matching filters without loading them"""
+        with self.read_scope() as session:
+            query = session.query(func.count(User.id))
+            if is_blocked is not None:
+                query = query.filter(User.is_blocked == is_blocked)
+            if language is not None:
+                query = query.filter(User.language == language)
+            if is_premium is not None:
+                query = query.filter(User.is_premium == is_premium)
+            return query.scalar()
+    
+    def get_audience_preview(self, is_blocked: bool = False) -> Dict[str, Dict[str, int]]:
+        """
+        Count users per language and premium flag
+        
+        Returns:
+            dict: {'uz': {'total': 120, 'premium': 5}, ...}
+        """
+        with self.read_scope() as session:
+            query = session.query(User.language, User.is_premium, func.count(User.id))
+            if is_blocked is not None:
+                query = query.filter(User.is_blocked == is_blocked)
+            rows = query.group_by(User.language, User.is_premium).all()
+        
+        preview = {}
+        for language, is_premium, count in rows:
+            key = language or settings.default_language
+            entry = preview.setdefault(key, {'total': 0, 'premium': 0})
+            entry['total'] += count
+            if is_premium:
+                entry['premium'] += count
+        return preview
+    
+    def get_users_page(
+        self,
+        cursor: int = None,
+        backward: bool = False,
+        limit: int = Limits.ITEMS_PER_PAGE,
+        order_by: str = 'id',
+        is_blocked: bool = None,
+        offset: int = 0
+    ) -> List[User]:
+        """
+        Get one page of users using a keyset cursor
+        
+        Args:
+            cursor: users.id of the last row of the previous page
+                (or the first row of the next page when backward)
+            backward: Fetch the page before cursor instead of after it
+            limit: Page size
+            order_by: 'id' (oldest first) or 'last_activity' (most recent first)
+            is_blocked: Optional blocked status filter
+            offset: Rows to skip when jumping without a cursor
+        """
+        if order_by == 'last_activity':
+            sort_keys = [(User.last_activity, True), (User.id, True)]
+        else:
+            sort_keys = [(User.id, False)]
+        
+        with self.read_scope() as session:
+            query = session.query(User)
+            if is_blocked is not None:
+                query = query.filter_by(is_blocked=is_blocked)
+            users = _keyset_page(
+                session, query, User, sort_keys, cursor, backward, limit, offset
+            )
+            for user in users:
+                session.expunge(user)
+            return users
+    
     def set_user_language(self, user_id: int, language: str):
         """Set user language"""
         self.update_user(user_id, language=language)
@@ -133,7 +584,7 @@ class DatabaseManager:
         data: Dict = None
     ):
         """Add message to database"""
-        with self.session_scope() as session:
+        with self.write_scope() as session:
             message = Message(
                 user_id=user_id,
                 message_type=message_type,
@@ -141,10 +592,24 @@ class DatabaseManager:
                 data=data or {}
             )
             session.add(message)
+            self._increment(session, 'total_messages')
+    
+    def log_message(
+        self,
+        user_id: int,
+        message_type: str,
+        text: str = None,
+        data: Dict = None
+    ):
+        """Add message through the write-behind buffer (if enabled)"""
+        if settings.message_buffer_enabled:
+            self.message_writer.put(user_id, message_type, text, data)
+        else:
+            self.add_message(user_id, message_type, text, data)
     
     def get_user_messages(self, user_id: int, limit: int = 100) -> List[Message]:
         """Get user messages"""
-        with self.session_scope() as session:
+        with self.read_scope([user_id]) as session:
             messages = session.query(Message)\
                 .filter_by(user_id=user_id)\
                 .order_by(Message.created_at.desc())\
@@ -154,9 +619,30 @@ class DatabaseManager:
                 session.expunge(msg)
             return messages
     
+    def get_user_messages_page(
+        self,
+        user_id: int,
+        cursor: int = None,
+        backward: bool = False,
+        limit: int = Limits.ITEMS_PER_PAGE
+    ) -> List[Message]:
+        """
+        Get one page of user messages (newest first) using a keyset cursor
+        
+        cursor is messages.id of the last row of the previous page, or of
+        the first row of the next page when backward is True.
+        """
+        sort_keys = [(Message.created_at, True), (Message.id, True)]
+        with self.read_scope([user_id]) as session:
+            query = session.query(Message).filter_by(user_id=user_id)
+            messages = _keyset_page(session, query, Message, sort_keys, cursor, backward, limit)
+            for msg in messages:
+                session.expunge(msg)
+            return messages
+    
     def get_messages_count(self, user_id: int = None) -> int:
         """Get total messages count"""
-        with self.session_scope() as session:
+        with self.read_scope() as session:
             query = session.query(Message)
             if user_id:
                 query = query.filter_by(user_id=user_id)
@@ -165,33 +651,294 @@ class DatabaseManager:
     # ==================== Statistics Operations ====================
     
     def get_statistics(self) -> Dict[str, Any]:
-        """Get current statistics"""
+        """Get current statistics snapshot (shared, refreshed by one thread at a time)"""
+        return self._statistics.get()
+    
+    def _load_statistics(self) -> Dict[str, Any]:
+        """Load statistics from shared cache or counters table"""
+        key = self.cache.make_key(CacheKey.STATISTICS)
+        stats = self.cache.get(key) if self.cache.shared else None
+        if stats is None:
+            stats = self._read_counters()
+            if self.cache.shared:
+                self.cache.set(key, stats, ttl=settings.statistics_cache_ttl)
+        return stats
+    
+    def _read_counters(self) -> Dict[str, Any]:
+        """Read statistics from the counters table"""
+        with self.read_scope() as session:
+            values = dict(session.query(Counter.name, Counter.value))
+        return counters_to_statistics(values)
+    
+    def _count_statistics(self) -> Dict[str, Any]:
+        """Count statistics from database"""
         with self.session_scope() as session:
-            total_users = session.query(User).count()
-            active_users = session.query(User).filter_by(is_blocked=False).count()
-            blocked_users = session.query(User).filter_by(is_blocked=True).count()
-            total_messages = session.query(Message).count()
-            
-            return {
-                'total_users': total_users,
-                'active_users': active_users,
-                'blocked_users': blocked_users,
-                'total_messages': total_messages
-            }
+            return self._count_rows(session)
     
-    def save_daily_statistics(self):
-        """Save daily statistics"""
-        stats = self.get_statistics()
+    @staticmethod
+    def _count_rows(session) -> Dict[str, Any]:
+        """Count statistics with full scans inside caller's transaction"""
+        total_users = session.query(User).count()
+        active_users = session.query(User).filter_by(is_blocked=False).count()
+        blocked_users = session.query(User).filter_by(is_blocked=True).count()
+        # Lifetime total: rows still present plus rows removed by retention
+        purged = session.query(Counter.value).filter_by(name=PURGED_COUNTER).scalar() or 0
+        total_messages = session.query(Message).count() + purged
         
+        return {
+            'total_users': total_users,
+            'active_users': active_users,
+            'blocked_users': blocked_users,
+            'total_messages': total_messages
+        }
+    
+    def save_daily_statistics(self, day: date = None):
+        """Save statistics row of a day (default: today, kept open until the day ends)"""
+        day = day or date.today()
+        self.rollup_statistics(
+            day,
+            day + timedelta(days=1),
+            final=day < date.today(),
+            blocked_users=self.get_statistics()['blocked_users']
+        )
+    
+    # ==================== Rollup & Retention ====================
+    
+    def rollup_statistics(
+        self,
+        start: date,
+        end: date,
+        final: bool = True,
+        blocked_users: int = None
+    ) -> int:
+        """
+        Aggregate messages and new users of days [start, end) into statistics rows
+        
+        One GROUP BY per table covers the whole range. Each day gets a
+        single row (date = midnight) with per-type counts in data. Rows
+        marked final are left alone, since retention may already have
+        deleted the raw messages behind them, which makes re-runs safe.
+        blocked_users has no history, so it is only set when a snapshot
+        value is passed in.
+        
+        Returns:
+            int: Number of rows written
+        """
+        range_start, range_end = _day_start(start), _day_start(end)
+        day = func.date(Message.created_at)
+        user_day = func.date(User.created_at)
+        
+        # Primary: rows are about to be finalized, replica lag would lose data
         with self.session_scope() as session:
-            statistic = Statistic(
-                date=datetime.now(),
-                total_users=stats['total_users'],
-                active_users=stats['active_users'],
-                blocked_users=stats['blocked_users'],
-                total_messages=stats['total_messages']
+            message_rows = session.query(day, Message.message_type, func.count(Message.id))\
+                .filter(Message.created_at >= range_start, Message.created_at < range_end)\
+                .group_by(day, Message.message_type)\
+                .all()
+            active_rows = session.query(day, func.count(func.distinct(Message.user_id)))\
+                .filter(Message.created_at >= range_start, Message.created_at < range_end)\
+                .group_by(day)\
+                .all()
+            user_rows = session.query(user_day, func.count(User.id))\
+                .filter(User.created_at >= range_start, User.created_at < range_end)\
+                .group_by(user_day)\
+                .all()
+            users_before = session.query(func.count(User.id))\
+                .filter(User.created_at < range_start)\
+                .scalar()
+        
+        message_types: Dict[date, Dict[str, int]] = {}
+        for value, message_type, count in message_rows:
+            types = message_types.setdefault(_as_date(value), {})
+            types[message_type or 'unknown'] = count
+        active = {_as_date(value): count for value, count in active_rows}
+        new_users = {_as_date(value): count for value, count in user_rows}
+        
+        written = 0
+        total_users = users_before
+        with self.write_scope() as session:
+            existing = {
+                statistic.date.date(): statistic
+                for statistic in session.query(Statistic).filter(
+                    Statistic.date >= range_start, Statistic.date < range_end
+                )
+            }
+            
+            current = start
+            while current < end:
+                total_users += new_users.get(current, 0)
+                types = message_types.get(current, {})
+                statistic = existing.get(current)
+                
+                if statistic is not None and (statistic.data or {}).get('final'):
+                    current += timedelta(days=1)
+                    continue
+                if statistic is None:
+                    statistic = Statistic(date=_day_start(current))
+                    session.add(statistic)
+                
+                text = sum(count for name, count in types.items() if name in TEXT_MESSAGE_TYPES)
+                statistic.total_users = total_users
+                statistic.new_users = new_users.get(current, 0)
+                statistic.active_users = active.get(current, 0)
+                statistic.total_messages = sum(types.values())
+                statistic.text_messages = text
+                statistic.media_messages = statistic.total_messages - text
+                statistic.data = {**(statistic.data or {}), 'message_types': types, 'final': final}
+                if blocked_users is not None:
+                    statistic.blocked_users = blocked_users
+                
+                written += 1
+                current += timedelta(days=1)
+        
+        return written
+    
+    def purge_messages(self, before: datetime, batch_size: int = 1000, archive: bool = False) -> int:
+        """
+        Delete (or move to messages_archive) one batch of messages older than before
+        
+        Each batch is its own short transaction, so callers loop until it
+        returns 0 and the write lock is never held for long.
+        
+        Returns:
+            int: Number of rows removed
+        """
+        with self.write_scope() as session:
+            ids = [
+                message_id for (message_id,) in session.query(Message.id)
+                .filter(Message.created_at < before)
+                .order_by(Message.id)
+                .limit(batch_size)
+            ]
+            if not ids:
+                return 0
+            
+            if archive:
+                columns = [Message.id, Message.user_id, Message.message_type,
+                           Message.text, Message.data, Message.created_at]
+                session.execute(
+                    insert(MessageArchive).from_select(
+                        ['id', 'user_id', 'message_type', 'text', 'data', 'created_at'],
+                        select(*columns).where(Message.id.in_(ids))
+                    )
+                )
+            session.execute(delete(Message).where(Message.id.in_(ids)))
+            self._increment(session, PURGED_COUNTER, len(ids))
+        
+        return len(ids)
+    
+    def get_statistics_checkpoint(self) -> Optional[date]:
+        """Get last day whose statistics row is final"""
+        with self.read_scope() as session:
+            # Only the newest few rows can still be open
+            for statistic in session.query(Statistic).order_by(Statistic.date.desc()).limit(10):
+                if (statistic.data or {}).get('final'):
+                    return statistic.date.date()
+            return None
+    
+    def get_first_activity_date(self) -> Optional[date]:
+        """Get day of the oldest stored user or message"""
+        with self.read_scope() as session:
+            values = [
+                session.query(func.min(User.created_at)).scalar(),
+                session.query(func.min(Message.created_at)).scalar()
+            ]
+        values = [value for value in values if value is not None]
+        return min(values).date() if values else None
+    
+    def get_oldest_message_date(self) -> Optional[datetime]:
+        """Get creation time of the oldest stored message"""
+        with self.read_scope() as session:
+            return session.query(func.min(Message.created_at)).scalar()
+    
+    # ==================== Analytics Operations ====================
+    
+    def save_analytics(
+        self,
+        events: Dict[Tuple[datetime, str, str, Optional[str]], int],
+        sketches: Dict[str, bytes],
+        merge: Callable[[bytes, bytes], bytes]
+    ):
+        """
+        Store flushed analytics aggregates in one transaction
+        
+        Stored sketches are merged under a row lock, so processes flushing
+        the same day at once do not overwrite each other's registers.
+        
+        Args:
+            events: {(minute, kind, name, language): count}
+            sketches: {key: registers} merged into stored sketches with merge
+        """
+        with self.write_scope() as session:
+            if events:
+                session.execute(insert(AnalyticsEvent), [
+                    {'minute': minute, 'kind': kind, 'name': name, 'language': language, 'count': count}
+                    for (minute, kind, name, language), count in events.items()
+                ])
+            
+            stored = {
+                sketch.key: sketch
+                for sketch in session.query(AnalyticsSketch)
+                .filter(AnalyticsSketch.key.in_(list(sketches)))
+                .with_for_update()
+            } if sketches else {}
+            for key, registers in sketches.items():
+                sketch = stored.get(key)
+                if sketch is None:
+                    try:
+                        with session.begin_nested():
+                            session.add(AnalyticsSketch(key=key, registers=registers))
+                        continue
+                    except IntegrityError:
+                        # Another process created it since the query above
+                        sketch = (
+                            session.query(AnalyticsSketch)
+                            .filter_by(key=key)
+                            .with_for_update()
+                            .one()
+                        )
+                sketch.registers = merge(sketch.registers, registers)
+    
+    def purge_analytics_events(self, before: datetime, batch_size: int = 1000) -> int:
+        """
+        Delete one batch of per-minute analytics events older than before
+        
+        Returns:
+            int: Number of rows removed
+        """
+        with self.write_scope() as session:
+            ids = [
+                event_id for (event_id,) in session.query(AnalyticsEvent.id)
+                .filter(AnalyticsEvent.minute < before)
+                .order_by(AnalyticsEvent.id)
+                .limit(batch_size)
+            ]
+            if ids:
+                session.execute(delete(AnalyticsEvent).where(AnalyticsEvent.id.in_(ids)))
+        return len(ids)
+    
+    def get_analytics_sketches(self, keys: List[str]) -> Dict[str, bytes]:
+        """Get stored sketch registers by key"""
+        with self.read_scope() as session:
+            return dict(
+                session.query(AnalyticsSketch.key, AnalyticsSketch.registers)
+                .filter(AnalyticsSketch.key.in_(keys))
             )
-            session.add(statistic)
+    
+    def get_event_counts(self, since: datetime, kind: str = None) -> Dict[Tuple[str, str], int]:
+        """
+        Sum flushed event counts since a time
+        
+        Returns:
+            dict: {(kind, name): count}
+        """
+        with self.read_scope() as session:
+            query = session.query(
+                AnalyticsEvent.kind, AnalyticsEvent.name, func.sum(AnalyticsEvent.count)
+            ).filter(AnalyticsEvent.minute >= since)
+            if kind is not None:
+                query = query.filter(AnalyticsEvent.kind == kind)
+            rows = query.group_by(AnalyticsEvent.kind, AnalyticsEvent.name).all()
+        return {(kind, name): int(count) for kind, name, count in rows}
     
     # ==================== Subscription Operations ====================
     
@@ -203,7 +950,7 @@ class DatabaseManager:
         **kwargs
     ) -> Subscription:
         """Create new subscription"""
-        with self.session_scope() as session:
+        with self.write_scope() as session:
             subscription = Subscription(
                 user_id=user_id,
                 plan=plan,
@@ -214,11 +961,13 @@ class DatabaseManager:
             session.add(subscription)
             session.flush()
             session.expunge(subscription)
-            return subscription
+        
+        self._mark_written(user_id)
+        return subscription
     
     def get_user_subscription(self, user_id: int) -> Optional[Subscription]:
         """Get user's active subscription"""
-        with self.session_scope() as session:
+        with self.read_scope([user_id]) as session:
             sub = session.query(Subscription)\
                 .filter_by(user_id=user_id, status='active')\
                 .order_by(Subscription.created_at.desc())\
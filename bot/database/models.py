@@ -2,7 +2,7 @@
 Database models
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, JSON, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -30,7 +30,7 @@ class User(Base):
     # Metadata
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
-    last_activity = Column(DateTime, default=datetime.now)
+    last_activity = Column(DateTime, default=datetime.now, index=True)
     
     # Additional data
     data = Column(JSON, default={})
@@ -68,10 +68,33 @@ class Message(Base):
     data = Column(JSON, default={})  # Additional message data
     created_at = Column(DateTime, default=datetime.now)
     
+    __table_args__ = (
+        # Keyset pagination over a user's messages
+        Index('ix_messages_user_id_created_at', 'user_id', 'created_at'),
+        # Day range scans for statistics rollup and retention
+        Index('ix_messages_created_at', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<Message {self.id} from {self.user_id}>'
 
 
+class MessageArchive(Base):
+    """Raw messages moved out of the messages table by retention"""
+    __tablename__ = 'messages_archive'
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    message_type = Column(String(50))
+    text = Column(Text, nullable=True)
+    data = Column(JSON, default={})
+    created_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.now)
+    
+    def __repr__(self):
+        return f'<MessageArchive {self.id} from {self.user_id}>'
+
+
 class Statistic(Base):
     """Statistics model"""
     __tablename__ = 'statistics'
@@ -97,6 +120,45 @@ class Statistic(Base):
         return f'<Statistic {self.date}>'
 
 
+class AnalyticsEvent(Base):
+    """Per-minute event count flushed by the analytics pipeline"""
+    __tablename__ = 'analytics_events'
+    
+    id = Column(Integer, primary_key=True)
+    minute = Column(DateTime, nullable=False, index=True)
+    kind = Column(String(20), nullable=False)  # command, callback, message
+    name = Column(String(64), nullable=False)
+    language = Column(String(10), nullable=True)
+    count = Column(Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<AnalyticsEvent {self.minute} {self.kind}:{self.name}={self.count}>'
+
+
+class AnalyticsSketch(Base):
+    """HyperLogLog registers of unique users for one key (e.g. a day)"""
+    __tablename__ = 'analytics_sketches'
+    
+    key = Column(String(50), primary_key=True)
+    registers = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    def __repr__(self):
+        return f'<AnalyticsSketch {self.key}>'
+
+
+class Counter(Base):
+    """Incrementally maintained aggregate counter"""
+    __tablename__ = 'counters'
+    
+    name = Column(String(50), primary_key=True)
+    value = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    def __repr__(self):
+        return f'<Counter {self.name}={self.value}>'
+
+
 class Subscription(Base):
     """Subscription model for premium features"""
     __tablename__ = 'subscriptions'
@@ -132,4 +194,17 @@ class Subscription(Base):
         if self.expires_at and self.expires_at < datetime.now():
             return False
         return True
-    
\ No newline at end of file
+
+
+def create_schema(bind):
+    """
+    Create missing tables, then missing indexes
+    
+    create_all skips tables that already exist, so indexes added to
+    them later (e.g. ix_users_last_activity, ix_messages_created_at)
+    are created here on existing databases.
+    """
+    Base.metadata.create_all(bind)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
@@ -0,0 +1,181 @@
+"""
+Write-behind writer for message logging
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import insert
+
+from bot.database.models import Message
+
+logger = logging.getLogger(__name__)
+
+
+class OverflowPolicy:
+    """What to do with a message when the queue is full"""
+    BLOCK = "block"              # wait for free space
+    DROP_NEWEST = "drop_newest"  # discard the incoming message
+    DROP_OLDEST = "drop_oldest"  # discard the oldest queued message
+    SYNC = "sync"                # write the message synchronously
+
+
+class MessageWriter:
+    """Queue Message rows and insert them in batches from a background thread"""
+    
+    def __init__(
+        self,
+        session_scope,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_queue_size: int = 10000,
+        overflow_policy: str = OverflowPolicy.DROP_OLDEST,
+        on_write=None
+    ):
+        self.session_scope = session_scope
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        # Called as on_write(session, rows) inside the insert transaction
+        self.on_write = on_write
+        
+        # Updated by producer threads (drops, sync writes) and the writer thread
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._counts_lock = threading.Lock()
+        
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._atexit_registered = False
+    
+    @property
+    def pending(self) -> int:
+        """Number of queued rows not written yet"""
+        return self._queue.qsize()
+    
+    def start(self):
+        """Start background thread (idempotent)"""
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name='message-writer',
+                daemon=True
+            )
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+    
+    def _count(self, name: str, amount: int = 1):
+        with self._counts_lock:
+            setattr(self, name, getattr(self, name) + amount)
+    
+    def put(
+        self,
+        user_id: int,
+        message_type: str,
+        text: str = None,
+        data: Dict = None
+    ):
+        """Queue message row for writing"""
+        if self._thread is None:
+            self.start()
+        
+        row = {
+            'user_id': user_id,
+            'message_type': message_type,
+            'text': text,
+            'data': data or {},
+            'created_at': datetime.now()
+        }
+        
+        try:
+            self._queue.put_nowait(row)
+            return
+        except queue.Full:
+            pass
+        
+        if self.overflow_policy == OverflowPolicy.BLOCK:
+            self._queue.put(row)
+        elif self.overflow_policy == OverflowPolicy.SYNC:
+            self._write([row])
+        elif self.overflow_policy == OverflowPolicy.DROP_OLDEST:
+            try:
+                self._queue.get_nowait()
+                self._count('dropped')
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                self._count('dropped')
+        else:
+            self._count('dropped')
+    
+    def flush(self):
+        """Write everything queued so far from the calling thread"""
+        while True:
+            batch = self._take(self.batch_size, timeout=0)
+            if not batch:
+                return
+            self._write(batch)
+    
+    def stop(self, timeout: float = 10.0):
+        """Stop background thread and write all queued rows"""
+        with self._start_lock:
+            thread = self._thread
+            self._thread = None
+        
+        if thread is not None:
+            self._stop.set()
+            thread.join(timeout)
+        
+        self.flush()
+        
+        if self.dropped:
+            logger.warning(f"Message writer dropped {self.dropped} rows on overflow")
+    
+    def _take(self, limit: int, timeout: float) -> List[Dict[str, Any]]:
+        """Collect up to limit rows, waiting at most timeout seconds"""
+        batch = []
+        deadline = time.monotonic() + timeout
+        
+        while len(batch) < limit:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        return batch
+    
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._take(self.batch_size, timeout=self.flush_interval)
+            if batch:
+                self._write(batch)
+    
+    def _write(self, rows: List[Dict[str, Any]]):
+        """Insert rows with a single executemany"""
+        try:
+            with self.session_scope() as session:
+                session.execute(insert(Message), rows)
+                if self.on_write:
+                    self.on_write(session, rows)
+            self._count('written', len(rows))
+        except Exception as e:
+            self._count('failed', len(rows))
+            logger.error(f"Failed to write {len(rows)} messages: {e}", exc_info=True)
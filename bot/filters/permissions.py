@@ -3,7 +3,7 @@ Custom filters for message filtering
 """
 from telegram.ext import MessageFilter
 from bot.config import settings
-from bot.database import db
+from bot.utils.context import get_message_user
 
 
 class AdminFilter(MessageFilter):
@@ -26,8 +26,7 @@ class PremiumFilter(MessageFilter):
     """Filter for premium users only"""
     
     def filter(self, message):
-        user_id = message.from_user.id
-        user = db.get_user(user_id)
+        user = get_message_user(message)
         return user and user.is_premium
 
 
@@ -35,8 +34,7 @@ class NotBlockedFilter(MessageFilter):
     """Filter for non-blocked users"""
     
     def filter(self, message):
-        user_id = message.from_user.id
-        user = db.get_user(user_id)
+        user = get_message_user(message)
         return not (user and user.is_blocked)
 
 
@@ -61,8 +59,7 @@ class LanguageFilter(MessageFilter):
         self.language = language
     
     def filter(self, message):
-        user_id = message.from_user.id
-        user = db.get_user(user_id)
+        user = get_message_user(message)
         return user and user.language == self.language
 
 
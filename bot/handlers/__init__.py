@@ -15,9 +15,11 @@ from bot.handlers.admin import (
     admin_command,
     admin_stats_command,
     users_list_command,
+    user_messages_command,
     user_info_command,
     block_user_command,
     unblock_user_command,
+    profiler_command,
     broadcast_start,
     broadcast_message_handler,
     broadcast_confirm_handler,
@@ -41,9 +43,11 @@ __all__ = [
     'admin_command',
     'admin_stats_command',
     'users_list_command',
+    'user_messages_command',
     'user_info_command',
     'block_user_command',
     'unblock_user_command',
+    'profiler_command',
     'broadcast_start',
     'broadcast_message_handler',
     'broadcast_confirm_handler',
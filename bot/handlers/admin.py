@@ -5,25 +5,28 @@ import logging
 from telegram import Update
 from telegram.ext import CallbackContext, ConversationHandler
 
-from bot.utils import admin_only, super_admin_only, format_statistics, format_user_info
-from bot.keyboards import admin_menu_keyboard, confirm_keyboard
+from bot.utils import (
+    admin_only,
+    super_admin_only,
+    format_statistics,
+    format_user_info,
+    get_user_language,
+    split_message
+)
+from bot.utils.profiling import SORT_KEYS, profiler
+from bot.keyboards import admin_menu_keyboard, confirm_keyboard, pagination_keyboard
 from bot.locales import i18n
 from bot.database import db
-from bot.config import ConversationState, settings
+from bot.services import analytics_service
+from bot.config import settings, ConversationState
 
 logger = logging.getLogger(__name__)
 
 
-def get_user_language(update: Update) -> str:
-    """Get user's language"""
-    user = db.get_user(update.effective_user.id)
-    return user.language if user else settings.default_language
-
-
 @admin_only
 def admin_command(update: Update, context: CallbackContext):
     """Handle /admin command"""
-    language = get_user_language(update)
+    language = get_user_language(update, context)
     message = i18n.get('commands.admin.message', language)
     
     update.message.reply_text(
@@ -35,29 +38,42 @@ def admin_command(update: Update, context: CallbackContext):
 @admin_only
 def admin_stats_command(update: Update, context: CallbackContext):
     """Handle /adminstats command"""
-    language = get_user_language(update)
+    language = get_user_language(update, context)
     stats = db.get_statistics()
     text = format_statistics(stats, language)
     
+    if settings.enable_analytics:
+        # Sketch estimates instead of COUNT(DISTINCT) over messages
+        text += "\n" + i18n.get('admin.stats_active_users', language, **analytics_service.active_users())
+    
     update.message.reply_text(text)
 
 
-@admin_only
-def users_list_command(update: Update, context: CallbackContext):
-    """Handle /users command - list all users"""
+def build_users_page(
+    page: int = 0,
+    cursor: int = None,
+    backward: bool = False,
+    language: str = None
+):
+    """Build users list page text and its navigation keyboard"""
     from bot.utils import calculate_pagination
     
-    language = get_user_language(update)
-    users = db.get_all_users()
+    # Exact count: the statistics snapshot can lag behind signups and purges
+    total = db.count_users()
+    pagination = calculate_pagination(total, current_page=page)
+    page = pagination['current_page']
     
-    page = int(context.args[0]) if context.args else 0
-    pagination = calculate_pagination(len(users), current_page=page)
+    users = db.get_users_page(
+        cursor=cursor,
+        backward=backward,
+        offset=pagination['start_index']
+    )
     
     text = f"👥 {i18n.get('admin.users', language)}\n\n"
-    text += f"Total: {len(users)}\n"
-    text += f"Page: {pagination['current_page'] + 1}/{pagination['total_pages']}\n\n"
+    text += f"Total: {total}\n"
+    text += f"Page: {page + 1}/{pagination['total_pages']}\n\n"
     
-    for i, user in enumerate(users[pagination['start_index']:pagination['end_index']], 1):
+    for i, user in enumerate(users, 1):
         status = "✅" if not user.is_blocked else "⛔️"
         admin_badge = "👨‍💼" if user.is_admin else ""
         premium_badge = "⭐️" if user.is_premium else ""
@@ -65,7 +81,89 @@ def users_list_command(update: Update, context: CallbackContext):
         text += f"{i}. {status} {admin_badge}{premium_badge} {user.first_name} "
         text += f"(@{user.username or 'N/A'}) - {user.user_id}\n"
     
-    update.message.reply_text(text)
+    keyboard = None
+    if users:
+        keyboard = pagination_keyboard(
+            page,
+            pagination['total_pages'],
+            prefix='users',
+            language=language,
+            prev_cursor=users[0].id,
+            next_cursor=users[-1].id
+        )
+    
+    return text, keyboard
+
+
+def build_messages_page(
+    user_id: int,
+    page: int = 0,
+    cursor: int = None,
+    backward: bool = False,
+    language: str = None
+):
+    """Build user messages page text and its navigation keyboard"""
+    from bot.utils import calculate_pagination, format_datetime, truncate_text
+    
+    total = db.get_messages_count(user_id)
+    pagination = calculate_pagination(total, current_page=page)
+    page = pagination['current_page']
+    
+    messages = db.get_user_messages_page(user_id, cursor=cursor, backward=backward)
+    
+    text = f"💬 {user_id}\n\n"
+    text += f"Total: {total}\n"
+    text += f"Page: {page + 1}/{pagination['total_pages']}\n\n"
+    
+    for i, msg in enumerate(messages, 1):
+        text += f"{i}. [{format_datetime(msg.created_at)}] "
+        text += f"{truncate_text(msg.text or msg.message_type or '', 60)}\n"
+    
+    keyboard = None
+    if messages:
+        keyboard = pagination_keyboard(
+            page,
+            pagination['total_pages'],
+            prefix=f'messages.{user_id}',
+            language=language,
+            prev_cursor=messages[0].id,
+            next_cursor=messages[-1].id
+        )
+    
+    return text, keyboard
+
+
+@admin_only
+def users_list_command(update: Update, context: CallbackContext):
+    """Handle /users [page] command - list users page by page"""
+    language = get_user_language(update, context)
+    page = int(context.args[0]) if context.args else 0
+    
+    text, keyboard = build_users_page(page, language=language)
+    
+    update.message.reply_text(text, reply_markup=keyboard)
+
+
+@admin_only
+def user_messages_command(update: Update, context: CallbackContext):
+    """Handle /messages <user_id> command - list user's messages"""
+    from bot.utils import is_valid_user_id
+    
+    language = get_user_language(update, context)
+    
+    if not context.args:
+        update.message.reply_text("Usage: /messages <user_id>")
+        return
+    
+    if not is_valid_user_id(context.args[0]):
+        update.message.reply_text(
+            i18n.get('errors.invalid_input', language)
+        )
+        return
+    
+    text, keyboard = build_messages_page(int(context.args[0]), language=language)
+    
+    update.message.reply_text(text, reply_markup=keyboard)
 
 
 @admin_only
@@ -73,7 +171,7 @@ def user_info_command(update: Update, context: CallbackContext):
     """Handle /userinfo <user_id> command"""
     from bot.utils import is_valid_user_id
     
-    language = get_user_language(update)
+    language = get_user_language(update, context)
     
     if not context.args:
         update.message.reply_text(
@@ -112,7 +210,7 @@ def block_user_command(update: Update, context: CallbackContext):
     """Handle /block <user_id> command"""
     from bot.utils import is_valid_user_id
     
-    language = get_user_language(update)
+    language = get_user_language(update, context)
     
     if not context.args:
         update.message.reply_text("Usage: /block <user_id>")
@@ -140,7 +238,7 @@ def unblock_user_command(update: Update, context: CallbackContext):
     """Handle /unblock <user_id> command"""
     from bot.utils import is_valid_user_id
     
-    language = get_user_language(update)
+    language = get_user_language(update, context)
     
     if not context.args:
         update.message.reply_text("Usage: /unblock <user_id>")
@@ -163,6 +261,71 @@ def unblock_user_command(update: Update, context: CallbackContext):
     logger.info(f"Admin {update.effective_user.id} unblocked user {user_id}")
 
 
+PROFILER_USAGE = (
+    "Usage:\n"
+    "/profiler - status and sampled names\n"
+    "/profiler on [rate] | off | reset\n"
+    "/profiler top [name] [sort]\n"
+    "/profiler dump [name]"
+)
+
+
+@super_admin_only
+def profiler_command(update: Update, context: CallbackContext):
+    """Handle /profiler command - control sampling and dump aggregated stats"""
+    args = context.args or []
+    action = args[0].lower() if args else 'status'
+    
+    if action == 'on':
+        try:
+            rate = float(args[1]) if len(args) > 1 else None
+        except ValueError:
+            update.message.reply_text(PROFILER_USAGE)
+            return
+        profiler.enable(rate)
+        update.message.reply_text(f"✅ Profiling on, sample rate {profiler.sample_rate}")
+    
+    elif action == 'off':
+        profiler.disable()
+        update.message.reply_text("✅ Profiling off")
+    
+    elif action == 'reset':
+        profiler.reset()
+        update.message.reply_text("✅ Profile stats cleared")
+    
+    elif action == 'top':
+        names = [arg for arg in args[1:] if arg not in SORT_KEYS]
+        sorts = [arg for arg in args[1:] if arg in SORT_KEYS]
+        report = profiler.report(
+            names[0] if names else None,
+            sort=sorts[0] if sorts else 'cumulative'
+        )
+        if not report:
+            update.message.reply_text("No samples yet")
+            return
+        for chunk in split_message(report):
+            update.message.reply_text(chunk)
+    
+    elif action == 'dump':
+        name = args[1] if len(args) > 1 else None
+        path = profiler.dump(name=name)
+        if path is None:
+            update.message.reply_text("No samples yet")
+            return
+        with open(path, 'rb') as f:
+            update.message.reply_document(f, caption=path)
+    
+    elif action == 'status':
+        state = 'on' if profiler.enabled else 'off'
+        lines = [f"🔬 Profiling {state}, sample rate {profiler.sample_rate}"]
+        for name, summary in profiler.summary().items():
+            lines.append(f"{name}: {summary['samples']} samples, avg {summary['avg_ms']} ms")
+        update.message.reply_text("\n".join(lines))
+    
+    else:
+        update.message.reply_text(PROFILER_USAGE)
+
+
 # ==================== BROADCAST CONVERSATION ====================
 
 @admin_only
@@ -170,7 +333,7 @@ def broadcast_start(update: Update, context: CallbackContext):
     """Start broadcast conversation"""
     from bot.keyboards import cancel_keyboard
     
-    language = get_user_language(update)
+    language = get_user_language(update, context)
     
     update.message.reply_text(
         i18n.get('admin.broadcast_start', language),
@@ -182,7 +345,7 @@ def broadcast_start(update: Update, context: CallbackContext):
 
 def broadcast_message_handler(update: Update, context: CallbackContext):
     """Handle broadcast message"""
-    language = get_user_language(update)
+    language = get_user_language(update, context)
     message_text = update.message.text
     
     if message_text == i18n.get_button('cancel', language):
@@ -194,12 +357,18 @@ def broadcast_message_handler(update: Update, context: CallbackContext):
     # Store message in context
     context.user_data['broadcast_message'] = message_text
     
-    # Get user count
-    users = db.get_all_users(is_blocked=False)
-    user_count = len(users)
+    # Get audience size without loading users
+    preview = db.get_audience_preview(is_blocked=False)
+    user_count = sum(entry['total'] for entry in preview.values())
+    
+    text = i18n.get('admin.broadcast_confirm', language, count=user_count)
+    text += "\n\n" + "\n".join(
+        f"{code.upper()}: {entry['total']} (⭐️ {entry['premium']})"
+        for code, entry in sorted(preview.items())
+    )
     
     update.message.reply_text(
-        i18n.get('admin.broadcast_confirm', language, count=user_count),
+        text,
         reply_markup=confirm_keyboard('broadcast', language)
     )
     
@@ -211,7 +380,7 @@ def broadcast_confirm_handler(update: Update, context: CallbackContext):
     query = update.callback_query
     query.answer()
     
-    language = get_user_language(update)
+    language = get_user_language(update, context)
     
     if query.data.startswith('cancel:'):
         query.edit_message_text(
@@ -228,30 +397,37 @@ def broadcast_confirm_handler(update: Update, context: CallbackContext):
         )
         return ConversationHandler.END
     
-    # Send to all users
-    users = db.get_all_users(is_blocked=False)
-    
-    success_count = 0
-    failed_count = 0
-    
-    for user in users:
-        try:
-            context.bot.send_message(chat_id=user.user_id, text=message_text)
-            success_count += 1
-        except Exception as e:
-            logger.error(f"Failed to send broadcast to {user.user_id}: {e}")
-            failed_count += 1
-    
-    result_text = i18n.get('admin.broadcast_success', language,
-        success=success_count,
-        failed=failed_count
-    )
-    
-    query.edit_message_text(result_text)
-    
-    logger.info(
-        f"Admin {update.effective_user.id} sent broadcast: "
-        f"{success_count} success, {failed_count} failed"
+    # Send to all users in the background
+    from bot.services import broadcast_engine
+    
+    total = db.count_users(is_blocked=False)
+    chat_id = query.message.chat_id
+    message_id = query.message.message_id
+    admin_id = update.effective_user.id
+    
+    def edit_status(text: str):
+        context.bot.edit_message_text(text, chat_id=chat_id, message_id=message_id)
+    
+    def on_progress(broadcast):
+        edit_status(i18n.get('admin.broadcast_progress', language, **broadcast.to_dict()))
+    
+    def on_done(broadcast):
+        edit_status(i18n.get('admin.broadcast_success', language, **broadcast.to_dict()))
+        logger.info(f"Admin {admin_id} sent broadcast: {broadcast.to_dict()}")
+    
+    edit_status(i18n.get(
+        'admin.broadcast_progress',
+        language,
+        sent=0, total=total, success=0, blocked=0, failed=0
+    ))
+    
+    broadcast_engine.start(
+        context.bot,
+        message_text,
+        db.iter_user_ids(is_blocked=False),
+        total=total,
+        on_progress=on_progress,
+        on_done=on_done
     )
     
     return ConversationHandler.END
@@ -259,7 +435,7 @@ def broadcast_confirm_handler(update: Update, context: CallbackContext):
 
 def broadcast_cancel(update: Update, context: CallbackContext):
     """Cancel broadcast"""
-    language = get_user_language(update)
+    language = get_user_language(update, context)
     
     update.message.reply_text(
         i18n.get('admin.broadcast_cancelled', language)
@@ -5,7 +5,7 @@ import logging
 from telegram import Update
 from telegram.ext import CallbackContext
 
-from bot.utils import protected_handler, format_statistics
+from bot.utils import protected_handler, format_statistics, get_user_language
 from bot.keyboards import main_menu_keyboard, main_menu_reply_keyboard
 from bot.locales import i18n
 from bot.database import db
@@ -14,17 +14,11 @@ from bot.config import settings
 logger = logging.getLogger(__name__)
 
 
-def get_user_language(update: Update) -> str:
-    """Get user's preferred language"""
-    user = db.get_user(update.effective_user.id)
-    return user.language if user else settings.default_language
-
-
 @protected_handler
 def start_command(update: Update, context: CallbackContext):
     """Handle /start command"""
     user = update.effective_user
-    language = get_user_language(update)
+    language = get_user_language(update, context)
     is_admin = settings.is_admin(user.id)
     
     message = i18n.get('commands.start.message', language, name=user.first_name)
@@ -38,7 +32,7 @@ def start_command(update: Update, context: CallbackContext):
 @protected_handler
 def help_command(update: Update, context: CallbackContext):
     """Handle /help command"""
-    language = get_user_language(update)
+    language = get_user_language(update, context)
     message = i18n.get('commands.help.message', language)
     
     update.message.reply_text(message)
@@ -47,7 +41,7 @@ def help_command(update: Update, context: CallbackContext):
 @protected_handler
 def menu_command(update: Update, context: CallbackContext):
     """Handle /menu command"""
-    language = get_user_language(update)
+    language = get_user_language(update, context)
     message = i18n.get('commands.menu.message', language)
     
     update.message.reply_text(
@@ -59,12 +53,11 @@ def menu_command(update: Update, context: CallbackContext):
 @protected_handler
 def profile_command(update: Update, context: CallbackContext):
     """Handle /profile command"""
-    from bot.utils import format_user_info
+    from bot.utils import format_user_info, get_current_user
     
-    user_id = update.effective_user.id
-    language = get_user_language(update)
+    language = get_user_language(update, context)
     
-    user = db.get_user(user_id)
+    user = get_current_user(update, context)
     
     if not user:
         update.message.reply_text(i18n.get_error('not_found', language))
@@ -79,7 +72,7 @@ def settings_command(update: Update, context: CallbackContext):
     """Handle /settings command"""
     from bot.keyboards import settings_keyboard
     
-    language = get_user_language(update)
+    language = get_user_language(update, context)
     message = i18n.get('commands.settings.message', language)
     
     update.message.reply_text(
@@ -91,7 +84,7 @@ def settings_command(update: Update, context: CallbackContext):
 @protected_handler
 def stats_command(update: Update, context: CallbackContext):
     """Handle /stats command"""
-    language = get_user_language(update)
+    language = get_user_language(update, context)
     stats = db.get_statistics()
     text = format_statistics(stats, language)
     
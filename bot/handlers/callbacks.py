@@ -5,7 +5,7 @@ import logging
 from telegram import Update
 from telegram.ext import CallbackContext
 
-from bot.utils import parse_callback_data, format_statistics
+from bot.utils import parse_callback_data, format_statistics, get_user_language
 from bot.keyboards import (
     main_menu_keyboard,
     settings_keyboard,
@@ -19,13 +19,6 @@ from bot.config import CallbackPrefix, settings
 logger = logging.getLogger(__name__)
 
 
-def get_user_language(update: Update) -> str:
-    """Get user's language"""
-    user_id = update.callback_query.from_user.id
-    user = db.get_user(user_id)
-    return user.language if user else settings.default_language
-
-
 def main_callback_handler(update: Update, context: CallbackContext):
     """Handle all callback queries"""
     query = update.callback_query
@@ -37,7 +30,7 @@ def main_callback_handler(update: Update, context: CallbackContext):
     action = data['action']
     param = data['param']
     
-    language = get_user_language(update)
+    language = get_user_language(update, context)
     
     # Route to specific handler based on prefix
     if prefix == CallbackPrefix.MENU:
@@ -151,7 +144,7 @@ def handle_language_callback(query, action: str, current_language: str):
     # Show success message
     language_name = i18n.get_language_name(new_language)
     success_msg = i18n.get('settings.language_changed', new_language, 
-        language=language_name
+        language_name=language_name
     )
     
     query.answer(success_msg, show_alert=True)
@@ -186,8 +179,7 @@ def handle_admin_callback(query, action: str, language: str):
         )
     
     elif action == 'users':
-        users = db.get_all_users()
-        text = f"👥 Total Users: {len(users)}\n\n"
+        text = f"👥 Total Users: {db.count_users()}\n\n"
         text += "Use /users command for detailed list"
         
         query.edit_message_text(
@@ -204,16 +196,38 @@ def handle_admin_callback(query, action: str, language: str):
         )
 
 
-def handle_pagination_callback(query, prefix: str, page: str, language: str):
-    """Handle pagination callbacks"""
+def handle_pagination_callback(query, prefix: str, param: str, language: str):
+    """
+    Handle pagination callbacks
+    
+    param is '<page>' or '<page>:<p|n><cursor>' as built by pagination_keyboard.
+    """
+    from bot.handlers.admin import build_users_page, build_messages_page
+    
+    page, _, cursor = param.partition(':')
     try:
         page_num = int(page)
+        cursor_id = int(cursor[1:]) if cursor else None
+        messages_user_id = int(prefix[len('messages.'):]) if prefix.startswith('messages.') else None
     except ValueError:
         query.answer("Invalid page")
         return
+    backward = cursor.startswith('p')
     
-    # Here you would load the appropriate data based on prefix
-    # Example: if prefix == 'users', load users for that page
+    if prefix == 'users' or prefix.startswith('messages.'):
+        if not settings.is_admin(query.from_user.id):
+            query.answer(
+                i18n.get_error('permission_denied', language),
+                show_alert=True
+            )
+            return
+    
+    if prefix == 'users':
+        text, keyboard = build_users_page(page_num, cursor_id, backward, language)
+    elif prefix.startswith('messages.'):
+        text, keyboard = build_messages_page(messages_user_id, page_num, cursor_id, backward, language)
+    else:
+        query.answer(f"Page {page_num + 1}")
+        return
     
-    query.answer(f"Page {page_num + 1}")
-    
\ No newline at end of file
+    query.edit_message_text(text, reply_markup=keyboard)
@@ -19,6 +19,8 @@ from bot.keyboards.reply import (
     remove_keyboard
 )
 
+from bot.keyboards.cache import clear_keyboard_cache
+
 __all__ = [
     'main_menu_keyboard',
     'settings_keyboard',
@@ -31,5 +33,6 @@ __all__ = [
     'skip_keyboard',
     'contact_keyboard',
     'location_keyboard',
-    'remove_keyboard'
+    'remove_keyboard',
+    'clear_keyboard_cache'
 ]
@@ -0,0 +1,62 @@
+"""
+Memoization helpers for keyboards
+"""
+from functools import lru_cache
+from typing import Callable, List
+
+from telegram import InlineKeyboardMarkup, ReplyKeyboardMarkup
+
+_cached_builders: List[Callable] = []
+
+
+class _FrozenMarkupMixin:
+    """Serialize markup once and reuse the payload on every send"""
+    __slots__ = ()
+    
+    def to_dict(self):
+        if self._frozen_dict is None:
+            self._frozen_dict = super().to_dict()
+        return self._frozen_dict
+    
+    def to_json(self) -> str:
+        if self._frozen_json is None:
+            self._frozen_json = super().to_json()
+        return self._frozen_json
+
+
+class FrozenInlineKeyboardMarkup(_FrozenMarkupMixin, InlineKeyboardMarkup):
+    """Inline keyboard shared between updates (must not be modified)"""
+    __slots__ = ('_frozen_dict', '_frozen_json')
+    
+    def __init__(self, *args, **kwargs):
+        self._frozen_dict = None
+        self._frozen_json = None
+        super().__init__(*args, **kwargs)
+
+
+class FrozenReplyKeyboardMarkup(_FrozenMarkupMixin, ReplyKeyboardMarkup):
+    """Reply keyboard shared between updates (must not be modified)"""
+    __slots__ = ('_frozen_dict', '_frozen_json')
+    
+    def __init__(self, *args, **kwargs):
+        self._frozen_dict = None
+        self._frozen_json = None
+        super().__init__(*args, **kwargs)
+
+
+def cached_keyboard(func: Callable) -> Callable:
+    """
+    Memoize keyboard builder on its arguments (language and flags)
+    
+    Builders must return Frozen* markups so the serialized payload is
+    cached along with the object.
+    """
+    cached = lru_cache(maxsize=256)(func)
+    _cached_builders.append(cached)
+    return cached
+
+
+def clear_keyboard_cache():
+    """Drop all memoized keyboards (e.g. after reloading translations)"""
+    for builder in _cached_builders:
+        builder.cache_clear()
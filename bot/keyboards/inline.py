@@ -4,8 +4,10 @@ Inline keyboards with internationalization support
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from bot.locales import i18n
 from bot.config import CallbackPrefix, settings
+from bot.keyboards.cache import cached_keyboard, FrozenInlineKeyboardMarkup
 
 
+@cached_keyboard
 def main_menu_keyboard(language: str = None) -> InlineKeyboardMarkup:
     """Main menu inline keyboard"""
     keyboard = [
@@ -22,9 +24,10 @@ def main_menu_keyboard(language: str = None) -> InlineKeyboardMarkup:
             callback_data=f'{CallbackPrefix.MENU}:help'
         )],
     ]
-    return InlineKeyboardMarkup(keyboard)
+    return FrozenInlineKeyboardMarkup(keyboard)
 
 
+@cached_keyboard
 def settings_keyboard(language: str = None) -> InlineKeyboardMarkup:
     """Settings keyboard"""
     keyboard = [
@@ -41,9 +44,10 @@ def settings_keyboard(language: str = None) -> InlineKeyboardMarkup:
             callback_data=f'{CallbackPrefix.MENU}:main'
         )],
     ]
-    return InlineKeyboardMarkup(keyboard)
+    return FrozenInlineKeyboardMarkup(keyboard)
 
 
+@cached_keyboard
 def language_keyboard(current_language: str = None) -> InlineKeyboardMarkup:
     """Language selection keyboard"""
     keyboard = []
@@ -63,9 +67,10 @@ def language_keyboard(current_language: str = None) -> InlineKeyboardMarkup:
         callback_data=f'{CallbackPrefix.SETTINGS}:main'
     )])
     
-    return InlineKeyboardMarkup(keyboard)
+    return FrozenInlineKeyboardMarkup(keyboard)
 
 
+@cached_keyboard
 def admin_menu_keyboard(language: str = None) -> InlineKeyboardMarkup:
     """Admin panel keyboard"""
     keyboard = [
@@ -86,9 +91,10 @@ def admin_menu_keyboard(language: str = None) -> InlineKeyboardMarkup:
             callback_data=f'{CallbackPrefix.MENU}:main'
         )],
     ]
-    return InlineKeyboardMarkup(keyboard)
+    return FrozenInlineKeyboardMarkup(keyboard)
 
 
+@cached_keyboard
 def confirm_keyboard(action: str, language: str = None) -> InlineKeyboardMarkup:
     """Confirmation keyboard"""
     keyboard = [
@@ -103,25 +109,32 @@ def confirm_keyboard(action: str, language: str = None) -> InlineKeyboardMarkup:
             )
         ]
     ]
-    return InlineKeyboardMarkup(keyboard)
+    return FrozenInlineKeyboardMarkup(keyboard)
 
 
 def pagination_keyboard(
     page: int,
     total_pages: int,
     prefix: str = 'page',
-    language: str = None
+    language: str = None,
+    prev_cursor: int = None,
+    next_cursor: int = None
 ) -> InlineKeyboardMarkup:
-    """Pagination keyboard"""
+    """
+    Pagination keyboard
+    
+    When cursors are given they are appended to the callback data as
+    'p<id>' / 'n<id>' so the handler can seek instead of using offsets.
+    """
     keyboard = []
     
     buttons = []
     
     if page > 0:
-        buttons.append(InlineKeyboardButton(
-            "◀️",
-            callback_data=f'{CallbackPrefix.PAGE}:{prefix}:{page-1}'
-        ))
+        data = f'{CallbackPrefix.PAGE}:{prefix}:{page-1}'
+        if prev_cursor is not None:
+            data += f':p{prev_cursor}'
+        buttons.append(InlineKeyboardButton("◀️", callback_data=data))
     
     buttons.append(InlineKeyboardButton(
         f"{page+1}/{total_pages}",
@@ -129,10 +142,10 @@ def pagination_keyboard(
     ))
     
     if page < total_pages - 1:
-        buttons.append(InlineKeyboardButton(
-            "▶️",
-            callback_data=f'{CallbackPrefix.PAGE}:{prefix}:{page+1}'
-        ))
+        data = f'{CallbackPrefix.PAGE}:{prefix}:{page+1}'
+        if next_cursor is not None:
+            data += f':n{next_cursor}'
+        buttons.append(InlineKeyboardButton("▶️", callback_data=data))
     
     keyboard.append(buttons)
     keyboard.append([InlineKeyboardButton(
@@ -3,8 +3,10 @@ Reply keyboards with internationalization support
 """
 from telegram import ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
 from bot.locales import i18n
+from bot.keyboards.cache import cached_keyboard, FrozenReplyKeyboardMarkup
 
 
+@cached_keyboard
 def main_menu_reply_keyboard(is_admin: bool = False, language: str = None) -> ReplyKeyboardMarkup:
     """Main menu reply keyboard"""
     keyboard = [
@@ -21,13 +23,14 @@ def main_menu_reply_keyboard(is_admin: bool = False, language: str = None) -> Re
     if is_admin:
         keyboard.append([i18n.get_menu('admin', language)])
     
-    return ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
+    return FrozenReplyKeyboardMarkup(keyboard, resize_keyboard=True)
 
 
+@cached_keyboard
 def cancel_keyboard(language: str = None) -> ReplyKeyboardMarkup:
     """Cancel keyboard"""
     keyboard = [[i18n.get_button('cancel', language)]]
-    return ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
+    return FrozenReplyKeyboardMarkup(keyboard, resize_keyboard=True)
 
 
 def skip_keyboard(language: str = None) -> ReplyKeyboardMarkup:
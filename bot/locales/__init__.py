@@ -2,12 +2,14 @@
 Localization manager for multi-language support
 """
 import json
-import os
-from typing import Dict, Any, Optional
+import logging
+from typing import Dict, Any, List, Set, Tuple
 from pathlib import Path
 
 from bot.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 class LocalizationManager:
     """Manage translations for multiple languages"""
@@ -15,7 +17,12 @@ class LocalizationManager:
     def __init__(self):
         self.translations: Dict[str, Dict] = {}
         self.locales_dir = Path(__file__).parent
+        # (language, dotted key) -> (template, needs_format), fallbacks resolved
+        self.catalog: Dict[Tuple[str, str], Tuple[Any, bool]] = {}
+        self.missing_keys: Dict[str, List[str]] = {}
+        self._reported: Set[str] = set()
         self._load_translations()
+        self._compile()
     
     def _load_translations(self):
         """Load all translation files"""
@@ -27,6 +34,39 @@ class LocalizationManager:
                 with open(messages_file, 'r', encoding='utf-8') as f:
                     self.translations[lang_code] = json.load(f)
     
+    @staticmethod
+    def _flatten(tree: Dict, prefix: str = '') -> Dict[str, Any]:
+        """Flatten nested translations into dotted keys (nested dicts kept too)"""
+        flat = {}
+        for name, value in tree.items():
+            key = f'{prefix}{name}'
+            flat[key] = value
+            if isinstance(value, dict):
+                flat.update(LocalizationManager._flatten(value, f'{key}.'))
+        return flat
+    
+    def _compile(self):
+        """Build flat (language, key) catalog with default language fallbacks"""
+        flat = {
+            code: self._flatten(tree)
+            for code, tree in self.translations.items()
+        }
+        default = flat.get(settings.default_language, {})
+        
+        for code, keys in flat.items():
+            missing = sorted(key for key in default if key not in keys)
+            if missing and code != settings.default_language:
+                self.missing_keys[code] = missing
+                logger.warning(
+                    f"Locale '{code}' is missing {len(missing)} keys "
+                    f"(falling back to '{settings.default_language}'): {', '.join(missing)}"
+                )
+            
+            for key, value in {**default, **keys}.items():
+                # Only strings with braces need str.format (placeholders or escapes)
+                needs_format = isinstance(value, str) and ('{' in value or '}' in value)
+                self.catalog[(code, key)] = (value, needs_format)
+    
     def get(self, key: str, language: str = None, **kwargs) -> str:
         """
         Get translated message
@@ -39,32 +79,23 @@ class LocalizationManager:
         Returns:
             Translated message
         """
-        if language is None:
-            language = settings.default_language
-        
-        # Get translation for language
-        translations = self.translations.get(language, {})
-        
-        # Navigate through nested keys
-        keys = key.split('.')
-        value = translations
+        entry = self.catalog.get((language or settings.default_language, key))
         
-        for k in keys:
-            if isinstance(value, dict):
-                value = value.get(k)
-            else:
-                break
-        
-        # If not found, try default language
-        if value is None and language != settings.default_language:
-            return self.get(key, settings.default_language, **kwargs)
+        # Unknown language: use default language
+        if entry is None:
+            entry = self.catalog.get((settings.default_language, key))
         
         # If still not found, return key
-        if value is None:
+        if entry is None:
+            if key not in self._reported:
+                self._reported.add(key)
+                logger.warning(f"Missing translation key: {key}")
             return key
         
+        value, needs_format = entry
+        
         # Format with parameters
-        if kwargs and isinstance(value, str):
+        if kwargs and needs_format:
             try:
                 return value.format(**kwargs)
             except KeyError:
@@ -3,7 +3,6 @@ Main bot application
 """
 import logging
 from telegram.ext import (
-    Updater,
     CommandHandler,
     MessageHandler,
     CallbackQueryHandler,
@@ -12,7 +11,13 @@ from telegram.ext import (
 )
 
 from bot.config import settings, ConversationState
+from bot.database import db
 from bot.utils import setup_logging
+from bot.utils.dispatcher import create_updater
+from bot.utils.webhook import create_webhook_server, start_webhook
+from bot.utils.metrics import setup_metrics
+from bot.middlewares import setup_throttling, setup_analytics
+from bot.services import retention_service, statistics_service, analytics_service
 from bot.handlers import (
     # Basic
     start_command,
@@ -25,9 +30,11 @@ from bot.handlers import (
     admin_command,
     admin_stats_command,
     users_list_command,
+    user_messages_command,
     user_info_command,
     block_user_command,
     unblock_user_command,
+    profiler_command,
     broadcast_start,
     broadcast_message_handler,
     broadcast_confirm_handler,
@@ -52,6 +59,27 @@ def error_handler(update, context):
         logger.error(f"Error in error_handler: {e}")
 
 
+def reconcile_counters_job(context):
+    """Recompute statistics counters from the tables"""
+    stats = db.reconcile_counters()
+    logger.info(f"Statistics counters reconciled: {stats}")
+
+
+def statistics_job(context):
+    """Finalize completed days and refresh today's statistics row"""
+    statistics_service.run()
+
+
+def analytics_flush_job(context):
+    """Write in-memory analytics aggregates to database"""
+    analytics_service.flush()
+
+
+def retention_job(context):
+    """Roll up and remove messages and analytics events older than their retention windows"""
+    retention_service.run()
+
+
 def main():
     """Start the bot"""
     # Setup logging
@@ -68,9 +96,17 @@ def main():
     logger.info("=" * 50)
     
     # Create updater
-    updater = Updater(settings.bot_token, use_context=True)
+    updater = create_updater()
     dp = updater.dispatcher
     
+    # ==================== Middlewares ====================
+    if settings.rate_limit_enabled:
+        logger.info("Registering throttling middleware...")
+        setup_throttling(dp)
+    if settings.enable_analytics:
+        logger.info("Registering analytics middleware...")
+        setup_analytics(dp)
+    
     # ==================== Basic Commands ====================
     logger.info("Registering basic handlers...")
     dp.add_handler(CommandHandler('start', start_command))
@@ -85,9 +121,11 @@ def main():
     dp.add_handler(CommandHandler('admin', admin_command))
     dp.add_handler(CommandHandler('adminstats', admin_stats_command))
     dp.add_handler(CommandHandler('users', users_list_command))
+    dp.add_handler(CommandHandler('messages', user_messages_command))
     dp.add_handler(CommandHandler('userinfo', user_info_command))
     dp.add_handler(CommandHandler('block', block_user_command))
     dp.add_handler(CommandHandler('unblock', unblock_user_command))
+    dp.add_handler(CommandHandler('profiler', profiler_command))
     
     # ==================== Broadcast Conversation ====================
     logger.info("Registering broadcast conversation...")
@@ -112,14 +150,42 @@ def main():
     # ==================== Error Handler ====================
     dp.add_error_handler(error_handler)
     
+    # ==================== Metrics ====================
+    if settings.metrics_enabled:
+        logger.info("Starting metrics exporter...")
+        setup_metrics(updater)
+    
+    # ==================== Jobs ====================
+    updater.job_queue.run_repeating(
+        reconcile_counters_job,
+        interval=settings.counters_reconcile_interval,
+        first=settings.counters_reconcile_interval
+    )
+    updater.job_queue.run_repeating(
+        statistics_job,
+        interval=settings.statistics_rollup_interval,
+        first=30
+    )
+    if settings.enable_analytics:
+        updater.job_queue.run_repeating(
+            analytics_flush_job,
+            interval=settings.analytics_flush_interval,
+            first=settings.analytics_flush_interval
+        )
+    if settings.message_retention_days > 0 or settings.analytics_retention_days > 0:
+        updater.job_queue.run_repeating(
+            retention_job,
+            interval=settings.retention_interval,
+            first=60
+        )
+    
     # ==================== Start Bot ====================
     if settings.enable_webhooks and settings.webhook_url:
         logger.info(f"Starting in WEBHOOK mode: {settings.webhook_url}")
-        updater.start_webhook(
-            listen="0.0.0.0",
-            port=8443,
-            url_path=settings.bot_token,
-            webhook_url=f"{settings.webhook_url}/{settings.bot_token}"
+        start_webhook(
+            updater,
+            create_webhook_server(updater),
+            webhook_url=f"{settings.webhook_url.rstrip('/')}{settings.webhook_path}"
         )
     else:
         logger.info("Starting in POLLING mode")
@@ -132,6 +198,10 @@ def main():
     
     updater.idle()
     
+    # Write buffered messages and analytics before exiting
+    analytics_service.flush()
+    db.close()
+    
     logger.info("Bot stopped")
 
 
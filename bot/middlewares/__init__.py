@@ -0,0 +1,12 @@
+"""
+Middlewares package
+"""
+from bot.middlewares.throttling import ThrottlingMiddleware, setup_throttling
+from bot.middlewares.analytics import AnalyticsMiddleware, setup_analytics
+
+__all__ = [
+    'ThrottlingMiddleware',
+    'setup_throttling',
+    'AnalyticsMiddleware',
+    'setup_analytics'
+]
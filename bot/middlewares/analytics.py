@@ -0,0 +1,66 @@
+"""
+Analytics event recording after handlers ran
+"""
+from telegram import Update
+from telegram.ext import TypeHandler
+
+from bot.services.analytics_service import EventKind, analytics_service
+from bot.utils.context import CONTEXT_USER_ATTR
+
+# Runs after regular handlers, so the user snapshot they loaded is reused
+ANALYTICS_GROUP = 100
+
+# Message attributes checked in order to name message events
+MESSAGE_TYPES = (
+    'text', 'photo', 'video', 'document', 'voice', 'audio',
+    'sticker', 'animation', 'video_note', 'location', 'contact'
+)
+
+
+def classify_update(update: Update):
+    """Get (kind, name) of update, or None if it is not tracked"""
+    if update.callback_query is not None:
+        data = update.callback_query.data or ''
+        return EventKind.CALLBACK, data.split(':', 1)[0] or 'empty'
+    
+    message = update.effective_message
+    if message is None:
+        return None
+    
+    if message.text and message.text.startswith('/'):
+        command = message.text.split(maxsplit=1)[0][1:].split('@', 1)[0]
+        return EventKind.COMMAND, command.lower() or 'empty'
+    
+    for message_type in MESSAGE_TYPES:
+        if getattr(message, message_type, None):
+            return EventKind.MESSAGE, message_type
+    return EventKind.MESSAGE, 'other'
+
+
+class AnalyticsMiddleware:
+    """Record every handled update as an analytics event"""
+    
+    def __call__(self, update: Update, context):
+        event = classify_update(update)
+        if event is None:
+            return
+        
+        user = update.effective_user
+        db_user = getattr(context, CONTEXT_USER_ATTR, None)
+        if db_user is not None:
+            language = db_user.language
+        else:
+            language = user.language_code if user else None
+        
+        analytics_service.record(*event, user_id=user.id if user else None, language=language)
+    
+    def register(self, dispatcher, group: int = ANALYTICS_GROUP):
+        """Add middleware to dispatcher after regular handlers"""
+        dispatcher.add_handler(TypeHandler(Update, self), group)
+
+
+def setup_analytics(dispatcher) -> AnalyticsMiddleware:
+    """Create analytics middleware and register it"""
+    middleware = AnalyticsMiddleware()
+    middleware.register(dispatcher)
+    return middleware
@@ -0,0 +1,87 @@
+"""
+Per-user rate limiting applied before any handler runs
+"""
+import logging
+import threading
+import time
+from typing import Dict, Iterable, Tuple
+
+from telegram import Update
+from telegram.ext import TypeHandler, DispatcherHandlerStop
+
+from bot.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ThrottlingMiddleware:
+    """
+    Token bucket per user, checked in a pre-dispatch handler group
+    
+    Each bucket is just (tokens, last_seen). Buckets that have refilled
+    completely carry no information, so they are dropped during
+    periodic sweeps instead of being kept forever.
+    """
+    
+    def __init__(self, calls: int, period: float, exempt_ids: Iterable[int] = ()):
+        self.capacity = float(calls)
+        self.rate = calls / period
+        self.exempt_ids = frozenset(exempt_ids)
+        self.dropped = 0
+        self._buckets: Dict[int, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._sweep_interval = period
+        self._next_sweep = time.monotonic() + period
+    
+    def allow(self, user_id: int) -> bool:
+        """Take one token from user's bucket"""
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            
+            tokens, last_seen = self._buckets.get(user_id, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last_seen) * self.rate)
+            
+            if tokens < 1:
+                self._buckets[user_id] = (tokens, now)
+                return False
+            
+            self._buckets[user_id] = (tokens - 1, now)
+            return True
+    
+    def _sweep(self, now: float):
+        """Drop buckets that would be full by now"""
+        full_after = self.capacity / self.rate
+        idle = [
+            user_id for user_id, (_, last_seen) in self._buckets.items()
+            if now - last_seen >= full_after
+        ]
+        for user_id in idle:
+            del self._buckets[user_id]
+        self._next_sweep = now + self._sweep_interval
+    
+    def __call__(self, update: Update, context):
+        user = update.effective_user
+        if user is None or user.id in self.exempt_ids:
+            return
+        
+        if not self.allow(user.id):
+            self.dropped += 1
+            logger.debug(f"Throttled update from user {user.id}")
+            raise DispatcherHandlerStop()
+    
+    def register(self, dispatcher, group: int = -1):
+        """Add middleware to dispatcher ahead of regular handlers"""
+        dispatcher.add_handler(TypeHandler(Update, self), group)
+
+
+def setup_throttling(dispatcher) -> ThrottlingMiddleware:
+    """Create throttling middleware from settings and register it"""
+    middleware = ThrottlingMiddleware(
+        settings.rate_limit_calls,
+        settings.rate_limit_period,
+        exempt_ids=[*settings.admin_ids, settings.super_admin_id]
+    )
+    middleware.register(dispatcher)
+    return middleware
@@ -0,0 +1,32 @@
+"""
+Services package
+"""
+from bot.services.notification_service import (
+    BroadcastEngine,
+    Broadcast,
+    BroadcastStatus,
+    broadcast_engine
+)
+from bot.services.retention_service import RetentionService, retention_service
+from bot.services.statistics_service import StatisticsService, statistics_service
+from bot.services.analytics_service import (
+    AnalyticsService,
+    EventKind,
+    HyperLogLog,
+    analytics_service
+)
+
+__all__ = [
+    'BroadcastEngine',
+    'Broadcast',
+    'BroadcastStatus',
+    'broadcast_engine',
+    'RetentionService',
+    'retention_service',
+    'StatisticsService',
+    'statistics_service',
+    'AnalyticsService',
+    'EventKind',
+    'HyperLogLog',
+    'analytics_service'
+]
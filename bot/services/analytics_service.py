@@ -0,0 +1,177 @@
+"""
+Analytics service: in-memory event aggregates with periodic flush
+"""
+import hashlib
+import logging
+import math
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from bot.config import settings
+from bot.database import db
+
+logger = logging.getLogger(__name__)
+
+
+class EventKind:
+    """Analytics event kinds"""
+    COMMAND = "command"
+    CALLBACK = "callback"
+    MESSAGE = "message"
+
+
+class HyperLogLog:
+    """
+    HyperLogLog cardinality sketch
+    
+    2 ** precision one-byte registers (4 KB at the default precision 12)
+    estimate the number of distinct items with about 1.6% standard error.
+    Sketches of the same precision merge by taking register maxima.
+    """
+    
+    def __init__(self, precision: int = 12, registers: bytes = None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers) if registers else bytearray(self.size)
+        if len(self.registers) != self.size:
+            raise ValueError(f"Expected {self.size} registers, got {len(self.registers)}")
+    
+    def add(self, item):
+        value = int.from_bytes(
+            hashlib.blake2b(str(item).encode(), digest_size=8).digest(), 'big'
+        )
+        index = value >> (64 - self.precision)
+        rest = value & ((1 << (64 - self.precision)) - 1)
+        # Position of the first 1 bit in the remaining bits
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+    
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """Merge other sketch into this one"""
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+    
+    def count(self) -> int:
+        """Estimated number of distinct items"""
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+    
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+    
+    @staticmethod
+    def merge_bytes(left: bytes, right: bytes) -> bytes:
+        """Merge two serialized sketches"""
+        return bytes(map(max, left, right))
+
+
+class AnalyticsService:
+    """
+    Record events into in-memory aggregates and flush them periodically
+    
+    Recording only bumps a dict counter and a sketch register under a
+    short lock. Per-minute counts per kind/name/language and one unique
+    user sketch per day are flushed by a job; DAU/WAU/MAU merge the
+    daily sketches instead of scanning messages.
+    """
+    
+    def __init__(self, database=None, precision: int = 12):
+        self.db = database or db
+        self.precision = precision
+        self._events: Dict[Tuple[datetime, str, str, Optional[str]], int] = {}
+        self._sketches: Dict[str, HyperLogLog] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _sketch_key(day: date) -> str:
+        return f'users:{day.isoformat()}'
+    
+    def record(self, kind: str, name: str, user_id: int = None, language: str = None):
+        """Record one event"""
+        if not settings.enable_analytics:
+            return
+        
+        now = datetime.now()
+        key = (now.replace(second=0, microsecond=0), kind, name[:64], language)
+        with self._lock:
+            self._events[key] = self._events.get(key, 0) + 1
+            if user_id is not None:
+                sketch_key = self._sketch_key(now.date())
+                sketch = self._sketches.get(sketch_key)
+                if sketch is None:
+                    sketch = self._sketches[sketch_key] = HyperLogLog(self.precision)
+                sketch.add(user_id)
+    
+    def flush(self) -> int:
+        """Write pending aggregates to database, returning number of event rows"""
+        with self._lock:
+            events, self._events = self._events, {}
+            sketches, self._sketches = self._sketches, {}
+        
+        if not events and not sketches:
+            return 0
+        
+        try:
+            self.db.save_analytics(
+                events,
+                {key: sketch.to_bytes() for key, sketch in sketches.items()},
+                HyperLogLog.merge_bytes
+            )
+        except Exception as e:
+            logger.error(f"Failed to flush analytics: {e}", exc_info=True)
+            self._restore(events, sketches)
+            return 0
+        return len(events)
+    
+    def _restore(self, events, sketches):
+        """Put unflushed aggregates back so the next flush retries them"""
+        with self._lock:
+            for key, count in events.items():
+                self._events[key] = self._events.get(key, 0) + count
+            for key, sketch in sketches.items():
+                if key in self._sketches:
+                    self._sketches[key].merge(sketch)
+                else:
+                    self._sketches[key] = sketch
+    
+    def unique_users(self, days: Iterable[date]) -> int:
+        """Estimated distinct users active on any of the days"""
+        keys = [self._sketch_key(day) for day in days]
+        merged = HyperLogLog(self.precision)
+        for registers in self.db.get_analytics_sketches(keys).values():
+            merged.merge(HyperLogLog(self.precision, registers))
+        
+        with self._lock:
+            pending = [self._sketches[key] for key in keys if key in self._sketches]
+            for sketch in pending:
+                merged.merge(sketch)
+        return merged.count()
+    
+    def active_users(self, today: date = None) -> Dict[str, int]:
+        """DAU, WAU and MAU estimates"""
+        today = today or date.today()
+        return {
+            'dau': self.unique_users([today]),
+            'wau': self.unique_users(today - timedelta(days=i) for i in range(7)),
+            'mau': self.unique_users(today - timedelta(days=i) for i in range(30))
+        }
+    
+    def top_events(self, kind: str, since: datetime = None, limit: int = 10) -> Dict[str, int]:
+        """Most frequent event names of a kind (flushed events only)"""
+        since = since or datetime.now() - timedelta(days=1)
+        counts = self.db.get_event_counts(since, kind)
+        ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return {name: count for (_, name), count in ranked}
+
+
+# Global analytics service instance
+analytics_service = AnalyticsService()
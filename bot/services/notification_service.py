@@ -0,0 +1,193 @@
+"""
+Notification service: background broadcast engine
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+from telegram.error import RetryAfter, Unauthorized, BadRequest, TimedOut, NetworkError
+
+from bot.config import settings
+from bot.utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastStatus:
+    """Per-recipient delivery outcomes"""
+    SUCCESS = "success"
+    FAILED = "failed"
+    BLOCKED = "blocked"
+
+
+class Broadcast:
+    """State of a single broadcast run"""
+    
+    def __init__(self, text: str, total: int = None):
+        self.text = text
+        self.total = total
+        self.success = 0
+        self.failed = 0
+        self.blocked = 0
+        self.retries = 0
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+    
+    @property
+    def sent(self) -> int:
+        """Recipients processed so far"""
+        return self.success + self.failed + self.blocked
+    
+    def record(self, status: str):
+        with self._lock:
+            if status == BroadcastStatus.SUCCESS:
+                self.success += 1
+            elif status == BroadcastStatus.BLOCKED:
+                self.blocked += 1
+            else:
+                self.failed += 1
+    
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+    
+    def to_dict(self) -> Dict[str, int]:
+        """Get counters snapshot"""
+        end = self.finished_at or time.monotonic()
+        with self._lock:
+            return {
+                'total': self.total if self.total is not None else self.sent,
+                'sent': self.sent,
+                'success': self.success,
+                'failed': self.failed,
+                'blocked': self.blocked,
+                'retries': self.retries,
+                'elapsed': round(end - self.started_at, 1)
+            }
+
+
+class BroadcastEngine:
+    """
+    Send broadcasts in the background
+    
+    Messages go out through a pool of sender threads that share one
+    global token bucket, so all running broadcasts together stay under
+    the Bot API limit. RetryAfter pauses the bucket for every sender and
+    the message is retried.
+    """
+    
+    def __init__(
+        self,
+        workers: int = None,
+        rate: float = None,
+        progress_interval: float = None,
+        max_retries: int = 3
+    ):
+        self.workers = workers or settings.broadcast_workers
+        self.bucket = TokenBucket(rate or settings.broadcast_rate)
+        self.progress_interval = progress_interval or settings.broadcast_progress_interval
+        self.max_retries = max_retries
+        self._active: List[Broadcast] = []
+        self._lock = threading.Lock()
+    
+    @property
+    def active(self) -> List[Broadcast]:
+        """Snapshot of running broadcasts"""
+        with self._lock:
+            return list(self._active)
+    
+    def start(
+        self,
+        bot,
+        text: str,
+        recipients: Iterable[int],
+        total: int = None,
+        on_progress: Optional[Callable[[Broadcast], None]] = None,
+        on_done: Optional[Callable[[Broadcast], None]] = None
+    ) -> Broadcast:
+        """Start broadcast in a background thread and return its state"""
+        broadcast = Broadcast(text, total)
+        with self._lock:
+            self._active.append(broadcast)
+        
+        thread = threading.Thread(
+            target=self._run,
+            args=(bot, broadcast, recipients, on_progress, on_done),
+            name='broadcast',
+            daemon=True
+        )
+        thread.start()
+        return broadcast
+    
+    def _run(self, bot, broadcast: Broadcast, recipients, on_progress, on_done):
+        # Bound in-flight sends so recipients can be a lazy iterator
+        slots = threading.BoundedSemaphore(self.workers * 2)
+        last_progress = time.monotonic()
+        
+        def send(chat_id: int):
+            try:
+                broadcast.record(self._send(bot, broadcast, chat_id))
+            finally:
+                slots.release()
+        
+        try:
+            with ThreadPoolExecutor(self.workers, thread_name_prefix='broadcast-sender') as pool:
+                for chat_id in recipients:
+                    slots.acquire()
+                    pool.submit(send, chat_id)
+                    
+                    now = time.monotonic()
+                    if on_progress and now - last_progress >= self.progress_interval:
+                        last_progress = now
+                        self._notify(on_progress, broadcast)
+        except Exception as e:
+            logger.error(f"Broadcast aborted: {e}", exc_info=True)
+        finally:
+            broadcast.finished_at = time.monotonic()
+            broadcast.done.set()
+            with self._lock:
+                self._active.remove(broadcast)
+            
+            logger.info(f"Broadcast finished: {broadcast.to_dict()}")
+            if on_done:
+                self._notify(on_done, broadcast)
+    
+    def _send(self, bot, broadcast: Broadcast, chat_id: int) -> str:
+        """Send one message, retrying on flood control and network errors"""
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                bot.send_message(chat_id=chat_id, text=broadcast.text)
+                return BroadcastStatus.SUCCESS
+            except RetryAfter as e:
+                logger.warning(f"Broadcast flood control, pausing for {e.retry_after}s")
+                self.bucket.pause(e.retry_after)
+            except Unauthorized:
+                # Bot was blocked by the user or the account was deleted
+                return BroadcastStatus.BLOCKED
+            except BadRequest as e:
+                logger.debug(f"Broadcast to {chat_id} rejected: {e}")
+                return BroadcastStatus.FAILED
+            except (TimedOut, NetworkError) as e:
+                logger.debug(f"Broadcast to {chat_id} network error: {e}")
+            except Exception as e:
+                logger.error(f"Failed to send broadcast to {chat_id}: {e}")
+                return BroadcastStatus.FAILED
+            broadcast.record_retry()
+        
+        return BroadcastStatus.FAILED
+    
+    @staticmethod
+    def _notify(callback, broadcast: Broadcast):
+        try:
+            callback(broadcast)
+        except Exception as e:
+            logger.warning(f"Broadcast progress callback failed: {e}")
+
+
+# Global broadcast engine instance
+broadcast_engine = BroadcastEngine()
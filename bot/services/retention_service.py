@@ -0,0 +1,90 @@
+"""
+Retention service: roll old messages into daily statistics, then remove them
+"""
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict
+
+from bot.config import settings
+from bot.database import db
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionService:
+    """
+    Enforce the message retention window
+    
+    Days older than the window are first aggregated into statistics rows
+    (marked final), and only then are their raw messages deleted or
+    archived in small batches with a pause in between, so handlers
+    writing at the same time are never blocked for long. Per-minute
+    analytics events have their own window and are deleted the same way.
+    """
+    
+    def __init__(
+        self,
+        database=None,
+        retention_days: int = None,
+        batch_size: int = None,
+        batch_pause: float = None,
+        archive: bool = None,
+        analytics_retention_days: int = None
+    ):
+        self.db = database or db
+        self.retention_days = (
+            retention_days if retention_days is not None else settings.message_retention_days
+        )
+        self.analytics_retention_days = (
+            analytics_retention_days if analytics_retention_days is not None
+            else settings.analytics_retention_days
+        )
+        self.batch_size = batch_size or settings.retention_batch_size
+        self.batch_pause = batch_pause if batch_pause is not None else settings.retention_batch_pause
+        self.archive = archive if archive is not None else settings.message_retention_archive
+    
+    def cutoff(self, today: date = None, days: int = None) -> date:
+        """First day that is kept"""
+        days = self.retention_days if days is None else days
+        return (today or date.today()) - timedelta(days=days)
+    
+    def run(self, today: date = None) -> Dict[str, int]:
+        """Roll up and purge everything older than the retention windows"""
+        result = {'rolled_up_days': 0, 'purged': 0, 'purged_events': 0}
+        
+        if self.retention_days > 0:
+            cutoff = self.cutoff(today)
+            oldest = self.db.get_oldest_message_date()
+            if oldest is not None and oldest.date() < cutoff:
+                result['rolled_up_days'] = self.db.rollup_statistics(oldest.date(), cutoff)
+            
+            before = datetime(cutoff.year, cutoff.month, cutoff.day)
+            result['purged'] = self._purge(
+                lambda: self.db.purge_messages(before, self.batch_size, archive=self.archive)
+            )
+        
+        if self.analytics_retention_days > 0:
+            cutoff = self.cutoff(today, self.analytics_retention_days)
+            before = datetime(cutoff.year, cutoff.month, cutoff.day)
+            result['purged_events'] = self._purge(
+                lambda: self.db.purge_analytics_events(before, self.batch_size)
+            )
+        
+        if result['purged'] or result['purged_events']:
+            logger.info(f"Retention: {result}")
+        return result
+    
+    def _purge(self, purge_batch: Callable[[], int]) -> int:
+        """Run purge_batch until a batch comes back short, pausing in between"""
+        purged = 0
+        while True:
+            removed = purge_batch()
+            purged += removed
+            if removed < self.batch_size:
+                return purged
+            time.sleep(self.batch_pause)
+
+
+# Global retention service instance
+retention_service = RetentionService()
@@ -0,0 +1,66 @@
+"""
+Statistics service: incremental daily statistics rollup
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict
+
+from bot.config import settings
+from bot.database import db
+
+logger = logging.getLogger(__name__)
+
+
+class StatisticsService:
+    """
+    Keep one statistics row per day up to date
+    
+    Every run finalizes the days after the checkpoint (the last final
+    row) in a single rollup, so missed days are backfilled in one pass,
+    and refreshes today's open row. Final rows are never recomputed,
+    which makes re-runs idempotent. A day is finalized only
+    finalize_delay seconds after it ends, giving buffered message
+    writes time to land.
+    """
+    
+    def __init__(self, database=None, finalize_delay: int = None):
+        self.db = database or db
+        self.finalize_delay = (
+            finalize_delay if finalize_delay is not None else settings.statistics_finalize_delay
+        )
+    
+    def run(self, now: datetime = None) -> Dict[str, Any]:
+        """Finalize completed days since the checkpoint and refresh today's row"""
+        now = now or datetime.now()
+        today = now.date()
+        # Days before this one are complete
+        complete_until = (now - timedelta(seconds=self.finalize_delay)).date()
+        
+        checkpoint = self.db.get_statistics_checkpoint()
+        if checkpoint is not None:
+            start = checkpoint + timedelta(days=1)
+        else:
+            start = self.db.get_first_activity_date() or today
+        
+        finalized = 0
+        if start < complete_until:
+            finalized = self.db.rollup_statistics(start, complete_until, final=True)
+            start = complete_until
+        
+        # Days not complete yet (today, and yesterday during the delay) stay open
+        blocked = self.db.get_statistics()['blocked_users']
+        self.db.rollup_statistics(start, today + timedelta(days=1), final=False, blocked_users=blocked)
+        
+        result = {'finalized_days': finalized, 'open_from': start.isoformat()}
+        if finalized:
+            logger.info(f"Statistics rollup: {result}")
+        return result
+    
+    def backfill(self, start: date, end: date = None) -> int:
+        """Compute missing rows for [start, end) (default: up to today)"""
+        end = end or date.today()
+        return self.db.rollup_statistics(start, end, final=True)
+
+
+# Global statistics service instance
+statistics_service = StatisticsService()
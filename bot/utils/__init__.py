@@ -30,6 +30,12 @@ from bot.utils.helpers import (
     send_typing_action
 )
 
+from bot.utils.context import (
+    get_current_user,
+    set_current_user,
+    get_user_language
+)
+
 from bot.utils.logging_config import setup_logging
 
 __all__ = [
@@ -56,5 +62,8 @@ __all__ = [
     'format_file_size',
     'validate_file_type',
     'send_typing_action',
+    'get_current_user',
+    'set_current_user',
+    'get_user_language',
     'setup_logging'
 ]
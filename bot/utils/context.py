@@ -0,0 +1,71 @@
+"""
+Request-scoped user snapshot shared by decorators, filters and handlers
+"""
+import threading
+from typing import Optional
+
+from bot.config import settings
+from bot.database import db
+from bot.database.models import User
+
+# Attribute name used to store the snapshot on CallbackContext
+CONTEXT_USER_ATTR = 'db_user'
+
+_MISSING = object()
+
+# Filters run before CallbackContext exists, so their lookups are kept
+# per dispatcher thread and keyed on the message object they were made for
+_local = threading.local()
+
+
+def _remember(message, user: Optional[User]):
+    """Remember user snapshot for the message being dispatched"""
+    _local.message = message
+    _local.user = user
+
+
+def _recall(message):
+    """Get remembered user snapshot for the message, if any"""
+    if message is not None and getattr(_local, 'message', None) is message:
+        return _local.user
+    return _MISSING
+
+
+def get_message_user(message) -> Optional[User]:
+    """Get user snapshot for a message (used by filters)"""
+    user = _recall(message)
+    if user is _MISSING:
+        user = db.get_user(message.from_user.id)
+        _remember(message, user)
+    return user
+
+
+def get_current_user(update, context=None) -> Optional[User]:
+    """Get user snapshot, loading it from database at most once per update"""
+    if context is not None:
+        user = getattr(context, CONTEXT_USER_ATTR, _MISSING)
+        if user is not _MISSING:
+            return user
+    
+    message = update.effective_message
+    user = _recall(message)
+    if user is _MISSING:
+        user = db.get_user(update.effective_user.id)
+        _remember(message, user)
+    
+    if context is not None:
+        setattr(context, CONTEXT_USER_ATTR, user)
+    return user
+
+
+def set_current_user(update, context, user: Optional[User]):
+    """Replace user snapshot after the user row was written"""
+    _remember(update.effective_message, user)
+    if context is not None:
+        setattr(context, CONTEXT_USER_ATTR, user)
+
+
+def get_user_language(update, context=None) -> str:
+    """Get user's language"""
+    user = get_current_user(update, context)
+    return user.language if user else settings.default_language
@@ -8,17 +8,12 @@ from typing import Callable
 from bot.config import settings
 from bot.database import db
 from bot.locales import i18n
+from bot.utils.context import get_current_user, set_current_user, get_user_language
+from bot.utils.profiling import profiler
 
 logger = logging.getLogger(__name__)
 
 
-def get_user_language(update) -> str:
-    """Get user's language"""
-    user_id = update.effective_user.id
-    user = db.get_user(user_id)
-    return user.language if user else settings.default_language
-
-
 def admin_only(func: Callable) -> Callable:
     """Decorator to restrict access to admin users only"""
     @wraps(func)
@@ -26,7 +21,7 @@ def admin_only(func: Callable) -> Callable:
         user_id = update.effective_user.id
         
         if not settings.is_admin(user_id):
-            language = get_user_language(update)
+            language = get_user_language(update, context)
             update.message.reply_text(
                 i18n.get_error('permission_denied', language)
             )
@@ -45,7 +40,7 @@ def super_admin_only(func: Callable) -> Callable:
         user_id = update.effective_user.id
         
         if not settings.is_super_admin(user_id):
-            language = get_user_language(update)
+            language = get_user_language(update, context)
             update.message.reply_text(
                 i18n.get_error('permission_denied', language)
             )
@@ -61,11 +56,10 @@ def premium_only(func: Callable) -> Callable:
     """Decorator to restrict access to premium users only"""
     @wraps(func)
     def wrapper(update, context):
-        user_id = update.effective_user.id
-        user = db.get_user(user_id)
+        user = get_current_user(update, context)
         
         if not (user and user.is_premium):
-            language = get_user_language(update)
+            language = get_user_language(update, context)
             update.message.reply_text(
                 i18n.get('errors.premium_required', language) or
                 "⭐️ This feature is for premium users only."
@@ -83,13 +77,14 @@ def track_user(func: Callable) -> Callable:
     def wrapper(update, context):
         user = update.effective_user
         
-        # Get or create user in database
-        db.get_or_create_user(
+        # Get or create user in database and share it with the rest of the chain
+        db_user = db.get_or_create_user(
             user_id=user.id,
             username=user.username,
             first_name=user.first_name,
             last_name=user.last_name
         )
+        set_current_user(update, context, db_user)
         
         return func(update, context)
     
@@ -101,10 +96,10 @@ def check_blocked(func: Callable) -> Callable:
     @wraps(func)
     def wrapper(update, context):
         user_id = update.effective_user.id
-        user = db.get_user(user_id)
+        user = get_current_user(update, context)
         
         if user and user.is_blocked:
-            language = get_user_language(update)
+            language = get_user_language(update, context)
             update.message.reply_text(
                 i18n.get_error('user_blocked', language)
             )
@@ -132,7 +127,7 @@ def log_command(func: Callable) -> Callable:
         # Save to database
         if message and message.text:
             message_type = 'command' if text.startswith('/') else 'text'
-            db.add_message(user.id, message_type, text)
+            db.log_message(user.id, message_type, text)
         
         return func(update, context)
     
@@ -148,7 +143,7 @@ def error_handler_decorator(func: Callable) -> Callable:
         except Exception as e:
             logger.error(f"Error in {func.__name__}: {e}", exc_info=True)
             
-            language = get_user_language(update)
+            language = get_user_language(update, context)
             
             if update.message:
                 update.message.reply_text(
@@ -168,15 +163,22 @@ def protected_handler(func: Callable) -> Callable:
     """
     Combined decorator: track user, check if blocked, log command, handle errors
     
+    The user is tracked before the blocked check so that the row written by
+    track_user is reused as the request's user snapshot. The whole chain is
+    sampled by the profiler under the handler's name when profiling is on.
+    
     Usage:
         @protected_handler
         def my_handler(update, context):
             pass
     """
-    return error_handler_decorator(
-        log_command(
-            check_blocked(
-                track_user(func)
+    return profiler.wrap(
+        error_handler_decorator(
+            log_command(
+                track_user(
+                    check_blocked(func)
+                )
             )
-        )
+        ),
+        name=func.__name__
     )
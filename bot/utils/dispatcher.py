@@ -0,0 +1,184 @@
+"""
+Dispatchers: profiled, and sharded for per-user ordered, parallel update processing
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, List
+
+from telegram import Update
+from telegram.ext import Dispatcher, JobQueue, Updater
+from telegram.ext.extbot import ExtBot
+from telegram.utils.request import Request
+
+from bot.config import settings
+from bot.utils.profiling import DISPATCHER_PROFILE, profiler
+
+logger = logging.getLogger(__name__)
+
+# Put on a shard queue to stop its worker
+_STOP = object()
+
+
+class Shard:
+    """Worker queue with its own counters"""
+    
+    def __init__(self, index: int, maxsize: int):
+        self.index = index
+        self.queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self.thread = None
+        
+        # Written by the shard worker only
+        self.processed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.busy_total = 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Get counters snapshot"""
+        processed = self.processed
+        return {
+            'shard': self.index,
+            'depth': self.queue.qsize(),
+            'processed': processed,
+            'wait_avg_ms': round(self.wait_total / processed * 1000, 2) if processed else 0.0,
+            'wait_max_ms': round(self.wait_max * 1000, 2),
+            'busy_avg_ms': round(self.busy_total / processed * 1000, 2) if processed else 0.0
+        }
+
+
+class ProfiledDispatcher(Dispatcher):
+    """Dispatcher whose update passes are sampled by the profiler"""
+    
+    def process_update(self, update: object):
+        if not profiler.enabled:
+            super().process_update(update)
+            return
+        profiler.call(DISPATCHER_PROFILE, super().process_update, update)
+
+
+class ShardedDispatcher(ProfiledDispatcher):
+    """
+    Dispatcher that hashes updates by user (or chat) onto N worker queues
+    
+    The dispatcher thread only routes updates. Each shard has one worker,
+    so updates of the same user are handled strictly in order while
+    different users run in parallel. Bounded shard queues block the
+    router when a shard falls behind, which backs up the update queue
+    instead of growing memory.
+    """
+    
+    def __init__(self, *args, shards: int = 8, shard_queue_size: int = 1000, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.shards = [Shard(index, shard_queue_size) for index in range(shards)]
+    
+    @staticmethod
+    def shard_key(update: object) -> int:
+        """Ordering key: user ID, chat ID for updates without a user, else 0"""
+        if isinstance(update, Update):
+            if update.effective_user is not None:
+                return update.effective_user.id
+            if update.effective_chat is not None:
+                return update.effective_chat.id
+        return 0
+    
+    def start(self, ready: threading.Event = None):
+        for shard in self.shards:
+            if shard.thread is None:
+                shard.thread = threading.Thread(
+                    target=self._run_shard,
+                    args=(shard,),
+                    name=f'dispatcher-shard-{shard.index}',
+                    daemon=True
+                )
+                shard.thread.start()
+        super().start(ready)
+    
+    def stop(self):
+        # Stop routing first, then let shards drain what they already have
+        super().stop()
+        for shard in self.shards:
+            if shard.thread is not None:
+                shard.queue.put(_STOP)
+        for shard in self.shards:
+            if shard.thread is not None:
+                shard.thread.join()
+                shard.thread = None
+        logger.info(f"Dispatcher shards stopped: {self.shard_stats()}")
+    
+    def process_update(self, update: object):
+        shard = self.shards[self.shard_key(update) % len(self.shards)]
+        if shard.thread is None:
+            # Not started (e.g. called directly): handle inline
+            super().process_update(update)
+            return
+        shard.queue.put((time.monotonic(), update))
+    
+    def _run_shard(self, shard: Shard):
+        while True:
+            item = shard.queue.get()
+            if item is _STOP:
+                return
+            
+            enqueued_at, update = item
+            started = time.monotonic()
+            wait = started - enqueued_at
+            
+            try:
+                super().process_update(update)
+            except Exception as e:
+                # process_update handles handler errors; this is a last resort
+                logger.error(f"Shard {shard.index} failed to process update: {e}", exc_info=True)
+            
+            shard.processed += 1
+            shard.wait_total += wait
+            shard.wait_max = max(shard.wait_max, wait)
+            shard.busy_total += time.monotonic() - started
+    
+    def shard_stats(self) -> List[Dict[str, Any]]:
+        """Per-shard queue depth, wait and processing times"""
+        return [shard.to_dict() for shard in self.shards]
+
+
+def create_updater() -> Updater:
+    """
+    Create Updater
+    
+    Uses a sharded dispatcher if dispatcher_shards is set, a profiled one if
+    profiling is enabled at startup, and the stock dispatcher otherwise.
+    """
+    shards = max(settings.dispatcher_shards, 0)
+    if not shards and not settings.profiling_enabled:
+        return Updater(
+            settings.bot_token,
+            base_url=settings.bot_api_url or None,
+            use_context=True,
+            workers=settings.dispatcher_workers
+        )
+    
+    # Connection per shard, per async worker, plus polling, jobs and main thread
+    request = Request(con_pool_size=shards + settings.dispatcher_workers + 4)
+    bot = ExtBot(settings.bot_token, base_url=settings.bot_api_url or None, request=request)
+    job_queue = JobQueue()
+    kwargs = dict(
+        workers=settings.dispatcher_workers,
+        job_queue=job_queue,
+        exception_event=threading.Event(),
+        use_context=True
+    )
+    if shards:
+        dispatcher = ShardedDispatcher(
+            bot,
+            queue.Queue(),
+            shards=shards,
+            shard_queue_size=settings.dispatcher_shard_queue_size,
+            **kwargs
+        )
+        logger.info(f"Sharded dispatcher: {shards} shards")
+    else:
+        dispatcher = ProfiledDispatcher(bot, queue.Queue(), **kwargs)
+    job_queue.set_dispatcher(dispatcher)
+    
+    # Updater defaults workers to 4, which it rejects alongside a dispatcher
+    return Updater(dispatcher=dispatcher, workers=None)
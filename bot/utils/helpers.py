@@ -21,7 +21,7 @@ def format_user_info(user, language: str = None) -> str:
         name=user.first_name or 'N/A',
         username=f"@{user.username}" if user.username else 'N/A',
         user_id=user.user_id,
-        language=user.language.upper(),
+        language_name=user.language.upper(),
         created_at=user.created_at.strftime('%d.%m.%Y'),
         status=status
     )
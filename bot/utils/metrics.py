@@ -0,0 +1,455 @@
+"""
+Metrics registry with Prometheus text exposition
+"""
+import bisect
+import inspect
+from abc import ABC, abstractmethod
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+from bot.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Gauge callbacks return a value, or {label values: value} for labelled gauges
+GaugeValue = Union[float, Dict[Tuple[str, ...], float]]
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _ThreadShards:
+    """
+    Per-thread value lists merged on read
+    
+    Each recording thread only touches its own list, so recording takes
+    no lock; the lock is only used the first time a thread records.
+    Shards of finished threads are folded into a base total on read, so
+    short-lived threads do not leave a list behind each.
+    """
+    
+    def __init__(self, size: int):
+        self.size = size
+        self._local = threading.local()
+        self._base = [0] * size
+        self._shards: List[Tuple[threading.Thread, list]] = []
+        self._lock = threading.Lock()
+    
+    def local(self) -> list:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = [0] * self.size
+            self._local.shard = shard
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+    
+    def merged(self) -> list:
+        with self._lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    # A finished thread records nothing more
+                    for i, value in enumerate(shard):
+                        self._base[i] += value
+            self._shards = live
+            total = list(self._base)
+        for _, shard in live:
+            for i, value in enumerate(shard):
+                total[i] += value
+        return total
+
+
+class _Metric(ABC):
+    """Base for metrics with optional labels"""
+    
+    kind = ''
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+    
+    def labels(self, *values):
+        """Get child metric for label values"""
+        values = tuple(str(value) for value in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+    
+    @abstractmethod
+    def _new_child(self):
+        """Per-label-values state"""
+    
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Exposition lines of all children"""
+    
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """Monotonic counter"""
+    
+    kind = 'counter'
+    
+    def _new_child(self):
+        return _ThreadShards(1)
+    
+    def inc(self, *values, amount: float = 1):
+        self.labels(*values).local()[0] += amount
+    
+    def _samples(self) -> List[str]:
+        return [
+            f'{self.name}{_format_labels(self.labelnames, values)} {shards.merged()[0]}'
+            for values, shards in list(self._children.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Latency histogram with fixed buckets"""
+    
+    kind = 'histogram'
+    
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def _new_child(self):
+        # One slot per bucket, one for +Inf, then the sum
+        return _ThreadShards(len(self.buckets) + 2)
+    
+    def observe(self, seconds: float, *values):
+        shard = self.labels(*values).local()
+        shard[bisect.bisect_left(self.buckets, seconds)] += 1
+        shard[-1] += seconds
+    
+    @contextmanager
+    def time(self, *values):
+        """Observe duration of the with block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *values)
+    
+    def _samples(self) -> List[str]:
+        lines = []
+        for values, shards in list(self._children.items()):
+            merged = shards.merged()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), merged[:-1]):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                labels = _format_labels(self.labelnames, values, f'le="{le}"')
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f'{self.name}_sum{labels} {merged[-1]}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Gauge(_Metric):
+    """Value read from a callback at scrape time"""
+    
+    kind = 'gauge'
+    
+    def __init__(self, name, documentation, callback: Callable[[], GaugeValue], labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+    
+    def _new_child(self):
+        raise TypeError(f"Gauge {self.name} is read from its callback, it has no children")
+    
+    def _samples(self) -> List[str]:
+        try:
+            value = self.callback()
+        except Exception as e:
+            logger.debug(f"Gauge {self.name} failed: {e}")
+            return []
+        if not isinstance(value, dict):
+            return [f'{self.name} {value}']
+        return [
+            f'{self.name}{_format_labels(self.labelnames, values)} {sample}'
+            for values, sample in value.items()
+        ]
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+    
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+    
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+    
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], GaugeValue],
+        labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        with self._lock:
+            # Re-registering replaces the callback (e.g. a new dispatcher)
+            gauge = self._metrics[name] = Gauge(name, documentation, callback, labelnames)
+            return gauge
+    
+    def render(self) -> str:
+        """Render all metrics in Prometheus text format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+# Global metrics registry
+registry = MetricsRegistry()
+
+HANDLER_SECONDS = registry.histogram(
+    'bot_handler_seconds', 'Handler callback duration', ['handler']
+)
+DATABASE_SECONDS = registry.histogram(
+    'bot_database_seconds', 'DatabaseManager method duration', ['method']
+)
+BOT_API_SECONDS = registry.histogram(
+    'bot_api_seconds', 'Bot API request duration', ['method']
+)
+BOT_API_ERRORS = registry.counter(
+    'bot_api_errors_total', 'Bot API requests that raised', ['method', 'error']
+)
+
+
+# ==================== Instrumentation ====================
+
+def timed(func: Callable, histogram: Histogram, *values) -> Callable:
+    """Wrap func so every call is observed by histogram"""
+    child = histogram.labels(*values)
+    buckets = histogram.buckets
+    
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            shard = child.local()
+            shard[bisect.bisect_left(buckets, elapsed)] += 1
+            shard[-1] += elapsed
+    
+    wrapper.__metrics_wrapped__ = True
+    return wrapper
+
+
+def _callback_name(callback) -> str:
+    return getattr(callback, '__name__', None) or type(callback).__name__
+
+
+def instrument_handlers(dispatcher):
+    """Time callbacks of all registered handlers, including conversation steps"""
+    from telegram.ext import ConversationHandler
+    
+    def instrument(handler):
+        if isinstance(handler, ConversationHandler):
+            nested = list(handler.entry_points) + list(handler.fallbacks)
+            for state_handlers in handler.states.values():
+                nested.extend(state_handlers)
+            for child in nested:
+                instrument(child)
+            return
+        callback = getattr(handler, 'callback', None)
+        if callback is not None and not getattr(callback, '__metrics_wrapped__', False):
+            handler.callback = timed(callback, HANDLER_SECONDS, _callback_name(callback))
+    
+    for handlers in dispatcher.handlers.values():
+        for handler in handlers:
+            instrument(handler)
+
+
+def instrument_database(manager):
+    """Time public DatabaseManager methods (scopes and generators excluded)"""
+    for name, member in inspect.getmembers(type(manager), inspect.isfunction):
+        if name.startswith('_') or name.endswith('_scope') or inspect.isgeneratorfunction(member):
+            continue
+        bound = getattr(manager, name)
+        if not getattr(bound, '__metrics_wrapped__', False):
+            setattr(manager, name, timed(bound, DATABASE_SECONDS, name))
+
+
+def instrument_bot(bot):
+    """Time every Bot API request made through bot's Request object"""
+    request = bot.request
+    post = request.post
+    if getattr(post, '__metrics_wrapped__', False):
+        return
+    
+    @wraps(post)
+    def timed_post(url: str, *args, **kwargs):
+        method = url.rsplit('/', 1)[-1]
+        started = time.perf_counter()
+        try:
+            return post(url, *args, **kwargs)
+        except Exception as e:
+            BOT_API_ERRORS.inc(method, type(e).__name__)
+            raise
+        finally:
+            BOT_API_SECONDS.observe(time.perf_counter() - started, method)
+    
+    timed_post.__metrics_wrapped__ = True
+    request.post = timed_post
+
+
+def register_runtime_gauges(updater, database=None):
+    """Queue depths, cache hit rates and broadcast progress"""
+    from bot.database import db
+    from bot.services import broadcast_engine
+    
+    database = database or db
+    dispatcher = updater.dispatcher
+    
+    registry.gauge(
+        'bot_update_queue_depth', 'Updates waiting for the dispatcher',
+        lambda: dispatcher.update_queue.qsize()
+    )
+    if hasattr(dispatcher, 'shard_stats'):
+        registry.gauge(
+            'bot_dispatcher_shard_depth', 'Updates queued per dispatcher shard',
+            lambda: {(str(s['shard']),): s['depth'] for s in dispatcher.shard_stats()},
+            ['shard']
+        )
+        registry.gauge(
+            'bot_dispatcher_shard_wait_avg_seconds', 'Average queue wait per dispatcher shard',
+            lambda: {(str(s['shard']),): s['wait_avg_ms'] / 1000 for s in dispatcher.shard_stats()},
+            ['shard']
+        )
+    
+    writer = database.message_writer
+    registry.gauge('bot_message_writer_pending', 'Buffered message rows', lambda: writer.pending)
+    registry.gauge(
+        'bot_message_writer_rows', 'Message writer row outcomes',
+        lambda: {('written',): writer.written, ('dropped',): writer.dropped, ('failed',): writer.failed},
+        ['outcome']
+    )
+    
+    def cache_hit_rates():
+        rates = {('user',): database.user_cache.stats()['hit_rate']}
+        if database.cache.shared:
+            rates[('shared',)] = database.cache.stats()['hit_rate']
+        return rates
+    
+    registry.gauge('bot_cache_hit_ratio', 'Cache hit ratio', cache_hit_rates, ['cache'])
+    
+    def broadcast_progress():
+        progress = {}
+        for index, broadcast in enumerate(list(broadcast_engine.active)):
+            for field, value in broadcast.to_dict().items():
+                progress[(str(index), field)] = value
+        return progress
+    
+    registry.gauge(
+        'bot_broadcasts_active', 'Running broadcasts', lambda: len(broadcast_engine.active)
+    )
+    registry.gauge(
+        'bot_broadcast_progress', 'Counters of running broadcasts',
+        broadcast_progress, ['broadcast', 'field']
+    )
+
+
+def register_webhook_gauges(server):
+    """Webhook request counters, registered once the webhook server exists"""
+    registry.gauge(
+        'bot_webhook_requests', 'Webhook requests by HTTP status',
+        lambda: {(str(status),): count for status, count in server.stats.to_dict()['requests'].items()},
+        ['status']
+    )
+
+
+# ==================== Exposition ====================
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Serve registry on GET /metrics"""
+    
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        logger.debug(f"Metrics {self.address_string()}: {format % args}")
+
+
+def start_metrics_server(host: str = None, port: int = None) -> ThreadingHTTPServer:
+    """Serve metrics from a daemon thread"""
+    server = ThreadingHTTPServer(
+        (host or settings.metrics_host, port if port is not None else settings.metrics_port),
+        MetricsRequestHandler
+    )
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    logger.info(f"Metrics available on http://{server.server_address[0]}:{server.server_address[1]}/metrics")
+    return server
+
+
+def setup_metrics(updater):
+    """Instrument handlers, database and Bot API, then start the exporter"""
+    from bot.database import db
+    
+    instrument_handlers(updater.dispatcher)
+    instrument_database(db)
+    instrument_bot(updater.bot)
+    register_runtime_gauges(updater, db)
+    return start_metrics_server()
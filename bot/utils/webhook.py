@@ -0,0 +1,205 @@
+"""
+Webhook ingress: validates Telegram requests and queues updates with backpressure
+"""
+import hmac
+import json
+import logging
+import secrets
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+from telegram import Update
+
+from bot.config import settings
+from bot.utils.metrics import register_webhook_gauges
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+class WebhookStats:
+    """Request counters by status code and recent handling latencies"""
+    
+    def __init__(self, window: int = 1000):
+        self.requests: Dict[int, int] = {}
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+    
+    def record(self, status: int, seconds: float):
+        with self._lock:
+            self.requests[status] = self.requests.get(status, 0) + 1
+            self._latencies.append(seconds)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Get counters and latency percentiles (ms) over the recent window"""
+        with self._lock:
+            requests = dict(self.requests)
+            latencies = sorted(self._latencies)
+        
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 2)
+        
+        return {
+            'requests': requests,
+            'p50_ms': percentile(0.50),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99)
+        }
+
+
+class WebhookRequestHandler(BaseHTTPRequestHandler):
+    """Acknowledge webhook POSTs as soon as the update is queued"""
+    
+    server: 'WebhookServer'
+    
+    def do_POST(self):
+        started = time.monotonic()
+        
+        if self.path != self.server.path:
+            status = 404
+        else:
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+            except ValueError:
+                length = -1
+            
+            if length < 0:
+                status = 400
+            elif length > self.server.max_body_size:
+                status = 413
+            else:
+                status = self.server.handle_update(
+                    self.headers.get(SECRET_HEADER),
+                    self.rfile.read(length)
+                )
+        
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        if status == 429:
+            self.send_header('Retry-After', '1')
+        self.end_headers()
+        
+        self.server.stats.record(status, time.monotonic() - started)
+    
+    def log_message(self, format, *args):
+        logger.debug(f"Webhook {self.address_string()}: {format % args}")
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """
+    HTTP server in front of the dispatcher update queue
+    
+    Requests without the expected secret token header are rejected.
+    When the dispatcher has fallen max_queue_size updates behind, new
+    updates get 429 so Telegram retries them later instead of the bot
+    piling up work; while stopping, requests get 503. TLS is expected
+    to be terminated by a reverse proxy.
+    """
+    
+    daemon_threads = True
+    
+    def __init__(
+        self,
+        bot,
+        update_queue,
+        listen: str = '0.0.0.0',
+        port: int = 8443,
+        path: str = '/webhook',
+        secret_token: str = None,
+        max_queue_size: int = 1000,
+        max_body_size: int = 1048576
+    ):
+        super().__init__((listen, port), WebhookRequestHandler)
+        self.bot = bot
+        self.update_queue = update_queue
+        self.path = path
+        self.secret_token = secret_token
+        self.max_queue_size = max_queue_size
+        self.max_body_size = max_body_size
+        self.accepting = True
+        self.stats = WebhookStats()
+    
+    def handle_update(self, secret_token: str, body: bytes) -> int:
+        """Validate and queue one update, returning HTTP status code"""
+        if self.secret_token and not hmac.compare_digest(
+            (secret_token or '').encode(), self.secret_token.encode()
+        ):
+            return 403
+        
+        if not self.accepting:
+            return 503
+        if self.update_queue.qsize() >= self.max_queue_size:
+            return 429
+        
+        try:
+            update = Update.de_json(json.loads(body), self.bot)
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Malformed webhook update: {e}")
+            return 400
+        
+        self.update_queue.put(update)
+        return 200
+    
+    def shutdown(self):
+        self.accepting = False
+        super().shutdown()
+        self.server_close()
+
+
+def create_webhook_server(updater) -> WebhookServer:
+    """Create webhook server from settings"""
+    return WebhookServer(
+        updater.bot,
+        updater.update_queue,
+        listen=settings.webhook_listen,
+        port=settings.webhook_port,
+        path=settings.webhook_path,
+        # Telegram echoes this token back, so a random one still works
+        secret_token=settings.webhook_secret_token or secrets.token_urlsafe(32),
+        max_queue_size=settings.webhook_max_queue_size,
+        max_body_size=settings.webhook_max_body_size
+    )
+
+
+def start_webhook(updater, server: WebhookServer, webhook_url: str):
+    """
+    Start dispatcher, job queue and webhook server, then register webhook
+    
+    Only public Updater API is used: with updater.running and updater.httpd
+    set, Updater.stop() (called by idle()) shuts the server down and stops
+    the dispatcher, which ends both threads started here.
+    """
+    dispatcher_ready = threading.Event()
+    
+    def run_dispatcher():
+        try:
+            updater.dispatcher.start(ready=dispatcher_ready)
+        except Exception:
+            logger.exception("Dispatcher thread failed")
+            dispatcher_ready.set()
+    
+    updater.running = True
+    updater.httpd = server
+    updater.job_queue.start()
+    threading.Thread(target=run_dispatcher, name='dispatcher').start()
+    dispatcher_ready.wait()
+    if not updater.dispatcher.running:
+        updater.stop()
+        raise RuntimeError("Dispatcher failed to start")
+    threading.Thread(target=server.serve_forever, name='webhook').start()
+    if settings.metrics_enabled:
+        register_webhook_gauges(server)
+    
+    updater.bot.set_webhook(
+        url=webhook_url,
+        secret_token=server.secret_token,
+        max_connections=settings.webhook_max_connections
+    )
+    host, port = server.server_address[:2]
+    logger.info(f"Webhook listening on {host}:{port}{server.path}")
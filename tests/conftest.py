@@ -0,0 +1,14 @@
+"""
+Shared test setup
+
+Settings are read from the environment when bot is first imported, so
+the defaults below are set before any test module imports it.
+"""
+import os
+
+os.environ.setdefault('BOT_TOKEN', '123456:TEST')
+os.environ.setdefault('ADMIN_IDS', '1')
+os.environ.setdefault('SUPER_ADMIN_ID', '1')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('MESSAGE_BUFFER_ENABLED', 'false')
+os.environ.setdefault('METRICS_ENABLED', 'false')
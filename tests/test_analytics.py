@@ -0,0 +1,84 @@
+"""Analytics storage and retention"""
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import false
+from sqlalchemy.orm import Query
+
+from bot.database.manager import DatabaseManager
+from bot.database.models import AnalyticsEvent
+from bot.services.analytics_service import HyperLogLog
+from bot.services.retention_service import RetentionService
+
+
+@pytest.fixture
+def manager():
+    manager = DatabaseManager('sqlite://')
+    yield manager
+    manager.close()
+    manager.engine.dispose()
+
+
+def sketch_of(*user_ids) -> bytes:
+    sketch = HyperLogLog()
+    for user_id in user_ids:
+        sketch.add(user_id)
+    return sketch.to_bytes()
+
+
+def test_flushes_of_one_day_are_merged(manager):
+    manager.save_analytics({}, {'users:2026-01-01': sketch_of(1, 2)}, HyperLogLog.merge_bytes)
+    manager.save_analytics({}, {'users:2026-01-01': sketch_of(3)}, HyperLogLog.merge_bytes)
+    
+    registers = manager.get_analytics_sketches(['users:2026-01-01'])['users:2026-01-01']
+    assert HyperLogLog(registers=registers).count() == 3
+
+
+def test_sketch_created_concurrently_is_merged(manager, monkeypatch):
+    key = 'users:2026-01-01'
+    manager.save_analytics({}, {key: sketch_of(1)}, HyperLogLog.merge_bytes)
+    
+    # The locking query misses the row, as if another process inserted
+    # it right after; the insert then conflicts and falls back to a merge
+    with_for_update = Query.with_for_update
+    calls = []
+    
+    def first_misses(self, *args, **kwargs):
+        calls.append(self)
+        query = with_for_update(self, *args, **kwargs)
+        return query.filter(false()) if len(calls) == 1 else query
+    
+    monkeypatch.setattr(Query, 'with_for_update', first_misses)
+    manager.save_analytics({}, {key: sketch_of(2)}, HyperLogLog.merge_bytes)
+    
+    assert len(calls) == 2
+    registers = manager.get_analytics_sketches([key])[key]
+    assert HyperLogLog(registers=registers).count() == 2
+
+
+def test_retention_prunes_old_analytics_events(manager):
+    today = date(2026, 3, 1)
+    old = datetime(2026, 1, 1, 12, 0)
+    recent = datetime(2026, 2, 28, 12, 0)
+    manager.save_analytics(
+        {(old, 'command', 'start', 'en'): 3, (recent, 'command', 'start', 'en'): 2},
+        {},
+        HyperLogLog.merge_bytes
+    )
+    
+    service = RetentionService(
+        manager, retention_days=0, batch_size=1, batch_pause=0, analytics_retention_days=30
+    )
+    result = service.run(today)
+    
+    assert result == {'rolled_up_days': 0, 'purged': 0, 'purged_events': 1}
+    with manager.session_scope() as session:
+        assert [event.minute for event in session.query(AnalyticsEvent)] == [recent]
+
+
+def test_retention_is_off_by_default(manager):
+    minute = datetime.now() - timedelta(days=400)
+    manager.save_analytics({(minute, 'command', 'start', 'en'): 1}, {}, HyperLogLog.merge_bytes)
+    
+    assert RetentionService(manager).run() == {'rolled_up_days': 0, 'purged': 0, 'purged_events': 0}
+    assert manager.get_event_counts(minute - timedelta(days=1)) == {('command', 'start'): 1}
@@ -0,0 +1,56 @@
+"""AsyncDatabaseManager URL handling and cache invalidation"""
+import asyncio
+
+import pytest
+
+from bot.database.async_manager import AsyncDatabaseManager, to_async_url
+from bot.database.manager import DatabaseManager
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('sqlite:///bot.db', 'sqlite+aiosqlite:///bot.db'),
+    ('sqlite+pysqlite:///bot.db', 'sqlite+aiosqlite:///bot.db'),
+    ('sqlite+aiosqlite:///bot.db', 'sqlite+aiosqlite:///bot.db'),
+    ('postgresql://u:p@host/bot', 'postgresql+asyncpg://u:p@host/bot'),
+    ('postgresql+psycopg2://u:p@host/bot', 'postgresql+asyncpg://u:p@host/bot'),
+    ('postgresql+asyncpg://u:p@host/bot', 'postgresql+asyncpg://u:p@host/bot'),
+    ('postgresql+psycopg://u:p@host/bot', 'postgresql+psycopg://u:p@host/bot'),
+    ('mysql+pymysql://u:p@host/bot', 'mysql+aiomysql://u:p@host/bot'),
+])
+def test_to_async_url(url, expected):
+    assert to_async_url(url) == expected
+
+
+@pytest.mark.parametrize('url', ['oracle://u:p@host/bot', 'postgresql+custom://u:p@host/bot'])
+def test_to_async_url_rejects_unknown_drivers(url):
+    with pytest.raises(ValueError):
+        to_async_url(url)
+
+
+@pytest.fixture
+def managers(tmp_path):
+    url = f'sqlite:///{tmp_path / "bot.db"}'
+    sync_manager = DatabaseManager(url)
+    async_manager = AsyncDatabaseManager(url, sync_manager=sync_manager)
+    yield sync_manager, async_manager
+    asyncio.run(async_manager.close())
+    sync_manager.close()
+    sync_manager.engine.dispose()
+
+
+def test_async_writes_invalidate_cached_user(managers, monkeypatch):
+    sync_manager, async_manager = managers
+    sync_manager.get_or_create_user(42, first_name='Test', language='en')
+    published = []
+    monkeypatch.setattr(sync_manager.cache, 'publish_invalidation', published.append)
+    
+    asyncio.run(async_manager.set_user_language(42, 'ru'))
+    
+    # The next sync read sees the async write instead of the cached user
+    assert sync_manager.get_user(42).language == 'ru'
+    assert published == [sync_manager._user_key(42)]
+    
+    asyncio.run(async_manager.block_user(42))
+    
+    assert sync_manager.get_user(42).is_blocked
+    assert len(published) == 2
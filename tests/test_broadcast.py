@@ -0,0 +1,102 @@
+"""BroadcastEngine against a fake bot"""
+import threading
+import time
+
+from telegram.error import BadRequest, RetryAfter, Unauthorized
+
+from bot.services.notification_service import BroadcastEngine
+
+
+class FakeBot:
+    """Records send_message calls and raises scripted errors per chat"""
+    
+    def __init__(self, errors=None):
+        # chat_id -> exceptions raised by successive sends, then success
+        self.errors = {chat_id: list(raised) for chat_id, raised in (errors or {}).items()}
+        self.calls = []
+        self._lock = threading.Lock()
+    
+    def send_message(self, chat_id, text):
+        with self._lock:
+            self.calls.append((chat_id, time.monotonic()))
+            pending = self.errors.get(chat_id)
+            error = pending.pop(0) if pending else None
+        if error is not None:
+            raise error
+        return True
+    
+    def call_times(self, chat_id):
+        return [at for called, at in self.calls if called == chat_id]
+
+
+def run_broadcast(bot, recipients, **kwargs):
+    engine = BroadcastEngine(workers=2, rate=1000, progress_interval=60, **kwargs)
+    broadcast = engine.start(bot, 'hello', recipients, total=len(recipients))
+    assert broadcast.done.wait(10)
+    return engine, broadcast
+
+
+def test_all_recipients_succeed():
+    bot = FakeBot()
+    engine, broadcast = run_broadcast(bot, [1, 2, 3])
+    
+    assert sorted(chat_id for chat_id, _ in bot.calls) == [1, 2, 3]
+    assert broadcast.to_dict()['success'] == 3
+    assert engine.active == []
+
+
+def test_retry_after_pauses_then_retries():
+    bot = FakeBot({1: [RetryAfter(0.2)]})
+    _, broadcast = run_broadcast(bot, [1])
+    
+    first, second = bot.call_times(1)
+    assert second - first >= 0.2
+    assert broadcast.success == 1
+    assert broadcast.retries == 1
+
+
+def test_retry_after_gives_up_after_max_retries():
+    bot = FakeBot({1: [RetryAfter(0.01)] * 5})
+    _, broadcast = run_broadcast(bot, [1], max_retries=2)
+    
+    assert len(bot.call_times(1)) == 3
+    assert broadcast.failed == 1
+
+
+def test_unauthorized_counts_as_blocked():
+    bot = FakeBot({1: [Unauthorized('Forbidden: bot was blocked by the user')]})
+    _, broadcast = run_broadcast(bot, [1])
+    
+    assert len(bot.call_times(1)) == 1
+    assert broadcast.blocked == 1
+    assert broadcast.failed == 0
+
+
+def test_bad_request_counts_as_failed():
+    bot = FakeBot({1: [BadRequest('Chat not found')]})
+    _, broadcast = run_broadcast(bot, [1])
+    
+    assert len(bot.call_times(1)) == 1
+    assert broadcast.failed == 1
+    assert broadcast.blocked == 0
+
+
+def test_final_breakdown_totals_recipients():
+    bot = FakeBot({
+        2: [Unauthorized('Forbidden: user is deactivated')],
+        3: [BadRequest('Chat not found')],
+        4: [RetryAfter(0.01)],
+        5: [Unauthorized('Forbidden: bot was blocked by the user')],
+    })
+    finished = threading.Event()
+    engine = BroadcastEngine(workers=2, rate=1000, progress_interval=60)
+    broadcast = engine.start(bot, 'hello', range(1, 7), total=6, on_done=lambda b: finished.set())
+    # on_done runs last, after the counters are final
+    assert finished.wait(10)
+    
+    stats = broadcast.to_dict()
+    assert stats['total'] == 6
+    assert stats['sent'] == 6
+    assert (stats['success'], stats['blocked'], stats['failed']) == (3, 2, 1)
+    assert stats['success'] + stats['blocked'] + stats['failed'] == stats['total']
+    assert stats['retries'] == 1
@@ -0,0 +1,150 @@
+"""RedisCacheBackend against fakeredis"""
+import threading
+
+import fakeredis
+import pytest
+import redis
+
+from bot.config.constants import CacheKey
+from bot.database import cache as cache_module
+from bot.database.cache import CacheBackend, MemoryCacheBackend, RedisCacheBackend
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def backend(server):
+    backend = RedisCacheBackend('redis://test', client=fakeredis.FakeRedis(server=server))
+    yield backend
+    backend.close()
+
+
+class BrokenRedis:
+    """Client whose every call fails as if Redis were down"""
+    
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise redis.ConnectionError('Connection refused')
+        return fail
+
+
+# ==================== Reads and writes ====================
+
+def test_get_many_returns_values_in_key_order(backend):
+    backend.set('a', {'x': 1})
+    backend.set('c', [1, 2])
+    
+    assert backend.get_many(['a', 'b', 'c']) == [{'x': 1}, None, [1, 2]]
+    assert backend.stats()['hits'] == 2
+    assert backend.stats()['misses'] == 1
+
+
+def test_get_many_empty(backend):
+    assert backend.get_many([]) == []
+
+
+def test_set_many_roundtrip_with_ttl(backend):
+    backend.set_many({'a': 1, 'b': 'two'}, ttl=60)
+    
+    assert backend.get_many(['a', 'b']) == [1, 'two']
+    assert 0 < backend.client.ttl('a') <= 60
+
+
+def test_delete(backend):
+    backend.set_many({'a': 1, 'b': 2})
+    backend.delete('a', 'b')
+    
+    assert backend.get_many(['a', 'b']) == [None, None]
+
+
+def test_memory_backend_has_batch_interface():
+    backend = MemoryCacheBackend()
+    backend.set_many({'a': 1, 'b': 2})
+    
+    assert backend.get_many(['a', 'b', 'c']) == [1, 2, None]
+    assert backend.get('a') == 1
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+# ==================== Versioned keys ====================
+
+def test_make_key_is_namespaced_and_versioned(backend):
+    key = backend.make_key(CacheKey.USER_DATA, user_id=42)
+    
+    assert key == f'bot:v{cache_module.CACHE_VERSION}:user:42:data'
+
+
+def test_version_bump_misses_old_entries(backend, monkeypatch):
+    old_key = backend.make_key(CacheKey.USER_DATA, user_id=42)
+    backend.set(old_key, {'language': 'en'})
+    
+    monkeypatch.setattr(cache_module, 'CACHE_VERSION', cache_module.CACHE_VERSION + 1)
+    new_key = backend.make_key(CacheKey.USER_DATA, user_id=42)
+    
+    assert new_key != old_key
+    assert backend.get(new_key) is None
+
+
+# ==================== Invalidation ====================
+
+def test_invalidation_reaches_other_processes_only(server):
+    publisher = RedisCacheBackend('redis://test', client=fakeredis.FakeRedis(server=server))
+    subscriber = RedisCacheBackend('redis://test', client=fakeredis.FakeRedis(server=server))
+    
+    received = {'publisher': [], 'subscriber': []}
+    got_message = threading.Event()
+    
+    def on_subscriber(key):
+        received['subscriber'].append(key)
+        got_message.set()
+    
+    publisher.subscribe_invalidations(received['publisher'].append)
+    subscriber.subscribe_invalidations(on_subscriber)
+    try:
+        publisher.publish_invalidation('bot:v1:user:42:data')
+        
+        assert got_message.wait(5)
+        assert received['subscriber'] == ['bot:v1:user:42:data']
+        # The publisher sees its own message on the channel and skips it
+        assert received['publisher'] == []
+    finally:
+        publisher.close()
+        subscriber.close()
+
+
+# ==================== Redis errors ====================
+
+def test_errors_fall_back_to_misses():
+    backend = RedisCacheBackend('redis://test', client=BrokenRedis())
+    
+    assert backend.get('a') is None
+    assert backend.get_many(['a', 'b']) == [None, None]
+    assert backend.stats()['misses'] == 3
+
+
+def test_errors_on_writes_are_swallowed():
+    backend = RedisCacheBackend('redis://test', client=BrokenRedis())
+    
+    backend.set('a', 1)
+    backend.delete('a')
+    backend.publish_invalidation('a')
+    backend.subscribe_invalidations(lambda key: None)
+    
+    assert backend.stats()['errors'] == 4
+
+
+def test_set_many_error_is_swallowed(backend, monkeypatch):
+    def fail(self):
+        raise redis.ConnectionError('Connection reset')
+    monkeypatch.setattr(redis.client.Pipeline, 'execute', fail)
+    
+    backend.set_many({'a': 1})
+    
+    assert backend.stats()['errors'] == 1
@@ -0,0 +1,33 @@
+"""Callback data validation"""
+import pytest
+
+from bot.handlers.callbacks import handle_pagination_callback
+
+
+class FakeQuery:
+    """Records answers and edits of a callback query"""
+    
+    def __init__(self):
+        self.answers = []
+        self.edits = []
+    
+    def answer(self, text=None, **kwargs):
+        self.answers.append(text)
+    
+    def edit_message_text(self, text, **kwargs):
+        self.edits.append(text)
+
+
+@pytest.mark.parametrize('prefix, param', [
+    ('messages.', '0'),
+    ('messages.abc', '0'),
+    ('messages.1', 'x'),
+    ('users', '0:nabc'),
+])
+def test_malformed_pagination_is_answered(prefix, param):
+    query = FakeQuery()
+    
+    handle_pagination_callback(query, prefix, param, 'en')
+    
+    assert query.answers == ['Invalid page']
+    assert query.edits == []
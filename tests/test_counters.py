@@ -0,0 +1,62 @@
+"""Counter reconciliation in DatabaseManager"""
+import pytest
+
+from bot.database.manager import COUNTER_NAMES, PURGED_COUNTER, DatabaseManager
+from bot.database.models import Counter
+
+
+@pytest.fixture
+def manager():
+    manager = DatabaseManager('sqlite://')
+    yield manager
+    manager.close()
+    manager.engine.dispose()
+
+
+def test_reconcile_restores_exact_values(manager):
+    for user_id in (1, 2, 3):
+        manager.get_or_create_user(user_id, first_name='Test')
+    manager.block_user(3)
+    manager.add_message(1, 'text', 'hello')
+    manager.add_message(2, 'text', 'hello')
+    
+    # Drift, e.g. from a crash between a write and its counter update
+    with manager.write_scope() as session:
+        session.get(Counter, 'total_users').value = 100
+        session.get(Counter, 'total_messages').value = 0
+    
+    stats = manager.reconcile_counters()
+    
+    expected = {'total_users': 3, 'active_users': 2, 'blocked_users': 1, 'total_messages': 2}
+    assert stats == expected
+    assert manager._read_counters() == manager.get_statistics() == {**stats, **expected}
+
+
+def test_reconcile_counts_in_counter_transaction(manager, monkeypatch):
+    seen = []
+    count_rows = DatabaseManager._count_rows
+    
+    def spy(session):
+        # The counter rows were locked by this same session before counting
+        locked = {obj.name for obj in session.identity_map.values() if isinstance(obj, Counter)}
+        seen.append((session.in_transaction(), locked))
+        return count_rows(session)
+    
+    monkeypatch.setattr(DatabaseManager, '_count_rows', staticmethod(spy))
+    manager.reconcile_counters()
+    
+    in_transaction, locked = seen[0]
+    assert in_transaction
+    assert set(COUNTER_NAMES) | {PURGED_COUNTER} <= locked
+
+
+def test_repeated_block_counts_once(manager):
+    manager.get_or_create_user(1, first_name='Test')
+    
+    manager.block_user(1)
+    manager.block_user(1)
+    assert manager._read_counters()['blocked_users'] == 1
+    
+    manager.unblock_user(1)
+    manager.unblock_user(1)
+    assert manager._read_counters()['blocked_users'] == 0
@@ -0,0 +1,77 @@
+"""Thread-sharded metrics"""
+import threading
+
+import pytest
+
+from bot.utils.metrics import Counter, Gauge, Histogram, register_webhook_gauges, registry
+from bot.utils.webhook import WebhookStats
+
+
+def run_threads(target, count):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_dead_thread_shards_are_folded():
+    counter = Counter('test_total', 'Test counter')
+    shards = counter.labels()
+    
+    run_threads(lambda: counter.inc(amount=2), 50)
+    
+    assert shards.merged() == [100]
+    # Only the finished threads recorded, so no shard is left
+    assert shards._shards == []
+    
+    counter.inc()
+    run_threads(counter.inc, 10)
+    
+    assert shards.merged() == [111]
+    assert len(shards._shards) == 1
+    assert 'test_total 111' in counter.render()
+
+
+def test_live_thread_keeps_recording_into_its_shard():
+    histogram = Histogram('test_seconds', 'Test histogram', buckets=(0.1, 1.0))
+    recorded = threading.Event()
+    release = threading.Event()
+    
+    def worker():
+        histogram.observe(0.05)
+        recorded.set()
+        release.wait(5)
+        histogram.observe(0.5)
+    
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert recorded.wait(5)
+    
+    shards = histogram.labels()
+    assert shards.merged()[:3] == [1, 0, 0]
+    assert len(shards._shards) == 1
+    
+    release.set()
+    thread.join()
+    
+    assert shards.merged()[:3] == [1, 1, 0]
+    assert shards._shards == []
+
+
+def test_webhook_gauge_reads_server_stats():
+    class Server:
+        stats = WebhookStats()
+    
+    Server.stats.record(200, 0.001)
+    Server.stats.record(429, 0.001)
+    register_webhook_gauges(Server())
+    
+    rendered = registry.render()
+    assert 'bot_webhook_requests{status="200"} 1' in rendered
+    assert 'bot_webhook_requests{status="429"} 1' in rendered
+
+
+def test_gauge_has_no_children():
+    with pytest.raises(TypeError):
+        Gauge('test_gauge', 'Test gauge', lambda: 1).labels('a')
@@ -0,0 +1,31 @@
+"""Schema creation on new and existing databases"""
+from sqlalchemy import create_engine, inspect, text
+
+from bot.database.models import Base, create_schema
+
+
+def index_names(engine, table):
+    return {index['name'] for index in inspect(engine).get_indexes(table)}
+
+
+def test_creates_indexes_missing_on_existing_tables():
+    engine = create_engine('sqlite://')
+    create_schema(engine)
+    expected = {
+        table.name: {index.name for index in table.indexes}
+        for table in Base.metadata.sorted_tables
+    }
+    
+    # A database from before these indexes were added
+    with engine.begin() as conn:
+        for name in ('ix_users_last_activity', 'ix_messages_created_at', 'ix_messages_user_id_created_at'):
+            conn.execute(text(f'DROP INDEX {name}'))
+    assert 'ix_users_last_activity' not in index_names(engine, 'users')
+    
+    create_schema(engine)
+    
+    for table, names in expected.items():
+        assert names <= index_names(engine, table)
+    
+    # Idempotent on an up-to-date database
+    create_schema(engine)
@@ -0,0 +1,47 @@
+"""Sampling profiler hook"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from bot.utils.profiling import HandlerProfiler
+
+
+def test_concurrent_sampled_calls_run_unprofiled_instead_of_failing():
+    profiler = HandlerProfiler(enabled=True, sample_rate=1.0)
+    inside = threading.Event()
+    release = threading.Event()
+    
+    def slow():
+        inside.set()
+        release.wait(5)
+        return 'slow'
+    
+    with ThreadPoolExecutor(1) as pool:
+        future = pool.submit(profiler.call, 'slow', slow)
+        assert inside.wait(5)
+        # Profiled call in progress on another thread
+        assert profiler.call('fast', lambda: 'fast') == 'fast'
+        release.set()
+        assert future.result(5) == 'slow'
+    
+    summary = profiler.summary()
+    assert summary['slow']['samples'] == 1
+    assert 'fast' not in summary
+
+
+def test_nested_call_is_not_profiled_again():
+    profiler = HandlerProfiler(enabled=True, sample_rate=1.0)
+    
+    result = profiler.call('outer', lambda: profiler.call('inner', lambda: 42))
+    
+    assert result == 42
+    assert set(profiler.summary()) == {'outer'}
+
+
+def test_many_threads():
+    profiler = HandlerProfiler(enabled=True, sample_rate=1.0)
+    
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda i: profiler.call('work', sum, range(i)), range(200)))
+    
+    assert results == [sum(range(i)) for i in range(200)]
+    assert 1 <= profiler.summary()['work']['samples'] <= 200
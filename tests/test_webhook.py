@@ -0,0 +1,148 @@
+"""WebhookServer over a real local HTTP connection"""
+import http.client
+import json
+import threading
+from queue import Queue
+
+import pytest
+from telegram import User
+from telegram.ext import Updater
+
+from bot.utils.webhook import SECRET_HEADER, WebhookServer, start_webhook
+
+SECRET = 'test-secret'
+
+UPDATE = {
+    'update_id': 1,
+    'message': {
+        'message_id': 1,
+        'date': 0,
+        'chat': {'id': 42, 'type': 'private'},
+        'from': {'id': 42, 'is_bot': False, 'first_name': 'Test'},
+        'text': '/start'
+    }
+}
+
+
+@pytest.fixture
+def server():
+    server = WebhookServer(
+        None,
+        Queue(),
+        listen='127.0.0.1',
+        port=0,
+        path='/webhook',
+        secret_token=SECRET,
+        max_queue_size=2,
+        max_body_size=1024
+    )
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join(5)
+
+
+def post(server, body=None, secret=SECRET, path='/webhook', headers=None):
+    """POST to the server, returning the response"""
+    if body is None:
+        body = json.dumps(UPDATE).encode()
+    all_headers = {'Content-Type': 'application/json'}
+    if secret is not None:
+        all_headers[SECRET_HEADER] = secret
+    all_headers.update(headers or {})
+    
+    host, port = server.server_address[:2]
+    connection = http.client.HTTPConnection(host, port, timeout=5)
+    try:
+        connection.request('POST', path, body, all_headers)
+        response = connection.getresponse()
+        response.read()
+        return response
+    finally:
+        connection.close()
+
+
+def test_valid_update_is_queued(server):
+    response = post(server)
+    
+    assert response.status == 200
+    update = server.update_queue.get_nowait()
+    assert update.update_id == 1
+    assert update.message.text == '/start'
+
+
+@pytest.mark.parametrize('secret', [None, 'wrong-secret'])
+def test_bad_secret_is_forbidden(server, secret):
+    assert post(server, secret=secret).status == 403
+    assert server.update_queue.empty()
+
+
+def test_wrong_path_is_not_found(server):
+    assert post(server, path='/other').status == 404
+    assert server.update_queue.empty()
+
+
+def test_malformed_body_is_bad_request(server):
+    assert post(server, body=b'{not json').status == 400
+    assert server.update_queue.empty()
+
+
+def test_invalid_content_length_is_bad_request(server):
+    assert post(server, headers={'Content-Length': '-1'}).status == 400
+
+
+def test_oversized_body_is_rejected(server):
+    body = json.dumps({**UPDATE, 'padding': 'x' * 2048}).encode()
+    
+    assert post(server, body=body).status == 413
+    assert server.update_queue.empty()
+
+
+def test_full_queue_applies_backpressure(server):
+    assert post(server).status == 200
+    assert post(server).status == 200
+    
+    response = post(server)
+    
+    assert response.status == 429
+    assert response.getheader('Retry-After') == '1'
+    assert server.update_queue.qsize() == 2
+
+
+def test_stopping_server_is_unavailable(server):
+    # First thing shutdown() does, before the listener goes away
+    server.accepting = False
+    
+    assert post(server).status == 503
+    assert server.update_queue.empty()
+
+
+
+def test_start_webhook_runs_until_updater_stop(monkeypatch):
+    updater = Updater(token='123456:TEST', use_context=True)
+    # Cached getMe result, the dispatcher names its threads after the bot
+    monkeypatch.setattr(updater.bot, '_bot', User(1, 'Test', is_bot=True))
+    registered = []
+    monkeypatch.setattr(updater.bot, 'set_webhook', lambda **kwargs: registered.append(kwargs))
+    server = WebhookServer(
+        updater.bot,
+        updater.update_queue,
+        listen='127.0.0.1',
+        port=0,
+        secret_token=SECRET
+    )
+    
+    start_webhook(updater, server, 'https://example.com/webhook')
+    
+    assert updater.running
+    assert updater.dispatcher.running
+    assert registered[0]['secret_token'] == SECRET
+    assert post(server).status == 200
+    
+    updater.stop()
+    
+    assert not updater.running
+    assert not updater.dispatcher.running
+    assert not server.accepting
+    assert not [thread for thread in threading.enumerate() if thread.name in ('dispatcher', 'webhook')]
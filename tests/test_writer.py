@@ -0,0 +1,47 @@
+"""Write-behind message writer"""
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bot.database.manager import DatabaseManager
+from bot.database.writer import MessageWriter, OverflowPolicy
+
+
+@pytest.fixture
+def manager():
+    manager = DatabaseManager('sqlite://')
+    yield manager
+    manager.close()
+    manager.engine.dispose()
+
+
+def test_restart_registers_atexit_once(manager, monkeypatch):
+    registered = []
+    monkeypatch.setattr(atexit, 'register', registered.append)
+    writer = MessageWriter(manager.write_scope, flush_interval=0.01)
+    
+    for _ in range(3):
+        writer.start()
+        writer.stop()
+    
+    assert registered == [writer.stop]
+
+
+def test_counts_from_many_producers(manager):
+    writer = MessageWriter(
+        manager.write_scope,
+        max_queue_size=10,
+        overflow_policy=OverflowPolicy.DROP_NEWEST
+    )
+    # Not started: the queue fills up and producers drop concurrently
+    writer._thread = object()
+    
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda i: writer.put(1, 'text', str(i)), range(2000)))
+    writer._thread = None
+    writer.stop()
+    
+    assert writer.written == 10
+    assert writer.dropped == 1990
+    assert manager.get_messages_count() == 10